@@ -0,0 +1,189 @@
+"""
+Requests per second of the whole application served by tornado HTTPServer and by DirectHTTPServer.
+
+Both servers run in the same process with the same FrontikApplication, load is generated by
+keep-alive clients over raw sockets, so http client overhead doesn't hide the server difference.
+Results are printed as json, so they can be saved and compared between releases:
+
+    python -m benchmarks.http_server --output before.json
+    python -m benchmarks.http_server --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+
+from fastapi import Request, Response
+from tornado.netutil import bind_sockets
+
+from frontik.app import FrontikApplication
+from frontik.options import HTTP_SERVER_DIRECT, HTTP_SERVER_TORNADO, options
+from frontik.routing import router
+from frontik.server import make_http_server
+from frontik.version import version
+
+SERVERS = (HTTP_SERVER_TORNADO, HTTP_SERVER_DIRECT)
+PERCENTILES = (50, 90, 99)
+
+
+@router.get('/benchmark/http_server/get')
+async def get_page() -> Response:
+    return Response(content=b'ok', media_type='text/plain')
+
+
+@router.post('/benchmark/http_server/post')
+async def post_page(request: Request) -> Response:
+    return Response(content=await request.body(), media_type='text/plain')
+
+
+def make_scenarios(body_size: int) -> dict[str, bytes]:
+    body = b'x' * body_size
+    return {
+        'get': b'GET /benchmark/http_server/get HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n',
+        'post': (
+            b'POST /benchmark/http_server/post HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+            b'Content-Type: text/plain\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+        ),
+    }
+
+
+async def read_response(reader: asyncio.StreamReader) -> None:
+    headers = await reader.readuntil(b'\r\n\r\n')
+    if not headers.startswith(b'HTTP/1.1 200'):
+        raise RuntimeError(f'unexpected response {headers!r}')
+    for line in headers.split(b'\r\n'):
+        name, _, value = line.partition(b':')
+        if name.lower() == b'content-length':
+            await reader.readexactly(int(value))
+            return
+    raise RuntimeError(f'response without content-length {headers!r}')
+
+
+async def client(port: int, raw_request: bytes, requests: int, timings: list[int]) -> None:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    perf_counter_ns = time.perf_counter_ns
+    try:
+        for _ in range(requests):
+            started = perf_counter_ns()
+            writer.write(raw_request)
+            await read_response(reader)
+            timings.append(perf_counter_ns() - started)
+    finally:
+        writer.close()
+
+
+async def measure(port: int, raw_request: bytes, connections: int, requests: int) -> dict[str, float]:
+    timings: list[int] = []
+    started = time.perf_counter()
+    await asyncio.gather(*[client(port, raw_request, requests // connections, timings) for _ in range(connections)])
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    result = {f'p{p}_us': timings[min(len(timings) - 1, len(timings) * p // 100)] / 1000 for p in PERCENTILES}
+    result['rps'] = len(timings) / elapsed
+    return result
+
+
+async def run_server(
+    frontik_app: FrontikApplication, server_type: str, scenarios: dict[str, bytes], connections: int, requests: int
+) -> dict[str, dict[str, float]]:
+    options.http_server = server_type
+    sockets = bind_sockets(0, '127.0.0.1')
+    port = sockets[0].getsockname()[1]
+    http_server = make_http_server(frontik_app)
+    http_server.add_sockets(sockets)
+
+    results = {}
+    try:
+        for scenario, raw_request in scenarios.items():
+            await measure(port, raw_request, connections, min(requests, connections * 100))  # warm up
+            results[scenario] = await measure(port, raw_request, connections, requests)
+    finally:
+        http_server.stop()
+        await asyncio.wait_for(http_server.close_all_connections(), timeout=5)
+
+    return results
+
+
+async def run(servers: list[str], connections: int, requests: int, body_size: int) -> dict:
+    options.consul_enabled = False
+    frontik_app = FrontikApplication(app_module_name=None)
+    await frontik_app.init()
+    with frontik_app.worker_state.count_down_lock:
+        frontik_app.worker_state.init_workers_count_down.value -= 1
+
+    scenarios = make_scenarios(body_size)
+    results = {}
+    try:
+        for server_type in servers:
+            results[server_type] = await run_server(frontik_app, server_type, scenarios, connections, requests)
+    finally:
+        await frontik_app.deinit()
+
+    return {
+        'frontik_version': version,
+        'python': platform.python_version(),
+        'connections': connections,
+        'requests': requests,
+        'body_size': body_size,
+        'results': results,
+    }
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    for server_type, scenarios in current['results'].items():
+        for scenario, stats in scenarios.items():
+            base_stats = baseline['results'].get(server_type, {}).get(scenario)
+            if base_stats is None:
+                continue
+            diff = ' '.join(
+                f'{name}={value:.2f}({(value / base_stats[name] - 1) * 100:+.0f}%)'
+                for name, value in stats.items()
+                if base_stats.get(name)
+            )
+            print(f'{server_type:>8} {scenario:<6} {diff}', file=sys.stderr)
+
+
+def print_ab(result: dict) -> None:
+    tornado_results = result['results'].get(HTTP_SERVER_TORNADO, {})
+    for scenario, stats in result['results'].get(HTTP_SERVER_DIRECT, {}).items():
+        tornado_rps = tornado_results.get(scenario, {}).get('rps')
+        if tornado_rps:
+            print(
+                f'{scenario:<6} tornado={tornado_rps:.0f}rps direct={stats["rps"]:.0f}rps '
+                f'({(stats["rps"] / tornado_rps - 1) * 100:+.0f}%)',
+                file=sys.stderr,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+    parser.add_argument('--connections', type=int, default=32, help='concurrent keep-alive connections')
+    parser.add_argument('--requests', type=int, default=20_000, help='requests per scenario')
+    parser.add_argument('--body-size', type=int, default=1024, help='POST request body size in bytes')
+    parser.add_argument('--output', help='write json results to file instead of stdout')
+    parser.add_argument('--baseline', help='json results of previous run to compare with')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.servers, args.connections, args.requests, args.body_size))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    print_ab(result)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            print_comparison(json.load(baseline), result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Upload throughput and memory of request body streaming from the server to the page.
+
+A client sends large bodies over keep-alive connection, the page reads them with request.stream(),
+optionally sleeping after every chunk to emulate slow consumer. Peak memory is measured by tracemalloc
+in a separate pass, as tracing slows everything down. Results are printed as json:
+
+    python -m benchmarks.request_body --output before.json
+    python -m benchmarks.request_body --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from fastapi import Request, Response
+from tornado.netutil import bind_sockets
+
+from frontik.app import FrontikApplication
+from frontik.options import HTTP_SERVER_DIRECT, HTTP_SERVER_TORNADO, options
+from frontik.routing import router
+from frontik.server import make_http_server
+from frontik.version import version
+
+CLIENT_CHUNK_SIZE = 64 * 1024
+consumer_delay_sec = 0.0
+
+
+@router.post('/benchmark/request_body/upload')
+async def upload_page(request: Request) -> Response:
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if consumer_delay_sec:
+            await asyncio.sleep(consumer_delay_sec)
+    return Response(content=str(received).encode(), media_type='text/plain')
+
+
+async def upload(port: int, body_size: int, uploads: int) -> None:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    chunk = b'x' * CLIENT_CHUNK_SIZE
+    try:
+        for _ in range(uploads):
+            writer.write(
+                b'POST /benchmark/request_body/upload HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                b'Content-Type: application/octet-stream\r\nContent-Length: %d\r\n\r\n' % body_size
+            )
+            for offset in range(0, body_size, CLIENT_CHUNK_SIZE):
+                writer.write(chunk[: body_size - offset])
+                await writer.drain()
+
+            headers = await reader.readuntil(b'\r\n\r\n')
+            content_length = next(
+                int(value)
+                for name, _, value in (line.partition(b':') for line in headers.split(b'\r\n'))
+                if name.lower() == b'content-length'
+            )
+            received = await reader.readexactly(content_length)
+            if int(received) != body_size:
+                raise RuntimeError(f'page has received {received!r} bytes instead of {body_size}')
+    finally:
+        writer.close()
+
+
+async def measure(port: int, body_size: int, uploads: int, connections: int) -> dict[str, float]:
+    started = time.perf_counter()
+    await asyncio.gather(*[upload(port, body_size, uploads) for _ in range(connections)])
+    elapsed = time.perf_counter() - started
+    return {'mb_per_sec': body_size * uploads * connections / elapsed / 1_000_000}
+
+
+async def measure_memory(port: int, body_size: int, connections: int) -> dict[str, float]:
+    tracemalloc.start()
+    try:
+        await asyncio.gather(*[upload(port, body_size, 1) for _ in range(connections)])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_traced_mb': peak / 1_000_000}
+
+
+async def run(server_type: str, body_size: int, uploads: int, connections: int, delay_ms: float) -> dict:
+    global consumer_delay_sec  # noqa: PLW0603
+
+    options.consul_enabled = False
+    options.http_server = server_type
+    frontik_app = FrontikApplication(app_module_name=None)
+    await frontik_app.init()
+    with frontik_app.worker_state.count_down_lock:
+        frontik_app.worker_state.init_workers_count_down.value -= 1
+
+    sockets = bind_sockets(0, '127.0.0.1')
+    port = sockets[0].getsockname()[1]
+    http_server = make_http_server(frontik_app)
+    http_server.add_sockets(sockets)
+
+    results = {}
+    try:
+        for scenario, delay in (('fast_consumer', 0.0), ('slow_consumer', delay_ms / 1000)):
+            consumer_delay_sec = delay
+            scenario_uploads = uploads if not delay else 1
+            await measure(port, body_size, 1, 1)  # warm up
+            results[scenario] = await measure(port, body_size, scenario_uploads, connections)
+            results[scenario].update(await measure_memory(port, body_size, connections))
+    finally:
+        http_server.stop()
+        await asyncio.wait_for(http_server.close_all_connections(), timeout=5)
+        await frontik_app.deinit()
+
+    return {
+        'frontik_version': version,
+        'python': platform.python_version(),
+        'http_server': server_type,
+        'request_body_buffer_size': options.request_body_buffer_size,
+        'body_size': body_size,
+        'uploads': uploads,
+        'connections': connections,
+        'results': results,
+    }
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    for scenario, stats in current['results'].items():
+        base_stats = baseline['results'].get(scenario)
+        if base_stats is None:
+            continue
+        diff = ' '.join(
+            f'{name}={value:.2f}({(value / base_stats[name] - 1) * 100:+.0f}%)'
+            for name, value in stats.items()
+            if base_stats.get(name)
+        )
+        print(f'{scenario:<14} {diff}', file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--http-server', choices=(HTTP_SERVER_TORNADO, HTTP_SERVER_DIRECT), default=HTTP_SERVER_TORNADO)
+    parser.add_argument('--body-size', type=int, default=64 * 1024 * 1024, help='upload size in bytes')
+    parser.add_argument('--uploads', type=int, default=4, help='uploads per connection for fast consumer')
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--delay-ms', type=float, default=0.5, help='slow consumer sleep after every chunk')
+    parser.add_argument('--request-body-buffer-size', type=int, default=options.request_body_buffer_size)
+    parser.add_argument('--output', help='write json results to file instead of stdout')
+    parser.add_argument('--baseline', help='json results of previous run to compare with')
+    args = parser.parse_args()
+
+    options.request_body_buffer_size = args.request_body_buffer_size
+    result = asyncio.run(run(args.http_server, args.body_size, args.uploads, args.connections, args.delay_ms))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            print_comparison(json.load(baseline), result)
+
+
+if __name__ == '__main__':
+    main()
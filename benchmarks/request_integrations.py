@@ -0,0 +1,157 @@
+"""
+Per-request cost of entering and exiting request integrations.
+
+`chain` is the compiled RequestIntegrationsChain used by the server, `exit_stack` emulates the previous
+ExitStack over @contextmanager integrations, where disabled integrations were entered too.
+Peak bytes are measured by tracemalloc in a separate pass, as tracing slows everything down:
+
+    python -m benchmarks.request_integrations --output before.json
+    python -m benchmarks.request_integrations --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from pystatsd import StatsDClientStub
+from tornado.httputil import HTTPHeaders, HTTPServerRequest
+
+from frontik.request_integrations import RequestIntegrationsChain, compile_request_integrations, get_integrations
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration
+from frontik.version import version
+
+PERCENTILES = (50, 90, 99)
+
+
+def as_context_manager(integration: RequestIntegration) -> Callable:
+    @contextmanager
+    def ctx(frontik_app: Any, tornado_request: HTTPServerRequest) -> Iterator[IntegrationDto]:
+        if not integration.is_enabled():
+            yield IntegrationDto()
+            return
+
+        dto = integration.enter(frontik_app, tornado_request)
+        try:
+            yield dto
+        finally:
+            integration.exit(dto, None)
+
+    return ctx
+
+
+def make_exit_stack_runner() -> Callable[[Any, HTTPServerRequest], None]:
+    integrations = [
+        (name, integration if not isinstance(integration, RequestIntegration) else as_context_manager(integration))
+        for name, integration in get_integrations()
+    ]
+
+    def run_request(frontik_app: Any, tornado_request: HTTPServerRequest) -> None:
+        with ExitStack() as stack:
+            {name: stack.enter_context(ctx(frontik_app, tornado_request)) for name, ctx in integrations}
+
+    return run_request
+
+
+def make_chain_runner() -> Callable[[Any, HTTPServerRequest], None]:
+    chain: RequestIntegrationsChain = compile_request_integrations()
+
+    def run_request(frontik_app: Any, tornado_request: HTTPServerRequest) -> None:
+        chain.exit(chain.enter(frontik_app, tornado_request))
+
+    return run_request
+
+
+def measure(run_request: Callable, frontik_app: Any, tornado_request: HTTPServerRequest, requests: int) -> dict:
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(requests):
+        started = perf_counter_ns()
+        run_request(frontik_app, tornado_request)
+        timings.append(perf_counter_ns() - started)
+
+    timings.sort()
+    result = {f'p{p}_ns': timings[min(len(timings) - 1, len(timings) * p // 100)] for p in PERCENTILES}
+    result['mean_ns'] = sum(timings) / len(timings)
+    return result
+
+
+def measure_memory(run_request: Callable, frontik_app: Any, tornado_request: HTTPServerRequest, requests: int) -> dict:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            run_request(frontik_app, tornado_request)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {'mean_peak_bytes': sum(peaks) / len(peaks)}
+
+
+def run(requests: int) -> dict:
+    frontik_app = SimpleNamespace(statsd_client=StatsDClientStub())
+    tornado_request = HTTPServerRequest(
+        method='GET', uri='/page', headers=HTTPHeaders({'X-Request-Id': '0123456789abcdef0123456789abcdef'})
+    )
+
+    results = {}
+    for scenario, run_request in (('exit_stack', make_exit_stack_runner()), ('chain', make_chain_runner())):
+        measure(run_request, frontik_app, tornado_request, requests)  # warm up
+        results[scenario] = measure(run_request, frontik_app, tornado_request, requests)
+        results[scenario].update(measure_memory(run_request, frontik_app, tornado_request, min(requests, 10_000)))
+
+    return {
+        'frontik_version': version,
+        'python': platform.python_version(),
+        'integrations': [name for name, _ in get_integrations()],
+        'enabled_integrations': [name for name, _ in compile_request_integrations().integrations],
+        'requests': requests,
+        'results': results,
+    }
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    for scenario, stats in current['results'].items():
+        base_stats = baseline['results'].get(scenario)
+        if base_stats is None:
+            continue
+        diff = ' '.join(
+            f'{name}={value:.2f}({(value / base_stats[name] - 1) * 100:+.0f}%)'
+            for name, value in stats.items()
+            if base_stats.get(name)
+        )
+        print(f'{scenario:<12} {diff}', file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--output', help='write json results to file instead of stdout')
+    parser.add_argument('--baseline', help='json results of previous run to compare with')
+    args = parser.parse_args()
+
+    result = run(args.requests)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            print_comparison(json.load(baseline), result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+find_route latency on synthetic route tables of growing size.
+
+Every table mixes static and parameterized pages, lookups are measured separately for
+hits, 404 (unknown path), 405 (known path, wrong method) and HEAD (served by GET routes).
+Results are printed as json, so they can be saved and compared between releases:
+
+    python -m benchmarks.routing --output before.json
+    python -m benchmarks.routing --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from frontik import routing
+from frontik.options import options
+from frontik.routing import FrontikRouter, find_route, rebuild_route_index
+from frontik.version import version
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+PERCENTILES = (50, 90, 99)
+
+
+async def _page() -> None:
+    pass
+
+
+def register_default_routes() -> None:
+    """Default 404/405 pages are registered by frontik.app, benchmark doesn't need the whole application"""
+    if not routing.not_found_router.routes:
+        routing.not_found_router.get('__not_found')(_page)
+    if not routing.method_not_allowed_router.routes:
+        routing.method_not_allowed_router.get('__method_not_allowed')(_page)
+
+
+def make_route_table(size: int) -> dict[str, list[tuple[str, str]]]:
+    """Registers `size` pages and returns (path, method) lookups for every scenario"""
+    routing._fastapi_routes.clear()
+    routing.routers.clear()
+    router = FrontikRouter()
+
+    hits = []
+    for i in range(size):
+        section = f'section{i % 50}'
+        kind = i % 4
+        if kind == 0:
+            path, request_path = f'/{section}/page{i}', f'/{section}/page{i}'
+        elif kind == 1:
+            path, request_path = f'/{section}/page{i}/{{item_id}}', f'/{section}/page{i}/{i * 7}'
+        elif kind == 2:
+            path, request_path = f'/{section}/{{user_id}}/page{i}', f'/{section}/{i * 3}/page{i}'
+        else:
+            path, request_path = f'/{section}/page{i}/{{item_id:int}}/details', f'/{section}/page{i}/{i}/details'
+
+        router.add_api_route(path, _page, methods=['POST'] if i % 10 == 9 else ['GET'])
+        hits.append((request_path, 'POST' if i % 10 == 9 else 'GET'))
+
+    rebuild_route_index()
+
+    return {
+        'hit': hits,
+        'not_found': [(f'/unknown{i}/page{i}', 'GET') for i in range(size)],
+        'method_not_allowed': [(path, 'DELETE') for path, _ in hits],
+        'head': [(path, 'HEAD') for path, method in hits if method == 'GET'],
+    }
+
+
+def measure(lookups: list[tuple[str, str]], requests: int) -> dict[str, float]:
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(requests):
+        path, method = lookups[i % len(lookups)]
+        started = perf_counter_ns()
+        find_route(path, method)
+        timings.append(perf_counter_ns() - started)
+
+    timings.sort()
+    result = {f'p{p}_us': timings[min(len(timings) - 1, len(timings) * p // 100)] / 1000 for p in PERCENTILES}
+    result['mean_us'] = sum(timings) / len(timings) / 1000
+    result['max_us'] = timings[-1] / 1000
+    return result
+
+
+def run(sizes: list[int], requests: int, seed: int) -> dict:
+    register_default_routes()
+
+    results = {}
+    for size in sizes:
+        scenarios = make_route_table(size)
+        results[str(size)] = {}
+        for scenario, lookups in scenarios.items():
+            random.Random(seed).shuffle(lookups)
+            measure(lookups, min(requests, len(lookups)))  # warm up
+            results[str(size)][scenario] = measure(lookups, requests)
+
+    return {
+        'frontik_version': version,
+        'python': platform.python_version(),
+        'route_cache_size': options.route_cache_size,
+        'requests': requests,
+        'results': results,
+    }
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    for size, scenarios in current['results'].items():
+        for scenario, stats in scenarios.items():
+            base_stats = baseline['results'].get(size, {}).get(scenario)
+            if base_stats is None:
+                continue
+            diff = ' '.join(
+                f'{name}={value:.2f}({(value / base_stats[name] - 1) * 100:+.0f}%)'
+                for name, value in stats.items()
+                if base_stats.get(name)
+            )
+            print(f'{size:>6} {scenario:<20} {diff}', file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--requests', type=int, default=50_000, help='lookups per scenario')
+    parser.add_argument('--route-cache-size', type=int, default=options.route_cache_size)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write json results to file instead of stdout')
+    parser.add_argument('--baseline', help='json results of previous run to compare with')
+    args = parser.parse_args()
+
+    # 404 and 405 lookups log an error on every call
+    routing.routing_logger.disabled = True
+    options.route_cache_size = args.route_cache_size
+
+    result = run(args.sizes, args.requests, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            print_comparison(json.load(baseline), result)
+
+
+if __name__ == '__main__':
+    main()
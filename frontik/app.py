@@ -24,6 +24,7 @@ from tornado import httputil
 from frontik import app_integrations
 from frontik.app_integrations.scylla import ScyllaCluster
 from frontik.app_integrations.statsd import create_statsd_client
+from frontik.auth import check_debug_auth
 from frontik.balancing_client import (
     OutOfRequestTime,
     fail_fast_error_handler,
@@ -36,6 +37,9 @@ from frontik.handler_asgi import default_exception_handler
 from frontik.http_status import CLIENT_CLOSED_REQUEST
 from frontik.options import DEV_MODE_ON_DEMAND_ROUTING, options
 from frontik.process import WorkerState
+from frontik.request_integrations import RequestIntegrationsChain, compile_request_integrations
+from frontik.request_profiler import request_profiler
+from frontik.route_manifest import ManifestRouteManager
 from frontik.routing import (
     import_all_pages,
     method_not_allowed_router,
@@ -49,6 +53,7 @@ from frontik.tornado_connection_handler import TornadoConnectionHandler
 from frontik.util import Sentinel
 from frontik.util.fastapi import make_plain_response
 from frontik.version import version as frontik_version
+from frontik.worker_recycling import WorkerRecycler
 
 if TYPE_CHECKING:
     from pystatsd import StatsDClientABC
@@ -71,11 +76,12 @@ class FrontikApplication(FastAPI, httputil.HTTPServerConnectionDelegate):
         if options.service_name is None:
             options.service_name = self.app_module_name.rsplit('.', 1)[-1]
         self.app_name = options.service_name
-        self.route_manager: Union[DevRouteManager, None] = None
+        self.route_manager: Union[DevRouteManager, ManifestRouteManager, None] = None
 
         self.config: Any = self.application_config()
 
         self.available_integrations: list[app_integrations.Integration] = []
+        self.request_integrations: RequestIntegrationsChain
 
         self.statsd_client: StatsDClientABC = create_statsd_client(options, self)
         self.service_discovery: ServiceDiscovery
@@ -86,13 +92,23 @@ class FrontikApplication(FastAPI, httputil.HTTPServerConnectionDelegate):
         master_done = multiprocessing.Value(c_bool, False)
         count_down_lock = multiprocessing.Lock()
         self.worker_state = WorkerState(init_workers_count_down, master_done, count_down_lock)  # type: ignore
+        self.worker_state.recycling_worker_pid = multiprocessing.Value(c_int, 0)  # type: ignore
+        self.worker_recycler = WorkerRecycler(self.worker_state, self.statsd_client)
 
         if app_module_name is not None:
             if options.dev_mode == DEV_MODE_ON_DEMAND_ROUTING:
                 self.route_manager = DevRouteManager()
                 self.route_manager.import_all_pages(self.app_module_name)
                 self.include_router(self.route_manager.fake_dev_router, prefix='/fake')
+            elif options.route_manifest_path and not options.openapi_enabled:
+                self.route_manager = ManifestRouteManager(options.route_manifest_path)
+                self.route_manager.import_all_pages(self.app_module_name)
             else:
+                if options.route_manifest_path:
+                    app_logger.warning(
+                        'route manifest %s is ignored as openapi_enabled is set, openapi schema needs all pages imported',
+                        options.route_manifest_path,
+                    )
                 import_all_pages(self.app_module_name)
 
         self.router = router
@@ -125,7 +141,7 @@ class FrontikApplication(FastAPI, httputil.HTTPServerConnectionDelegate):
         if self.worker_state.is_master and options.consul_enabled:
             return MasterServiceDiscovery(options, self.statsd_client)
         else:
-            return WorkerServiceDiscovery(self.worker_state.initial_shared_data)
+            return WorkerServiceDiscovery(self.worker_state.initial_shared_data, self.worker_state.upstream_store)
 
     async def install_integrations(self) -> None:
         set_app(self)
@@ -133,6 +149,7 @@ class FrontikApplication(FastAPI, httputil.HTTPServerConnectionDelegate):
         self.service_discovery = self.make_service_discovery()
         self.available_integrations, integration_futures = app_integrations.load_integrations(self)
         await asyncio.gather(*[future for future in integration_futures if future])
+        self.request_integrations = compile_request_integrations()
 
         self._http_client_factory = self.make_http_client_factory()
         self.http_client = self._http_client_factory.get_http_client()
@@ -251,6 +268,33 @@ async def get_status(request: Request) -> ORJSONResponse:
     return ORJSONResponse(request.app.get_current_status())
 
 
+def _check_request_profiler_access(request: Request) -> None:
+    if options.request_profiler_sample_rate <= 0:
+        raise HTTPException(404, 'request profiler is disabled: request_profiler_sample_rate option is not positive')
+
+    if options.debug:
+        return
+
+    failed_auth_headers = check_debug_auth(request.headers, options.debug_login, options.debug_password)
+    if failed_auth_headers is not None:
+        raise HTTPException(401, headers=failed_auth_headers)
+
+
+@router.get('/request_profiler')
+async def get_request_profiler_stats(request: Request) -> ORJSONResponse:
+    _check_request_profiler_access(request)
+    return ORJSONResponse(request_profiler.to_dict())
+
+
+@router.delete('/request_profiler')
+async def reset_request_profiler_stats(request: Request) -> ORJSONResponse:
+    """Returns stats collected before reset"""
+    _check_request_profiler_access(request)
+    stats = request_profiler.to_dict()
+    request_profiler.reset()
+    return ORJSONResponse(stats)
+
+
 class FrontikMiddleware:
     def __init__(self, app: ASGIApp) -> None:
         self.app = app
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Union
+
+from frontik.app_integrations import Integration, integrations_logger
+from frontik.dev_route_manager import DevRouteManager
+from frontik.options import options
+from frontik.util.fs_watcher import InotifyWatcher, PollingWatcher, start_watcher
+
+if TYPE_CHECKING:
+    from asyncio import Future
+
+    from frontik.app import FrontikApplication
+
+
+class DevPagesWatcherIntegration(Integration):
+    def __init__(self) -> None:
+        self.watcher: Union[InotifyWatcher, PollingWatcher, None] = None
+
+    def initialize_app(self, app: FrontikApplication) -> Optional[Future]:
+        if not options.dev_pages_watcher or not isinstance(app.route_manager, DevRouteManager):
+            integrations_logger.info('dev pages watcher is disabled: on demand routing dev mode is off')
+            return None
+
+        self.watcher = start_watcher(app.route_manager.pages_root_folder, app.route_manager.update_changed_pages)
+        return None
+
+    def deinitialize_app(self, app: FrontikApplication) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+
+from tornado.ioloop import PeriodicCallback
+
+from frontik.app_integrations import Integration, integrations_logger
+from frontik.options import options
+
+if TYPE_CHECKING:
+    from asyncio import Future
+
+    from frontik.app import FrontikApplication
+
+SMAPS_ROLLUP_PATH = '/proc/self/smaps_rollup'
+
+
+class MemoryMetricsIntegration(Integration):
+    def initialize_app(self, app: FrontikApplication) -> Optional[Future]:
+        if options.memory_metrics_send_interval_ms is None or options.memory_metrics_send_interval_ms <= 0:
+            integrations_logger.info(
+                'memory metrics are disabled: memory_metrics_send_interval_ms option is not configured',
+            )
+            return None
+
+        if read_memory_usage() is None:
+            integrations_logger.info('memory metrics are disabled: %s is not available', SMAPS_ROLLUP_PATH)
+            return None
+
+        periodic_callback = PeriodicCallback(partial(send_metrics, app), options.memory_metrics_send_interval_ms)
+        periodic_callback.start()
+        return None
+
+
+def parse_smaps_rollup(content: str) -> dict[str, int]:
+    """Returns sizes in bytes by field name, e.g. Rss or Private_Dirty"""
+    usage = {}
+    for line in content.splitlines():
+        name, _, value = line.partition(':')
+        parts = value.split()
+        if len(parts) == 2 and parts[1] == 'kB' and parts[0].isdigit():
+            usage[name] = int(parts[0]) * 1024
+    return usage
+
+
+def read_memory_usage() -> Optional[dict[str, int]]:
+    try:
+        with open(SMAPS_ROLLUP_PATH, encoding='ascii') as smaps_rollup:
+            return parse_smaps_rollup(smaps_rollup.read())
+    except OSError:
+        return None
+
+
+def send_metrics(app: FrontikApplication) -> None:
+    """Shared memory is what workers still share with master after fork, private is what copy-on-write has copied"""
+    usage = read_memory_usage()
+    if usage is None:
+        return
+
+    worker = str(app.worker_state.worker_id or 0)  # no worker id in single process mode
+    shared = usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0)
+    private = usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+    app.statsd_client.gauge('worker.memory.shared', shared, worker=worker)
+    app.statsd_client.gauge('worker.memory.private', private, worker=worker)
+    app.statsd_client.gauge('worker.memory.pss', usage.get('Pss', 0), worker=worker)
+    app.statsd_client.gauge('worker.memory.rss', usage.get('Rss', 0), worker=worker)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Optional
+
+from frontik.app_integrations import Integration, integrations_logger
+from frontik.options import options
+
+if TYPE_CHECKING:
+    from asyncio import Future
+
+    from frontik.app import FrontikApplication
+    from frontik.dev_route_manager import OnDemandRouteManager
+
+routing_logger = logging.getLogger('frontik.routing')
+
+
+class PagesWarmupIntegration(Integration):
+    def __init__(self) -> None:
+        self.warmup_task: Optional[asyncio.Task] = None
+
+    def initialize_app(self, app: FrontikApplication) -> Optional[Future]:
+        if not options.pages_warmup or app.route_manager is None:
+            integrations_logger.info(
+                'pages warmup is disabled: pages are not imported on demand or pages_warmup is off'
+            )
+            return None
+
+        historical_hits = load_page_hits(options.pages_warmup_stats_path)
+        self.warmup_task = asyncio.create_task(warm_up_pages(app.route_manager, historical_hits))
+        return None
+
+    def deinitialize_app(self, app: FrontikApplication) -> None:
+        if self.warmup_task is not None:
+            self.warmup_task.cancel()
+
+        if app.route_manager is not None and options.pages_warmup_stats_path:
+            dump_page_hits(options.pages_warmup_stats_path, app.route_manager.page_hits)
+
+
+def load_page_hits(stats_path: Optional[str]) -> Counter[str]:
+    if not stats_path:
+        return Counter()
+
+    try:
+        with open(stats_path, encoding='utf-8') as stats_file:
+            return Counter(json.load(stats_file))
+    except FileNotFoundError:
+        return Counter()
+    except Exception as e:
+        routing_logger.warning('failed to read pages warmup stats %s: %s', stats_path, e)
+        return Counter()
+
+
+def dump_page_hits(stats_path: str, page_hits: Counter[str]) -> None:
+    """
+    Adds hits of this process to saved ones, so every worker contributes to the next warmup order.
+    Workers stopping at once are serialized by a lock file, stats file is replaced atomically.
+    """
+    tmp_path = f'{stats_path}.{os.getpid()}.tmp'
+    try:
+        with open(f'{stats_path}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            hits = load_page_hits(stats_path)
+            hits.update(page_hits)
+            with open(tmp_path, 'w', encoding='utf-8') as stats_file:
+                json.dump(dict(hits), stats_file)
+            os.replace(tmp_path, stats_path)
+    except Exception as e:
+        routing_logger.warning('failed to write pages warmup stats %s: %s', stats_path, e)
+
+
+async def warm_up_pages(route_manager: OnDemandRouteManager, historical_hits: Counter[str]) -> None:
+    """
+    Imports pending page modules, most requested first.
+    Imports run for at most pages_warmup_time_slice_ms in a row, then the loop is left for requests for the same time.
+    """
+    await asyncio.sleep(options.pages_warmup_delay_sec)
+
+    modules = sorted(
+        route_manager.get_pending_modules(),
+        key=lambda name: (-historical_hits[name], name),
+    )
+    routing_logger.info('pages warmup started, %d modules to import', len(modules))
+
+    time_slice = options.pages_warmup_time_slice_ms / 1000
+    warmup_start = slice_start = time.perf_counter()
+    imported = 0
+    for name in modules:
+        try:
+            route_manager.import_module(name)
+            imported += 1
+        except Exception:
+            routing_logger.exception('pages warmup failed to import %s', name)
+
+        if time.perf_counter() - slice_start >= time_slice:
+            await asyncio.sleep(time_slice)
+            slice_start = time.perf_counter()
+        else:
+            await asyncio.sleep(0)
+
+    routing_logger.info(
+        'pages warmup imported %d modules in %.2fs',
+        imported,
+        time.perf_counter() - warmup_start,
+    )
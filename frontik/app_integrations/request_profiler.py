@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import tracemalloc
+from typing import TYPE_CHECKING, Optional
+
+from frontik.app_integrations import Integration, integrations_logger
+from frontik.options import options
+
+if TYPE_CHECKING:
+    from asyncio import Future
+
+    from frontik.app import FrontikApplication
+
+
+class RequestProfilerIntegration(Integration):
+    def __init__(self) -> None:
+        self.tracemalloc_started = False
+
+    def initialize_app(self, app: FrontikApplication) -> Optional[Future]:
+        if options.request_profiler_sample_rate <= 0:
+            integrations_logger.info(
+                'request profiler is disabled: request_profiler_sample_rate option is not positive'
+            )
+            return None
+
+        # tracing slows down every allocation, not only in sampled requests
+        if options.request_profiler_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracemalloc_started = True
+
+        integrations_logger.info(
+            'request profiler is enabled with sample rate %s, tracemalloc is %s',
+            options.request_profiler_sample_rate,
+            'on' if tracemalloc.is_tracing() else 'off',
+        )
+        return None
+
+    def deinitialize_app(self, app: FrontikApplication) -> None:
+        if self.tracemalloc_started:
+            tracemalloc.stop()
+            self.tracemalloc_started = False
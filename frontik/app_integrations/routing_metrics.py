@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+
+from tornado.ioloop import PeriodicCallback
+
+from frontik.app_integrations import Integration, integrations_logger
+from frontik.options import options
+from frontik.routing import get_route_cache
+
+if TYPE_CHECKING:
+    from asyncio import Future
+
+    from frontik.app import FrontikApplication
+
+
+class RoutingMetricsIntegration(Integration):
+    def initialize_app(self, app: FrontikApplication) -> Optional[Future]:
+        if options.route_cache_size <= 0:
+            integrations_logger.info('route cache metrics are disabled: route_cache_size option is not positive')
+            return None
+
+        periodic_callback = PeriodicCallback(
+            partial(send_metrics, app), options.statsd_default_periodic_send_interval_sec * 1000
+        )
+        periodic_callback.start()
+        return None
+
+
+def send_metrics(app: FrontikApplication) -> None:
+    route_cache = get_route_cache()
+    if route_cache is None:
+        return
+
+    hits, misses, evictions = route_cache.pop_stats()
+    app.statsd_client.count('routing.cache.hits', hits)
+    app.statsd_client.count('routing.cache.misses', misses)
+    app.statsd_client.count('routing.cache.evictions', evictions)
+    app.statsd_client.gauge('routing.cache.size', len(route_cache))
@@ -1,8 +1,9 @@
 import http.client
 import logging
 import time
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping
 from contextlib import contextmanager
+from typing import Optional
 
 import aiohttp
 from fastapi import Request, Response
@@ -34,6 +35,17 @@ class OutOfRequestTime(Exception):
     pass
 
 
+def get_header_timeout_ms(server_request_headers: Mapping[str, str]) -> Optional[int]:
+    """Timeout of server request set by the client, either deadline timeout or positive outer timeout"""
+    if DEADLINE_TIMEOUT_MS_HEADER in server_request_headers:
+        return int(server_request_headers[DEADLINE_TIMEOUT_MS_HEADER])
+
+    if OUTER_TIMEOUT_MS_HEADER in server_request_headers and int(server_request_headers[OUTER_TIMEOUT_MS_HEADER]) > 0:
+        return int(server_request_headers[OUTER_TIMEOUT_MS_HEADER])
+
+    return None
+
+
 def modify_http_client_request(
     server_request_headers: Headers,
     start_time: float,
@@ -44,18 +56,8 @@ def modify_http_client_request(
     balanced_request_timeout_ms = balanced_request.request_timeout * 1000
     balanced_request.headers[OUTER_TIMEOUT_MS_HEADER] = f'{balanced_request_timeout_ms:.0f}'
 
-    if options.http_client_decrease_timeout_by_deadline and (
-        DEADLINE_TIMEOUT_MS_HEADER in server_request_headers
-        or (
-            OUTER_TIMEOUT_MS_HEADER in server_request_headers
-            and int(server_request_headers[OUTER_TIMEOUT_MS_HEADER]) > 0
-        )
-    ):
-        if DEADLINE_TIMEOUT_MS_HEADER in server_request_headers:
-            header_timeout = int(server_request_headers[DEADLINE_TIMEOUT_MS_HEADER])
-        else:
-            header_timeout = int(server_request_headers[OUTER_TIMEOUT_MS_HEADER])
-
+    header_timeout = get_header_timeout_ms(server_request_headers)
+    if options.http_client_decrease_timeout_by_deadline and header_timeout is not None:
         spent_time_ms = (time.time() - start_time) * 1000
         deadline_timeout_ms = min(int(header_timeout - spent_time_ms), balanced_request_timeout_ms)
         if deadline_timeout_ms <= 0:
@@ -92,15 +94,24 @@ def modify_http_client_request(
 
 @contextmanager
 def set_extra_client_params(scope: Scope) -> Iterator:
-    headers = Headers(scope=scope)
+    raw_headers = scope['headers']
     start_time = scope['start_time']
     debug_mode = scope['debug_mode']
     http_client_hook = scope.get('_http_client_hook')
+    headers: Optional[Headers] = None
+
+    task_group = request_context.get_task_group()
 
     def hook(balanced_request):
+        nonlocal headers
+        if task_group is not None:
+            task_group.on_http_request()
         if (local_hook := http_client_hook) is not None:
             local_hook(balanced_request)
 
+        # request headers are converted only for pages which make http requests
+        if headers is None:
+            headers = Headers(raw=list(raw_headers))
         modify_http_client_request(headers, start_time, debug_mode, balanced_request)
 
     debug_enabled = scope['debug_mode'].enabled
@@ -112,25 +123,29 @@ def set_extra_client_params(scope: Scope) -> Iterator:
         extra_client_params.reset(token)
 
 
-def __check_if_timeout_was_reduced(server_request: Request) -> bool:
-    deadline_timeout = server_request.headers.get(DEADLINE_TIMEOUT_MS_HEADER)
-    outer_timeout = server_request.headers.get(OUTER_TIMEOUT_MS_HEADER)
+def __check_if_timeout_was_reduced(server_request_headers: Mapping[str, str]) -> bool:
+    deadline_timeout = server_request_headers.get(DEADLINE_TIMEOUT_MS_HEADER)
+    outer_timeout = server_request_headers.get(OUTER_TIMEOUT_MS_HEADER)
     server_has_insufficient_timeout = (
         deadline_timeout is not None and outer_timeout is not None and int(deadline_timeout) < int(outer_timeout)
     )
     return server_has_insufficient_timeout
 
 
+def out_of_request_time_status(server_request_headers: Mapping[str, str]) -> int:
+    server_has_insufficient_timeout = __check_if_timeout_was_reduced(server_request_headers)
+    return INSUFFICIENT_TIMEOUT if server_has_insufficient_timeout else SERVER_TIMEOUT
+
+
 async def out_of_request_time_error_handler(server_request: Request, exc: OutOfRequestTime) -> Response:
     log.warning('reached deadline timeout')
-    server_has_insufficient_timeout = __check_if_timeout_was_reduced(server_request)
-    return make_plain_response(INSUFFICIENT_TIMEOUT if server_has_insufficient_timeout else SERVER_TIMEOUT)
+    return make_plain_response(out_of_request_time_status(server_request.headers))
 
 
 async def fail_fast_error_handler(server_request: Request, exc: FailFastError) -> Response:
     log.warning(exc)
 
-    server_has_insufficient_timeout = __check_if_timeout_was_reduced(server_request)
+    server_has_insufficient_timeout = __check_if_timeout_was_reduced(server_request.headers)
 
     if exc.failed_result.status_code == INSUFFICIENT_TIMEOUT:
         status_code = INSUFFICIENT_TIMEOUT if server_has_insufficient_timeout else SERVER_TIMEOUT
@@ -15,7 +15,7 @@ from binascii import crc32
 from datetime import datetime
 from http.cookies import SimpleCookie
 from typing import TYPE_CHECKING
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, unquote_plus, urlparse
 
 from lxml import etree
 from lxml.builder import E
@@ -358,6 +358,7 @@ class DebugBufferedHandler(BufferedHandler):
 
 
 DEBUG_HEADER_NAME = 'X-Hh-Debug'
+DEBUG_PARAMS = ('debug', 'notpl', 'notrl', 'noxsl')
 DEBUG_XSL = os.path.join(os.path.dirname(__file__), 'debug/debug.xsl')
 
 
@@ -377,6 +378,37 @@ def _data_to_chunk(data: Any) -> bytes:
     return result
 
 
+class DebugResponseBuffer:
+    """Response body of debug request, bytes above the limit are counted but not kept, None limit keeps them all"""
+
+    __slots__ = ('chunks', 'kept', 'limit', 'size')
+
+    def __init__(self, limit: Optional[int]) -> None:
+        self.limit = limit
+        self.chunks: list[bytes] = []
+        self.kept = 0
+        self.size = 0
+
+    def append(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.limit is None:
+            self.chunks.append(chunk)
+            self.kept += len(chunk)
+            return
+
+        remaining = self.limit - self.kept
+        if remaining <= 0 or not chunk:
+            return
+
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        self.chunks.append(chunk)
+        self.kept += len(chunk)
+
+    def getvalue(self) -> bytes:
+        return b''.join(self.chunks)
+
+
 class DebugTransform:
     def __init__(self, application: FrontikApplication, debug_mode: DebugMode) -> None:
         self.application = application
@@ -412,7 +444,16 @@ class DebugTransform:
                 **cors_headers,
             }
 
-        chunk = b'Streamable response' if response.headers_written else _data_to_chunk(response.body)
+        response_buffer = self.debug_mode.response_buffer
+        if response.headers_written:
+            chunk = b'Streamable response'
+            response_size = len(chunk)
+        elif response_buffer is not None and response_buffer.size > 0:
+            chunk = response_buffer.getvalue()
+            response_size = response_buffer.size
+        else:
+            chunk = _data_to_chunk(response.body)
+            response_size = len(chunk)
         start_time = time.time()
         handler_name = request_context.get_handler_name()
 
@@ -453,7 +494,9 @@ class DebugTransform:
         }
 
         debug_log_data.append(dict_to_xml(original_response, 'original-response'))
-        debug_log_data.set('response-size', str(len(chunk)))
+        debug_log_data.set('response-size', str(response_size))
+        if response_size > len(chunk):
+            debug_log_data.set('response-truncated', str(len(chunk)))
         debug_log_data.set('generate-time', _format_number((time.time() - start_time) * 1000))
 
         for upstream in debug_log_data.xpath('//meta-info/upstream'):
@@ -481,6 +524,27 @@ class DebugTransform:
         return FrontikResponse(status_code=200, headers=wrap_headers, body=log_document)
 
 
+def may_have_debug_markers(tornado_request: FrontikTornadoServerRequest) -> bool:
+    """
+    Cheap check of raw query string and Cookie header, false positives are fine,
+    as DebugMode parses arguments and cookies properly afterwards
+    """
+    if tornado_request.headers.get(DEBUG_HEADER_NAME):
+        return True
+
+    query = tornado_request.query
+    cookie = tornado_request.headers.get('Cookie', '')
+    for param in DEBUG_PARAMS:
+        if param in query or param in cookie:
+            return True
+
+    if '%' in query or '+' in query:  # encoded argument names
+        query = unquote_plus(query)
+        return any(param in query for param in DEBUG_PARAMS)
+
+    return False
+
+
 class DebugMode:
     def __init__(self, tornado_request: FrontikTornadoServerRequest) -> None:
         self.debug_value = get_cookie_or_param_from_request(tornado_request, 'debug')
@@ -494,6 +558,7 @@ class DebugMode:
         self.debug_response = False
         self.profile_xslt = False
         self.failed_auth_headers: Optional[dict] = None
+        self.response_buffer: Optional[DebugResponseBuffer] = None
         self.need_auth = (
             self.debug_value is not None
             or self.inherited
@@ -529,8 +594,41 @@ class DebugMode:
         self.enabled = True
         self.pass_debug = 'nopass' not in self.mode_values or bool(self.inherited)
         self.profile_xslt = 'xslt' in self.mode_values
+        if self.debug_response:
+            # calling service takes inherited debug original-response as the real response body, so it is not cut
+            limit = None if self.inherited else options.debug_response_body_limit
+            self.response_buffer = DebugResponseBuffer(limit)
 
         request_context.set_debug_log_handler(DebugBufferedHandler())
 
         if self.pass_debug:
             debug_log.debug('%s header will be passed to all requests', DEBUG_HEADER_NAME)
+
+
+class DisabledDebugMode(DebugMode):
+    """Debug mode of requests without debug markers, a single immutable instance is shared by all of them"""
+
+    def __init__(self) -> None:
+        for name, value in (
+            ('debug_value', None),
+            ('notpl', None),
+            ('notrl', None),
+            ('noxsl', None),
+            ('mode_values', ''),
+            ('inherited', None),
+            ('pass_debug', False),
+            ('enabled', False),
+            ('debug_response', False),
+            ('profile_xslt', False),
+            ('failed_auth_headers', None),
+            ('response_buffer', None),
+            ('need_auth', False),
+            ('auth_failed', None),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{self.__class__.__name__} is shared by requests and can not be changed')
+
+
+DEBUG_DISABLED = DisabledDebugMode()
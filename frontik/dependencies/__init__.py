@@ -5,7 +5,9 @@ from typing import TYPE_CHECKING, Annotated, Any, Optional, Union
 import http_client
 from fastapi import Depends, Request
 
+from frontik import request_task_group
 from frontik.app_integrations import statsd
+from frontik.request_integrations import request_context
 
 if TYPE_CHECKING:
     from frontik.app import FrontikApplication
@@ -50,6 +52,13 @@ async def __get_statsd_client(request: Request) -> Optional[statsd.StatsDClient]
     return request.app.statsd_client
 
 
+async def __get_request_task_group() -> request_task_group.RequestTaskGroup:
+    task_group = request_context.get_task_group()
+    assert task_group is not None
+    return task_group
+
+
 AppConfig = Annotated[Any, Depends(__get_app_config)]
 HttpClient = Annotated[http_client.HttpClient, Depends(__get_http_client)]
 StatsDClient = Annotated[statsd.StatsDClient, Depends(__get_statsd_client)]
+RequestTaskGroup = Annotated[request_task_group.RequestTaskGroup, Depends(__get_request_task_group)]
@@ -5,6 +5,8 @@ import json
 import logging
 import os
 import pathlib
+import sys
+from collections import Counter
 from typing import TYPE_CHECKING, Callable, TypedDict
 
 from fastapi import APIRouter
@@ -14,6 +16,7 @@ from frontik.routing import (
     find_route,
     get_route_sort_key,
     import_all_pages,
+    insert_sorted_routes,
     not_found_router,
 )
 
@@ -143,8 +146,28 @@ def convert_fastapi_route_to_cache(route: BaseRoute, fs_path: str, mtime: float)
     }
 
 
-class DevRouteManager:
+class OnDemandRouteManager:
+    """Imports page modules on the first request, pending modules may be imported in advance by pages warmup"""
+
+    def __init__(self) -> None:
+        self.page_hits: Counter[str] = Counter()
+
+    def import_route(self, path: str, method: str) -> None:
+        raise NotImplementedError()  # pragma: no cover
+
+    def get_pending_modules(self) -> list[str]:
+        raise NotImplementedError()  # pragma: no cover
+
+    def import_module(self, name: str) -> None:
+        raise NotImplementedError()  # pragma: no cover
+
+    def count_hit(self, route: BaseRoute) -> None:
+        self.page_hits[getattr(getattr(route, 'endpoint', None), '__module__', '')] += 1
+
+
+class DevRouteManager(OnDemandRouteManager):
     def __init__(self) -> None:
+        super().__init__()
         self.routes_map_module: dict[str, RouteCache] = {}
         self.exclude_pages_to_add: list[PageMtime] = []
         self.fake_routes: list[BaseRoute] = []
@@ -152,6 +175,7 @@ class DevRouteManager:
         self.py_files_mtime: dict[str, PageMtime] = {}
         self.fastapi_routes: list[BaseRoute] = _fastapi_routes
         self.not_found_router: APIRouter = not_found_router
+        self.pages_root_folder = ''
 
     def get_frontik_path(self) -> str:  # noqa: PLR6301
         return __file__.replace('dev_route_manager.py', '')
@@ -163,8 +187,8 @@ class DevRouteManager:
         return len(self.get_frontik_path())
 
     def import_all_pages(self, app_module: str) -> None:
-        pages_root_folder = str(pathlib.Path(SRC_FOLDER) / app_module / 'pages')
-        self.py_files_mtime = map_py_files_mtime(pages_root_folder, self.get_frontik_folder_len())
+        self.pages_root_folder = str(pathlib.Path(SRC_FOLDER) / app_module / 'pages')
+        self.py_files_mtime = map_py_files_mtime(self.pages_root_folder, self.get_frontik_folder_len())
         if pathlib.Path(self.get_route_map_path()).is_file():
             routing_logger.info('Importing routes_map module')
 
@@ -268,12 +292,90 @@ class DevRouteManager:
             mandatory_for_import = [convert_fastapi_route_to_cache(self.not_found_router.routes[-1], EMPTY_FS_PATH, 0)]
             file.write(f'mandatory_for_import = {json.dumps(mandatory_for_import)}\n')
 
+    def update_changed_pages(self, fs_paths: set[str]) -> None:
+        """
+        Keeps mtime map and routes map up to date while the server is running, so restart finds no difference.
+        Not imported modules are imported to refresh their routes, imported ones are left for autoreload restart.
+        Empty fs_paths means that changes are unknown and all pages are compared.
+        """
+        folder_len = self.get_frontik_folder_len()
+        if not fs_paths:
+            py_files_mtime = map_py_files_mtime(self.pages_root_folder, folder_len)
+            fs_paths = {
+                page['fs_path']
+                for endpoint, page in py_files_mtime.items()
+                if self.py_files_mtime.get(endpoint) != page
+            }
+            fs_paths.update(
+                page['fs_path'] for endpoint, page in self.py_files_mtime.items() if endpoint not in py_files_mtime
+            )
+
+        changed_pages: list[PageMtime] = []
+        for fs_path in fs_paths:
+            endpoint = fs_path_to_entry(fs_path, folder_len)
+            if not os.path.isfile(fs_path):
+                self.py_files_mtime.pop(endpoint, None)
+                self.remove_module_routes(endpoint)
+                routing_logger.info('Page module is deleted: %s', endpoint)
+                continue
+
+            mtime = pathlib.Path(fs_path).stat().st_mtime
+            page: PageMtime = {'endpoint': endpoint, 'fs_path': fs_path, 'mtime': mtime}
+            self.py_files_mtime[endpoint] = page
+            if endpoint not in sys.modules:
+                changed_pages.append(page)
+
+        for page in changed_pages:
+            self.remove_module_routes(page['endpoint'])
+            try:
+                self.import_module(page['endpoint'])
+            except Exception:
+                routing_logger.exception('Failed to import changed page module %s', page['endpoint'])
+                continue
+
+            new_routes = [
+                route
+                for route in self.fastapi_routes
+                if getattr(route.endpoint, '__module__', '') == page['endpoint']  # type: ignore[attr-defined]
+            ]
+            if not new_routes:
+                self.exclude_pages_to_add.append(page)
+                continue
+
+            fake_routes_count = len(self.fake_routes)
+            for route in new_routes:
+                self.add_fake_route(convert_fastapi_route_to_cache(route, page['fs_path'], page['mtime']))
+            insert_sorted_routes(self.fake_routes, fake_routes_count)
+            routing_logger.info('Routes of changed page module are updated: %s', page['endpoint'])
+
+        self.update_file_cache()
+
+    def remove_module_routes(self, endpoint: str) -> None:
+        self.routes_map_module = {
+            key: route_data for key, route_data in self.routes_map_module.items() if route_data['endpoint'] != endpoint
+        }
+        self.exclude_pages_to_add = [page for page in self.exclude_pages_to_add if page['endpoint'] != endpoint]
+        self.fake_routes[:] = [route for route in self.fake_routes if route.endpoint() != endpoint]  # type: ignore[attr-defined]
+        self.fake_dev_router.routes[:] = [
+            route
+            for route in self.fake_dev_router.routes
+            if route.endpoint() != endpoint  # type: ignore[attr-defined]
+        ]
+
+    def get_pending_modules(self) -> list[str]:
+        endpoints = {route_data['endpoint'] for route_data in self.routes_map_module.values()}
+        return [endpoint for endpoint in endpoints if endpoint not in sys.modules]
+
+    def import_module(self, name: str) -> None:
+        routes_count = len(self.fastapi_routes)
+        importlib.import_module(name)
+        insert_sorted_routes(self.fastapi_routes, routes_count)
+
     def import_route(self, path: str, method: str) -> None:
         scope = find_route(path, method.upper(), self.fake_routes, '/fake')
 
         if scope and 'endpoint' in scope and scope['endpoint'].__name__ == 'route_endpoint':
             endpoint_module_name = scope['endpoint']()
-            importlib.import_module(endpoint_module_name)
-            routing_logger.info('Importing module for matched route: %s', endpoint_module_name)
-
-        self.fastapi_routes.sort(key=get_route_sort_key)
+            if endpoint_module_name not in sys.modules:
+                routing_logger.info('Importing module for matched route: %s', endpoint_module_name)
+                self.import_module(endpoint_module_name)
@@ -0,0 +1,505 @@
+"""
+HTTP/1.1 server on asyncio Protocol and httptools parser, an alternative to tornado HTTPServer.
+
+Requests are passed to the same HTTPServerConnectionDelegate (FrontikApplication) and served by the same
+TornadoConnectionHandler, so request integrations, debug mode and deadlines work as with tornado server.
+Only connection handling is replaced: parsing is done by httptools in C, no IOStream, no per-request
+read coroutines and no per-write futures.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, Any, Optional
+
+from tornado import httputil, netutil
+from tornado.http1connection import CR_OR_LF_RE
+from tornado.httpserver import _HTTPRequestContext
+from tornado.iostream import StreamClosedError
+
+try:
+    import httptools
+except ImportError:
+    httptools = None
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+log = logging.getLogger('direct_server')
+
+CONTINUE_RESPONSE = b'HTTP/1.1 100 (Continue)\r\n\r\n'
+BAD_REQUEST_RESPONSE = b'HTTP/1.1 400 Bad Request\r\n\r\n'
+DEFAULT_IDLE_CONNECTION_TIMEOUT = 3600  # the same as in tornado HTTPServer
+CLOSE_CONNECTIONS_TIMEOUT = 3
+
+
+class DirectRequestContext:
+    """Connection context with the same attributes as tornado one, xheaders are applied per request"""
+
+    def __init__(self, address: Any, address_family: Optional[int], trusted_downstream: Optional[list[str]]) -> None:
+        self.address = address
+        if address_family in (socket.AF_INET, socket.AF_INET6) and address is not None:
+            self.remote_ip = address[0]
+        else:
+            self.remote_ip = '0.0.0.0'
+        self.protocol = 'http'
+        self._orig_remote_ip = self.remote_ip
+        self._orig_protocol = self.protocol
+        self.trusted_downstream = set(trusted_downstream or [])
+
+    def __str__(self) -> str:
+        return self.remote_ip
+
+    _apply_xheaders = _HTTPRequestContext._apply_xheaders
+    _unapply_xheaders = _HTTPRequestContext._unapply_xheaders
+
+
+class DirectHTTPConnection(httputil.HTTPConnection):
+    """One request of a keep-alive connection, implements writing part of tornado HTTP1Connection"""
+
+    def __init__(
+        self,
+        protocol: DirectHTTPProtocol,
+        start_line: httputil.RequestStartLine,
+        headers: httputil.HTTPHeaders,
+        keep_alive: bool,
+    ) -> None:
+        self.protocol = protocol
+        self.context = protocol.context
+        self.start_line = start_line
+        self.headers = headers
+        self.keep_alive = keep_alive
+        self.delegate: Optional[httputil.HTTPMessageDelegate] = None
+        self.close_callback: Optional[Any] = None
+        self.pending_body: list[bytes] = []
+        self.body_size = 0
+        self.message_complete = False
+        self.chunking_output = False
+        self.expected_content_remaining: Optional[int] = None
+        self.finished = False
+
+    def start(self) -> None:
+        if self.protocol.xheaders:
+            self.context._apply_xheaders(self.headers)
+
+        self.delegate = self.protocol.delegate.start_request(self.protocol, self)
+        if self.start_line.version == 'HTTP/1.1' and self.headers.get('Expect', '').lower() == '100-continue':
+            self.protocol.write(CONTINUE_RESPONSE)
+
+        self.delegate.headers_received(self.start_line, self.headers)
+
+        pending_body, self.pending_body = self.pending_body, []
+        for chunk in pending_body:
+            self.deliver_body(chunk)
+        if self.message_complete:
+            self.delegate.finish()
+
+    def body_received(self, chunk: bytes) -> None:
+        self.body_size += len(chunk)
+        if self.body_size > self.protocol.max_body_size:
+            log.warning('request body is larger than max_body_size, closing connection')
+            self.protocol.close_with_error()
+            return
+
+        if self.delegate is None:
+            self.pending_body.append(chunk)
+        else:
+            self.deliver_body(chunk)
+
+    def deliver_body(self, chunk: bytes) -> None:
+        assert self.delegate is not None
+        result = self.delegate.data_received(chunk)
+        if result is not None:
+            self.protocol.wait_before_reading(result)
+
+    def complete_message(self) -> None:
+        self.message_complete = True
+        if self.delegate is not None:
+            self.delegate.finish()
+
+    def set_close_callback(self, callback: Optional[Any]) -> None:
+        self.close_callback = callback
+
+    def on_connection_close(self) -> None:
+        if self.finished:
+            return
+
+        self.finished = True
+        if (callback := self.close_callback) is not None:
+            self.close_callback = None
+            callback()
+        if self.delegate is not None:
+            self.delegate.on_connection_close()
+
+    def write_headers(
+        self,
+        start_line: httputil.RequestStartLine | httputil.ResponseStartLine,
+        headers: httputil.HTTPHeaders,
+        chunk: Optional[bytes] = None,
+    ) -> Awaitable[None]:
+        assert isinstance(start_line, httputil.ResponseStartLine)
+        request_version = self.start_line.version
+        is_head = self.start_line.method == 'HEAD'
+        code = start_line.code
+
+        self.chunking_output = (
+            request_version == 'HTTP/1.1'
+            and not is_head
+            and code not in (204, 304)
+            and (code < 100 or code >= 200)
+            and 'Content-Length' not in headers
+        )
+
+        if is_head or code == 304:
+            self.expected_content_remaining = 0
+        elif 'Content-Length' in headers:
+            self.expected_content_remaining = int(headers['Content-Length'])
+        elif not self.chunking_output:
+            # body is delimited by connection close
+            self.keep_alive = False
+
+        if request_version == 'HTTP/1.1' and not self.keep_alive:
+            headers['Connection'] = 'close'
+        elif request_version == 'HTTP/1.0' and self.keep_alive:
+            headers['Connection'] = 'Keep-Alive'
+        if self.chunking_output:
+            headers['Transfer-Encoding'] = 'chunked'
+
+        lines = [f'HTTP/1.1 {code} {start_line.reason}'.encode('latin-1')]
+        lines.extend(f'{name}: {value}'.encode('latin-1') for name, value in headers.get_all())
+        for line in lines:
+            if CR_OR_LF_RE.search(line):
+                raise ValueError(f'Illegal characters (CR or LF) in header: {line!r}')
+
+        data = b'\r\n'.join(lines) + b'\r\n\r\n'
+        if chunk:
+            data += self.format_chunk(chunk)
+        return self.protocol.write(data)
+
+    def format_chunk(self, chunk: bytes) -> bytes:
+        if self.expected_content_remaining is not None:
+            self.expected_content_remaining -= len(chunk)
+            if self.expected_content_remaining < 0:
+                self.protocol.close()
+                raise httputil.HTTPOutputError('Tried to write more data than Content-Length')
+
+        if self.chunking_output and chunk:
+            return b'%x\r\n%b\r\n' % (len(chunk), chunk)
+        return chunk
+
+    def write(self, chunk: bytes) -> Awaitable[None]:
+        return self.protocol.write(self.format_chunk(chunk))
+
+    def finish(self) -> None:
+        if self.chunking_output:
+            self.protocol.write(b'0\r\n\r\n')
+        elif self.expected_content_remaining:
+            log.warning('response is finished before Content-Length bytes were written, closing connection')
+            self.keep_alive = False
+
+        self.finished = True
+        if not self.message_complete:
+            # the rest of request body would be parsed as the next request
+            self.keep_alive = False
+        if self.protocol.xheaders:
+            self.context._unapply_xheaders()
+
+        self.protocol.request_finished(self)
+
+
+class DirectHTTPProtocol(asyncio.Protocol):
+    def __init__(
+        self,
+        delegate: httputil.HTTPServerConnectionDelegate,
+        xheaders: bool,
+        max_body_size: int,
+        trusted_downstream: Optional[list[str]],
+        idle_connection_timeout: Optional[float] = None,
+        body_timeout: Optional[float] = None,
+    ) -> None:
+        self.delegate = delegate
+        self.xheaders = xheaders
+        self.max_body_size = max_body_size
+        self.trusted_downstream = trusted_downstream
+        # like tornado header_timeout, covers waiting for the next request and reading its headers
+        self.header_timeout = idle_connection_timeout or DEFAULT_IDLE_CONNECTION_TIMEOUT
+        self.body_timeout = body_timeout
+        self.read_timer: Optional[asyncio.TimerHandle] = None
+        self.parser = httptools.HttpRequestParser(self)
+        self.transport: Optional[asyncio.Transport] = None
+        self.context: Optional[DirectRequestContext] = None
+        self.closing = False
+        self.closed = False
+
+        # pipelined requests are served one by one, the first one is being served
+        self.requests: deque[DirectHTTPConnection] = deque()
+        self.parsing_request: Optional[DirectHTTPConnection] = None
+        self.url = b''
+        self.headers = httputil.HTTPHeaders()
+
+        self.read_waiters = 0
+        # reading is paused while a pipelined request waits, so a client can't queue requests without limit
+        self.pipeline_paused = False
+        self.write_paused = False
+        self.drain_waiters: list[asyncio.Future] = []
+        self.done_future: Optional[asyncio.Future] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        assert isinstance(transport, asyncio.Transport)
+        self.transport = transport
+        sock = transport.get_extra_info('socket')
+        self.context = DirectRequestContext(
+            transport.get_extra_info('peername'), sock.family if sock is not None else None, self.trusted_downstream
+        )
+        self.done_future = asyncio.get_running_loop().create_future()
+        self.done_future.set_result(None)
+        self._start_read_timer(self.header_timeout, 'idle')
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+        self._cancel_read_timer()
+        for waiter in self.drain_waiters:
+            if not waiter.done():
+                waiter.set_exception(StreamClosedError())
+                waiter.exception()
+        self.drain_waiters.clear()
+
+        for request in list(self.requests):
+            request.on_connection_close()
+        self.requests.clear()
+        self.parsing_request = None
+
+    def data_received(self, data: bytes) -> None:
+        if self.closing:
+            return
+
+        try:
+            self.parser.feed_data(data)
+        except (httptools.HttpParserError, httptools.HttpParserUpgrade) as e:
+            log.info('malformed HTTP request from %s: %s', self.context, e)
+            self.close_with_error()
+
+    def pause_writing(self) -> None:
+        self.write_paused = True
+
+    def resume_writing(self) -> None:
+        self.write_paused = False
+        for waiter in self.drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.drain_waiters.clear()
+
+    def write(self, data: bytes) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self.closed or self.transport is None:
+            future = loop.create_future()
+            future.set_exception(StreamClosedError())
+            future.exception()
+            return future
+
+        self.transport.write(data)
+        if not self.write_paused:
+            assert self.done_future is not None
+            return self.done_future
+
+        future = loop.create_future()
+        self.drain_waiters.append(future)
+        return future
+
+    def wait_before_reading(self, awaitable: Awaitable[None]) -> None:
+        future = asyncio.ensure_future(awaitable)
+        if future.done():
+            return
+
+        self.read_waiters += 1
+        self._update_reading()
+        future.add_done_callback(self._on_read_waiter_done)
+
+    def _on_read_waiter_done(self, _future: asyncio.Future) -> None:
+        self.read_waiters -= 1
+        self._update_reading()
+
+    def _update_reading(self) -> None:
+        if self.closed or self.transport is None:
+            return
+        if self.read_waiters > 0 or self.pipeline_paused:
+            self.transport.pause_reading()
+        else:
+            self.transport.resume_reading()
+
+    def close(self) -> None:
+        self.closing = True
+        if self.transport is not None and not self.closed:
+            self.transport.close()
+
+    def abort(self) -> None:
+        self.closing = True
+        if self.transport is not None and not self.closed:
+            self.transport.abort()
+
+    def close_with_error(self) -> None:
+        if not self.requests or self.requests[0].delegate is None:
+            self.write(BAD_REQUEST_RESPONSE)
+        self.close()
+
+    def request_finished(self, request: DirectHTTPConnection) -> None:
+        if self.requests and self.requests[0] is request:
+            self.requests.popleft()
+
+        if not request.keep_alive:
+            self.close()
+            return
+
+        if self.requests:
+            self.requests[0].start()
+
+        if self.pipeline_paused and len(self.requests) <= 1:
+            self.pipeline_paused = False
+            self._update_reading()
+            if self.parsing_request is not None:
+                self._start_read_timer(self.body_timeout, 'body')
+
+        if not self.requests and self.read_timer is None:
+            self._start_read_timer(self.header_timeout, 'idle')
+
+    def _start_read_timer(self, timeout: Optional[float], phase: str) -> None:
+        self._cancel_read_timer()
+        if timeout is not None and not self.closing:
+            self.read_timer = asyncio.get_running_loop().call_later(timeout, self._on_read_timeout, phase)
+
+    def _cancel_read_timer(self) -> None:
+        if self.read_timer is not None:
+            self.read_timer.cancel()
+            self.read_timer = None
+
+    def _on_read_timeout(self, phase: str) -> None:
+        self.read_timer = None
+        log.info('%s timeout on connection from %s, closing connection', phase, self.context)
+        self.close()
+
+    # httptools parser callbacks
+
+    def on_message_begin(self) -> None:
+        self.url = b''
+        self.headers = httputil.HTTPHeaders()
+        if self.read_timer is None and not self.pipeline_paused:
+            self._start_read_timer(self.header_timeout, 'header')
+
+    def on_url(self, url: bytes) -> None:
+        self.url += url
+
+    def on_header(self, name: bytes, value: bytes) -> None:
+        self.headers.add(name.decode('latin-1'), value.decode('latin-1'))
+
+    def on_headers_complete(self) -> None:
+        if self.closing:
+            return
+
+        self._start_read_timer(self.body_timeout, 'body')
+
+        content_length = self.headers.get('Content-Length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            log.warning('Content-Length %s is larger than max_body_size, closing connection', content_length)
+            self.close_with_error()
+            return
+
+        start_line = httputil.RequestStartLine(
+            self.parser.get_method().decode('latin-1'),
+            self.url.decode('latin-1'),
+            f'HTTP/{self.parser.get_http_version()}',
+        )
+        request = DirectHTTPConnection(self, start_line, self.headers, self.parser.should_keep_alive())
+        self.parsing_request = request
+        self.requests.append(request)
+        if len(self.requests) == 1:
+            request.start()
+        else:
+            # next requests are not read until this one is served, its body is not limited by a timeout meanwhile
+            self.pipeline_paused = True
+            self._cancel_read_timer()
+            self._update_reading()
+
+    def on_body(self, body: bytes) -> None:
+        if self.parsing_request is not None:
+            self.parsing_request.body_received(body)
+
+    def on_message_complete(self) -> None:
+        self._cancel_read_timer()
+        if self.parsing_request is not None:
+            self.parsing_request.complete_message()
+            self.parsing_request = None
+
+
+class DirectHTTPServer:
+    """Has the same bind/start/stop interface as tornado HTTPServer"""
+
+    def __init__(
+        self,
+        delegate: httputil.HTTPServerConnectionDelegate,
+        xheaders: bool = False,
+        max_body_size: Optional[int] = None,
+        trusted_downstream: Optional[list[str]] = None,
+        idle_connection_timeout: Optional[float] = None,
+        body_timeout: Optional[float] = None,
+    ) -> None:
+        if httptools is None:
+            raise RuntimeError('httptools is required for direct http server, install frontik[httptools]')
+
+        self.delegate = delegate
+        self.xheaders = xheaders
+        self.max_body_size = max_body_size if max_body_size is not None else 100 * 1024 * 1024
+        self.trusted_downstream = trusted_downstream
+        self.idle_connection_timeout = idle_connection_timeout
+        self.body_timeout = body_timeout
+        self.sockets: list[socket.socket] = []
+        self.servers: list[asyncio.Task] = []
+        self.protocols: weakref.WeakSet[DirectHTTPProtocol] = weakref.WeakSet()
+
+    def make_protocol(self) -> DirectHTTPProtocol:
+        protocol = DirectHTTPProtocol(
+            self.delegate,
+            self.xheaders,
+            self.max_body_size,
+            self.trusted_downstream,
+            self.idle_connection_timeout,
+            self.body_timeout,
+        )
+        self.protocols.add(protocol)
+        return protocol
+
+    def bind(self, port: int, address: Optional[str] = None, reuse_port: bool = False) -> None:
+        self.sockets.extend(netutil.bind_sockets(port, address, reuse_port=reuse_port))
+
+    def add_sockets(self, sockets: list[socket.socket]) -> None:
+        self.sockets.extend(sockets)
+        self.start()
+
+    def start(self) -> None:
+        loop = asyncio.get_event_loop()
+        for sock in self.sockets[len(self.servers) :]:
+            self.servers.append(loop.create_task(loop.create_server(self.make_protocol, sock=sock)))
+
+    def stop(self) -> None:
+        for server_task in self.servers:
+            if not server_task.done():
+                server_task.cancel()
+            elif server_task.exception() is None:
+                server_task.result().close()
+
+    async def close_all_connections(self, timeout: float = CLOSE_CONNECTIONS_TIMEOUT) -> None:
+        for protocol in list(self.protocols):
+            protocol.close()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while any(not protocol.closed for protocol in self.protocols):
+            if loop.time() >= deadline:
+                # peer doesn't read the rest of response, transport.close() waits for it to be flushed
+                for protocol in list(self.protocols):
+                    protocol.abort()
+                return
+            await asyncio.sleep(0.01)
@@ -3,21 +3,27 @@ from __future__ import annotations
 import asyncio
 import http.client
 import logging
-from contextlib import ExitStack
+import time
+from collections.abc import Awaitable, Callable
 from functools import partial
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from tornado.httputil import ResponseStartLine
 from tornado.iostream import StreamClosedError
 
-from frontik.debug import DebugMode, DebugTransform
+from frontik.balancing_client import get_header_timeout_ms, out_of_request_time_status
+from frontik.debug import DEBUG_DISABLED, DebugMode, DebugTransform, may_have_debug_markers
 from frontik.frontik_response import FrontikResponse
 from frontik.http_status import CLIENT_CLOSED_REQUEST
 from frontik.loggers import CUSTOM_JSON_EXTRA, JSON_REQUESTS_LOGGER
-from frontik.request_integrations import get_integrations, request_context
+from frontik.options import options
+from frontik.request_integrations import request_context
 from frontik.request_integrations.integrations_dto import IntegrationDto
+from frontik.request_profiler import request_profiler
+from frontik.request_task_group import REASON_DISCONNECT, RequestTaskGroup
+from frontik.response_writer import CoalescingResponseWriter
 from frontik.routing import find_route
-from frontik.tornado_request import EOF
+from frontik.tornado_request import EOF, AsgiRequestHeaders
 from frontik.util.fastapi import make_plain_response
 
 if TYPE_CHECKING:
@@ -34,24 +40,40 @@ async def serve_tornado_request(
     frontik_app: FrontikApplication,
     tornado_request: FrontikTornadoServerRequest,
 ) -> None:
-    with ExitStack() as stack:
-        integrations: dict[str, IntegrationDto] = {
-            ctx_name: stack.enter_context(ctx(frontik_app, tornado_request)) for ctx_name, ctx in get_integrations()
-        }
+    profile = tornado_request.profile = request_profiler.start_profile()
+    request_integrations = frontik_app.request_integrations
+    integrations = request_integrations.enter(frontik_app, tornado_request)
+    profile.mark('integrations_enter')
+    task_group = RequestTaskGroup(frontik_app.statsd_client)
+    task_group_token = request_context.set_task_group(task_group)
+    frontik_app.worker_recycler.request_started()
+    exc = None
+    try:
         log.info('requested url: %s', tornado_request.uri)
 
         process_request_task = asyncio.create_task(process_request(frontik_app, tornado_request, integrations))
+        task_group.page_task = process_request_task
+        if options.request_deadline_cancellation:
+            _set_request_deadline(tornado_request, task_group)
+
         assert tornado_request.connection is not None
         tornado_request.connection.set_close_callback(  # type: ignore
             partial(
                 _on_connection_close,
                 tornado_request,
-                process_request_task,
+                task_group,
                 integrations,
             )
         )
 
-        response: FrontikResponse = await process_request_task
+        response: FrontikResponse
+        try:
+            response = await process_request_task
+        except asyncio.CancelledError:
+            if not (task_group.deadline_expired and process_request_task.cancelled()):
+                raise
+            response = FrontikResponse(status_code=out_of_request_time_status(tornado_request.headers))
+        task_group.close()
 
         assert tornado_request.connection is not None
         tornado_request.connection.set_close_callback(None)  # type: ignore
@@ -62,11 +84,23 @@ async def serve_tornado_request(
         if not response.headers_written:
             start_line = ResponseStartLine('', response.status_code, response.reason)
             await write_start_line(tornado_request, start_line, response, response.body)
+            profile.mark('response_write')
 
         log_request(tornado_request, response.status_code)
+        profile.mark('logging')
         for integration in integrations.values():
             integration.set_response(response)
         tornado_request.connection.finish()
+    except BaseException as e:
+        exc = e
+        raise
+    finally:
+        task_group.close()
+        request_context.reset_task_group(task_group_token)
+        frontik_app.worker_recycler.request_finished()
+        request_integrations.exit(integrations, exc)
+        profile.mark('integrations_exit')
+        request_profiler.add(tornado_request.handler_name, profile)
 
 
 async def process_request(
@@ -78,6 +112,7 @@ async def process_request(
         return FrontikResponse(status_code=http.client.SERVICE_UNAVAILABLE)
 
     debug_mode = make_debug_mode(frontik_app, tornado_request)
+    tornado_request.profile.mark('debug_mode')
     if debug_mode.auth_failed:
         return FrontikResponse(status_code=http.client.UNAUTHORIZED, headers=debug_mode.failed_auth_headers)
 
@@ -86,13 +121,17 @@ async def process_request(
     if frontik_app.route_manager:
         frontik_app.route_manager.import_route(tornado_request.path, tornado_request.method)
     scope = find_route(tornado_request.path, tornado_request.method, None)
+    if frontik_app.route_manager:
+        frontik_app.route_manager.count_hit(scope['route'])
     tornado_request._path_format = scope['route'].path_format  # type: ignore
+    tornado_request.profile.mark('route_lookup')
 
     response = await execute_asgi_page(frontik_app, tornado_request, scope, debug_mode, integrations)
 
     if debug_mode.debug_response and not response.headers_written:
         debug_transform = DebugTransform(frontik_app, debug_mode)
         response = debug_transform.transform_chunk(tornado_request, response)
+        tornado_request.profile.mark('debug_transform')
 
     return response
 
@@ -109,63 +148,61 @@ async def execute_asgi_page(
 
     response = FrontikResponse(status_code=200)
 
-    request_headers = [
-        (header.encode(CHARSET).lower(), value.encode(CHARSET))
-        for header in tornado_request.headers
-        for value in tornado_request.headers.get_list(header)
-    ]
-
     scope.update({
         'http_version': tornado_request.version,
         'query_string': tornado_request.query.encode(CHARSET),
-        'headers': request_headers,
+        'headers': AsgiRequestHeaders(tornado_request.headers),
         'client': (tornado_request.remote_ip, 0),
         'debug_mode': debug_mode,
         'frontik_app': frontik_app,
         'start_time': tornado_request._start_time,  # noqa:SLF001
         'request_id': tornado_request.request_id,
     })
+    tornado_request.profile.mark('asgi_scope')
 
-    async def receive():
-        chunk = await tornado_request.body_chunks.get()
-
-        if tornado_request.canceled:
-            return {
-                'type': 'http.disconnect',
-            }
-
-        if tornado_request.finished and chunk == EOF:
-            return {
-                'body': b'',
-                'type': 'http.request',
-                'more_body': False,
-            }
+    receive = make_asgi_receive(tornado_request)
 
-        return {
-            'body': chunk,
-            'type': 'http.request',
-            'more_body': not tornado_request.finished or chunk != EOF,
-        }
+    response_writer: Optional[CoalescingResponseWriter] = None
 
     async def send(message):
+        nonlocal response_writer
         assert tornado_request.connection is not None
 
         if message['type'] == 'http.response.start':
+            tornado_request.profile.mark('page')
             response.status_code = int(message['status'])
-            for h in message['headers']:
-                if len(h) == 2:
-                    response.headers.add(h[0].decode(CHARSET), h[1].decode(CHARSET))
+            # asgi header bytes are latin-1, as tornado encodes them back on write
+            add_header = response.headers.add
+            for header in message['headers']:
+                if len(header) == 2:
+                    add_header(header[0].decode('latin-1'), header[1].decode('latin-1'))
         elif message['type'] == 'http.response.body':
             chunk = message['body']
-            if debug_mode.debug_response:
-                response.body += chunk
+            if debug_mode.response_buffer is not None:
+                debug_mode.response_buffer.append(chunk)
             elif not response.headers_written:
                 for integration in integrations.values():
                     integration.set_response(response)
 
+                task_group = request_context.get_task_group()
+                if task_group is not None:
+                    task_group.cancel_deadline()  # response can't be replaced once streaming has started
+
                 start_line = ResponseStartLine('', response.status_code, response.reason)
                 await write_start_line(tornado_request, start_line, response, chunk)
                 response.headers_written = True
+            elif options.response_write_coalescing:
+                if response_writer is None:
+                    response_writer = CoalescingResponseWriter(
+                        tornado_request.connection,
+                        options.response_write_coalescing_bytes,
+                        options.response_write_coalescing_delay_ms / 1000,
+                    )
+                await response_writer.write(chunk)
+                if message.get('more_body', False) is False:
+                    await response_writer.flush()
+                    if chunk == b'':
+                        tornado_request.response_done = True
             else:
                 if chunk == b'' and message['more_body'] is False:
                     tornado_request.response_done = True
@@ -180,11 +217,64 @@ async def execute_asgi_page(
         pass
     finally:
         scope.clear()
+        if response_writer is not None:
+            response_writer.cancel_timer()
+        tornado_request.profile.mark('response_body')
+
+    if response_writer is not None:
+        await response_writer.flush()  # page has failed in the middle of streaming
 
     return response
 
 
+def make_asgi_receive(tornado_request: FrontikTornadoServerRequest) -> Callable[[], Awaitable[dict]]:
+    """
+    Request body is delivered until a message without more_body,
+    after that receive waits for client disconnect, as asgi servers do.
+    """
+    body_done = False
+
+    async def receive() -> dict:
+        nonlocal body_done
+        if body_done:
+            await tornado_request.wait_for_disconnect()
+            return {'type': 'http.disconnect'}
+
+        body_buffer = tornado_request.body_buffer
+        if body_buffer is None and tornado_request.finished:
+            chunk = EOF  # request without body, nothing to wait for
+        else:
+            body_buffer = tornado_request.get_body_buffer()
+            chunk = await body_buffer.get()
+
+        if tornado_request.canceled:
+            return {
+                'type': 'http.disconnect',
+            }
+
+        if chunk is EOF:
+            body_done = True
+            return {
+                'body': b'',
+                'type': 'http.request',
+                'more_body': False,
+            }
+
+        assert body_buffer is not None
+        body_done = body_buffer.at_eof()
+        return {
+            'body': chunk,
+            'type': 'http.request',
+            'more_body': not body_done,
+        }
+
+    return receive
+
+
 def make_debug_mode(frontik_app: FrontikApplication, tornado_request: FrontikTornadoServerRequest) -> DebugMode:
+    if not may_have_debug_markers(tornado_request):
+        return DEBUG_DISABLED
+
     debug_mode = DebugMode(tornado_request)
 
     if not debug_mode.need_auth:
@@ -198,7 +288,19 @@ def make_debug_mode(frontik_app: FrontikApplication, tornado_request: FrontikTor
     return debug_mode
 
 
-def _on_connection_close(tornado_request, process_request_task, integrations):
+def _set_request_deadline(tornado_request: FrontikTornadoServerRequest, task_group: RequestTaskGroup) -> None:
+    try:
+        header_timeout_ms = get_header_timeout_ms(tornado_request.headers)
+    except ValueError:
+        log.warning('invalid timeout headers, request deadline is not set')
+        return
+
+    if header_timeout_ms is not None:
+        spent_time_sec = time.time() - tornado_request._start_time  # noqa:SLF001
+        task_group.set_deadline(header_timeout_ms / 1000 - spent_time_sec)
+
+
+def _on_connection_close(tornado_request, task_group, integrations):
     if getattr(tornado_request, 'response_done', False):
         return
 
@@ -207,12 +309,13 @@ def _on_connection_close(tornado_request, process_request_task, integrations):
 
     response = FrontikResponse(CLIENT_CLOSED_REQUEST, request_id=request_id)
     log_request(tornado_request, CLIENT_CLOSED_REQUEST)
-    tornado_request.canceled = True
+    tornado_request.on_disconnect()
 
     for integration in integrations.values():
         integration.set_response(response)
 
-    process_request_task.cancel()  # serve_tornado_request will be interrupted with CanceledError
+    # page and its upstream requests are cancelled, serve_tornado_request will be interrupted with CanceledError
+    task_group.cancel(REASON_DISCONNECT)
 
 
 def log_request(tornado_request: FrontikTornadoServerRequest, status_code: int) -> None:
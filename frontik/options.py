@@ -10,20 +10,43 @@ DEV_MODE_DEFAULT = 'DEFAULT'
 DEV_MODE_DISABLED = 'DISABLED'
 DEV_MODE_ON_DEMAND_ROUTING = 'ON_DEMAND_ROUTING'
 
+HTTP_SERVER_TORNADO = 'tornado'
+HTTP_SERVER_DIRECT = 'direct'
+
 
 @dataclass
 class Options:
     app_class: Optional[str] = None
     workers: int = 1
+    standby_workers: int = 0
     init_workers_timeout_sec: int = 60
+    worker_max_requests: int = 0
+    worker_max_uptime_sec: int = 0
+    worker_max_rss_mb: int = 0
     tornado_settings: Optional[dict] = None
     max_active_handlers: int = 100
     reuse_port: bool = True
     xheaders: bool = False
+    http_server: str = HTTP_SERVER_TORNADO
     validate_request_id: bool = False
     xsrf_cookies: bool = False
     max_body_size: int = 100_000_000_000
+    request_body_buffer_size: int = 1024 * 1024
+    response_write_coalescing: bool = False
+    response_write_coalescing_bytes: int = 16 * 1024
+    response_write_coalescing_delay_ms: float = 5.0
     openapi_enabled: bool = False
+    route_cache_size: int = 0
+    route_cache_param_route_limit: int = 100
+    pages_import_profile: bool = False
+    pages_manifest_path: Optional[str] = None
+    route_manifest_path: Optional[str] = None
+    pages_warmup: bool = False
+    pages_warmup_delay_sec: float = 5.0
+    pages_warmup_time_slice_ms: float = 20.0
+    pages_warmup_stats_path: Optional[str] = None
+    prefork_preload: bool = False
+    dev_pages_watcher: bool = True
 
     config: Optional[str] = None
     host: str = '0.0.0.0'
@@ -63,9 +86,11 @@ class Options:
     debug: bool = False
     debug_login: Optional[str] = None
     debug_password: Optional[str] = None
+    debug_response_body_limit: int = 10 * 1024 * 1024
 
     http_client_metrics_kafka_cluster: Optional[str] = None
     http_client_decrease_timeout_by_deadline: Optional[bool] = True
+    request_deadline_cancellation: bool = False
 
     kafka_clusters: dict = field(default_factory=dict)
     scylla_clusters: dict = field(default_factory=dict)
@@ -90,6 +115,7 @@ class Options:
 
     gc_custom_thresholds: Optional[str] = None
     gc_metrics_send_interval_ms: Optional[int] = 1000
+    memory_metrics_send_interval_ms: Optional[int] = None
     long_gc_log_enabled: bool = False
     long_gc_log_threshold_sec: float = 0.01
 
@@ -116,6 +142,9 @@ class Options:
 
     send_timeout_stats_interval_ms: int = 60000
 
+    request_profiler_sample_rate: float = 0.0
+    request_profiler_tracemalloc: bool = False
+
     # consul options
     service_name: Optional[str] = None
     consul_enabled: bool = True
@@ -140,6 +169,8 @@ class Options:
     cross_datacenter_upstreams: str = ''
     fail_start_on_empty_upstream: bool = True
     skip_empty_upstream_check_for_upstreams: list = field(default_factory=list)
+    upstreams_shared_memory: bool = False
+    upstreams_shared_memory_size: int = 8 * 1024 * 1024
 
     # opentelemetry options
     opentelemetry_collector_url: str = 'http://127.0.0.1:2360'
@@ -13,6 +13,7 @@ import time
 from collections.abc import Callable
 from contextlib import suppress
 from copy import deepcopy
+from ctypes import c_double
 from dataclasses import dataclass, field
 from functools import partial
 from multiprocessing.context import ForkContext
@@ -23,6 +24,7 @@ from threading import Lock, Thread
 from typing import Any, Optional
 
 from frontik.options import options
+from frontik.upstream_store import SharedUpstreamStore
 from frontik.util.gc import enable_gc
 
 log = logging.getLogger('fork')
@@ -32,6 +34,12 @@ F_SETPIPE_SZ = 1031  # can't use fcntl.F_SETPIPE_SZ on macos
 PIPE_BUFFER_SIZE = 1000000
 MESSAGE_HEADER_MAGIC = b'T1uf31f'
 MESSAGE_SIZE_STRUCT = '=Q'
+MESSAGE_VERSION_STRUCT = '=QB'  # shared data version, flags
+MESSAGE_VERSION_SIZE = struct.calcsize(MESSAGE_VERSION_STRUCT)
+MESSAGE_FLAG_SNAPSHOT = 1
+RESEND_RETRY_INTERVAL_SEC = 0.1
+PROMOTE_STANDBY_SIGNAL = signal.SIGUSR1
+RECYCLED_WORKER_REPLACED = -1.0  # recovery_started of standby worker promoted to replace a recycled one
 LISTENER_TASK = set()  # keep task from garbage collector
 
 
@@ -44,9 +52,20 @@ class WorkerState:
     children: dict = field(default_factory=dict)  # pid: worker_id
     write_pipes: dict = field(default_factory=dict)  # pid: write_pipe
     resend_notification: Queue = field(default_factory=lambda: Queue(maxsize=1))
-    resend_dict: dict = field(default_factory=dict)  # pid: flag
+    resend_dict: dict = field(default_factory=dict)  # pid: flag, workers waiting for shared data snapshot
     terminating: bool = False
     initial_shared_data: dict = field(default_factory=dict)
+    initial_shared_data_version: int = 0
+    shared_data_version: int = 0
+    upstream_store: Optional[SharedUpstreamStore] = None
+    standby_workers: dict = field(default_factory=dict)  # pid: flag, master only
+    recovery_started_values: dict = field(default_factory=dict)  # pid: shared value, kept until the child exits
+    worker_id: Optional[int] = None
+    is_standby: bool = False
+    # time of the crash this worker replaces, 0 while in standby, RECYCLED_WORKER_REPLACED for planned recycling
+    recovery_started: Optional[Synchronized] = None
+    # pid of the worker being recycled, or negative pid of its replacement until it serves requests, 0 if none
+    recycling_worker_pid: Optional[Synchronized] = None
 
 
 def fork_workers(
@@ -58,9 +77,10 @@ def fork_workers(
     master_before_shutdown_action: Callable,
     worker_function: Callable,
     worker_listener_handler: Callable,
+    num_standby_workers: int = 0,
 ) -> None:
     ctx = multiprocessing.get_context('fork')
-    log.info('starting %d processes', num_workers)
+    log.info('starting %d processes, %d standby', num_workers, num_standby_workers)
 
     def master_sigterm_handler(signum, _frame):
         if not worker_state.is_master:
@@ -74,12 +94,16 @@ def fork_workers(
 
     signal.signal(signal.SIGTERM, master_sigterm_handler)
     signal.signal(signal.SIGINT, master_sigterm_handler)
+    # inherited by standby workers, so promotion before their signal handler is set does not kill them
+    signal.signal(PROMOTE_STANDBY_SIGNAL, signal.SIG_IGN)
 
     shared_data, lock = master_before_fork_action()
 
     worker_function_wrapped = partial(_worker_function_wrapper, worker_function, worker_listener_handler)
     for worker_id in range(num_workers):
         _start_child(worker_id, worker_state, shared_data, lock, worker_function_wrapped, ctx)
+    for worker_id in range(num_workers, num_workers + num_standby_workers):
+        _start_standby_child(worker_id, worker_state, shared_data, lock, worker_function_wrapped, ctx)
 
     enable_gc()
     timeout = time.time() + options.init_workers_timeout_sec
@@ -115,6 +139,9 @@ def _supervise_workers(
             continue
 
         worker_id = worker_state.children.pop(pid)
+        crash_time = time.time()
+        was_standby = worker_state.standby_workers.pop(pid, False)
+        worker_state.recovery_started_values.pop(pid, None)
 
         try:
             worker_state.write_pipes.pop(pid).close()
@@ -125,6 +152,11 @@ def _supervise_workers(
             log.warning('child %d (pid %d) killed by signal %d, restarting', worker_id, pid, os.WTERMSIG(status))
         elif os.WEXITSTATUS(status) != 0:
             log.warning('child %d (pid %d) exited with status %d, restarting', worker_id, pid, os.WEXITSTATUS(status))
+        elif _is_recycling_worker(worker_state, pid):
+            log.info('child %d (pid %d) is recycled, restarting', worker_id, pid)
+            crash_time = RECYCLED_WORKER_REPLACED
+        elif _is_recycling_replacement(worker_state, pid):
+            log.warning('child %d (pid %d) replacing recycled one exited before serving, restarting', worker_id, pid)
         else:
             log.info('child %d (pid %d) exited normally', worker_id, pid)
             continue
@@ -133,8 +165,17 @@ def _supervise_workers(
             log.info('server is shutting down, not restarting %d', worker_id)
             continue
 
-        worker_pid = _start_child(worker_id, worker_state, shared_data, lock, worker_function, ctx)
-        on_worker_restart(worker_state, worker_pid)
+        if was_standby:
+            _start_standby_child(worker_id, worker_state, shared_data, lock, worker_function, ctx)
+        elif worker_state.standby_workers:
+            standby_worker_id = _promote_standby_child(pid, worker_id, worker_state, crash_time)
+            _start_standby_child(standby_worker_id, worker_state, shared_data, lock, worker_function, ctx)
+        else:
+            recovery_started = None if crash_time == RECYCLED_WORKER_REPLACED else ctx.Value(c_double, crash_time)
+            replacement_pid = _start_child(
+                worker_id, worker_state, shared_data, lock, worker_function, ctx, recovery_started
+            )
+            _pass_recycling_turn(worker_state, pid, replacement_pid)
 
     log.info('all children terminated, exiting')
     sys.exit(0)
@@ -147,6 +188,8 @@ def _start_child(
     lock: Optional[Lock],
     worker_function: Callable,
     ctx: ForkContext,
+    recovery_started: Optional[Synchronized] = None,
+    is_standby: bool = False,
 ) -> int:
     # it cannot be multiprocessing.pipe because we need to set nonblock flag and connect to asyncio
     read_fd, write_fd = os.pipe()
@@ -156,19 +199,103 @@ def _start_child(
     if lock is not None:
         with lock:
             worker_state.initial_shared_data = deepcopy(shared_data)
+            worker_state.initial_shared_data_version = worker_state.shared_data_version
 
-    prc = ctx.Process(target=worker_function, args=(read_fd, write_fd, worker_state, worker_id))
+    prc = ctx.Process(
+        target=worker_function, args=(read_fd, write_fd, worker_state, worker_id, recovery_started, is_standby)
+    )
     prc.start()
     pid: int = prc.pid  # type: ignore
 
     os.close(read_fd)
     worker_state.children[pid] = worker_id
+    if recovery_started is not None:
+        worker_state.recovery_started_values[pid] = recovery_started
     _set_pipe_size(write_fd, worker_id)
-    worker_state.write_pipes[pid] = os.fdopen(write_fd, 'wb')
+    worker_state.write_pipes[pid] = WorkerPipe(os.fdopen(write_fd, 'wb', buffering=0))
     log.info('started child %d, pid=%d', worker_id, pid)
+
+    if lock is not None:
+        with lock:
+            # updates sent between copying shared data and registering the pipe were not delivered
+            if worker_state.shared_data_version != worker_state.initial_shared_data_version:
+                _request_resend(worker_state, pid)
+
     return pid
 
 
+class WorkerPipe:
+    """Non blocking pipe to worker, keeps the unwritten tail of a message to complete it before next writes"""
+
+    __slots__ = ('file', 'pending')
+
+    def __init__(self, file: Any) -> None:
+        self.file = file
+        self.pending = b''
+
+    def write(self, message: bytes) -> bool:
+        written = self.file.write(message) or 0  # None if the pipe is full
+        if written == len(message):
+            self.pending = b''
+            return True
+
+        if written > 0 or message is self.pending:
+            self.pending = message[written:]
+        return False
+
+    def flush_pending(self) -> bool:
+        return not self.pending or self.write(self.pending)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _start_standby_child(
+    worker_id: int,
+    worker_state: WorkerState,
+    shared_data: dict,
+    lock: Optional[Lock],
+    worker_function: Callable,
+    ctx: ForkContext,
+) -> None:
+    recovery_started = ctx.Value(c_double, 0.0)
+    pid = _start_child(worker_id, worker_state, shared_data, lock, worker_function, ctx, recovery_started, True)
+    worker_state.standby_workers[pid] = True
+
+
+def _promote_standby_child(exited_pid: int, worker_id: int, worker_state: WorkerState, crash_time: float) -> int:
+    """Standby worker takes place of the crashed or recycled one, returns its former id for the new standby worker"""
+    pid = next(iter(worker_state.standby_workers))  # the oldest one is most likely initialized
+    del worker_state.standby_workers[pid]
+    # the turn is passed before promotion, as promoted worker releases it as soon as it serves requests
+    _pass_recycling_turn(worker_state, exited_pid, pid)
+    worker_state.recovery_started_values[pid].value = crash_time
+    standby_worker_id = worker_state.children[pid]
+    worker_state.children[pid] = worker_id
+    os.kill(pid, PROMOTE_STANDBY_SIGNAL)
+    log.info('promoted standby child %d (pid %d) to replace child %d', standby_worker_id, pid, worker_id)
+    return standby_worker_id
+
+
+def _is_recycling_worker(worker_state: WorkerState, pid: int) -> bool:
+    return worker_state.recycling_worker_pid is not None and worker_state.recycling_worker_pid.value == pid
+
+
+def _is_recycling_replacement(worker_state: WorkerState, pid: int) -> bool:
+    return worker_state.recycling_worker_pid is not None and worker_state.recycling_worker_pid.value == -pid
+
+
+def _pass_recycling_turn(worker_state: WorkerState, pid: int, replacement_pid: int) -> None:
+    """Replacement of the recycled worker holds the turn until it serves requests, so workers are recycled one by one"""
+    recycling_worker_pid = worker_state.recycling_worker_pid
+    if recycling_worker_pid is None:
+        return
+
+    with recycling_worker_pid.get_lock():
+        if recycling_worker_pid.value in (pid, -pid):
+            recycling_worker_pid.value = -replacement_pid
+
+
 def _set_pipe_size(fd: int, worker_id: int) -> None:
     try:
         fcntl.fcntl(fd, F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
@@ -185,11 +312,16 @@ def _errno_from_exception(e: BaseException) -> Optional[int]:
         return None
 
 
-def _worker_function_wrapper(worker_function, worker_listener_handler, read_fd, write_fd, worker_state, worker_id):
+def _worker_function_wrapper(
+    worker_function, worker_listener_handler, read_fd, write_fd, worker_state, worker_id, recovery_started, is_standby
+):
     os.close(write_fd)
     _set_pipe_size(read_fd, worker_id)
     enable_gc()
     worker_state.is_master = False
+    worker_state.worker_id = worker_id
+    worker_state.is_standby = is_standby
+    worker_state.recovery_started = recovery_started
 
     with suppress(Exception):
         loop = asyncio.get_event_loop()
@@ -199,13 +331,15 @@ def _worker_function_wrapper(worker_function, worker_listener_handler, read_fd,
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
-    task = loop.create_task(_worker_listener(read_fd, worker_listener_handler))
+    task = loop.create_task(
+        _worker_listener(read_fd, worker_listener_handler, worker_state.initial_shared_data_version)
+    )
     LISTENER_TASK.add(task)
 
     worker_function()
 
 
-async def _worker_listener(read_fd: int, worker_listener_handler: Callable) -> None:
+async def _worker_listener(read_fd: int, worker_listener_handler: Callable, version: int) -> None:
     stream = asyncio.StreamReader()
     fio = os.fdopen(read_fd)
     await asyncio.get_running_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), fio)
@@ -215,10 +349,20 @@ async def _worker_listener(read_fd: int, worker_listener_handler: Callable) -> N
             await stream.readuntil(MESSAGE_HEADER_MAGIC)
             size_header = await stream.readexactly(8)
             (size,) = struct.unpack(MESSAGE_SIZE_STRUCT, size_header)
+            message_version, flags = struct.unpack(
+                MESSAGE_VERSION_STRUCT, await stream.readexactly(MESSAGE_VERSION_SIZE)
+            )
             data_raw = await stream.readexactly(size)
-            log.debug('received data from master, length: %d', size)
+            log.debug('received data from master, version: %d, length: %d', message_version, size)
+
+            if not flags & MESSAGE_FLAG_SNAPSHOT and message_version != version + 1:
+                if message_version > version:
+                    log.warning('missed shared data updates %d-%d, waiting for snapshot', version + 1, message_version)
+                continue
+
             data = pickle.loads(data_raw)
             worker_listener_handler(data)
+            version = message_version
         except asyncio.IncompleteReadError:
             log.exception('master shared data pipe is closed')
             sys.exit(1)
@@ -236,7 +380,7 @@ def __master_function_wrapper(
     )
     resend_thread.start()
 
-    update_shared_data_hook = partial(__send_to_all, worker_state, worker_state.resend_notification)
+    update_shared_data_hook = partial(__send_to_all, worker_state)
     master_after_fork_action(update_shared_data_hook)
 
 
@@ -250,61 +394,73 @@ def __resend(
 
     while True:
         resend_notification.get()
-        time.sleep(1.0)
 
-        with lock:
-            data = pickle.dumps(list(shared_data.values()))
-            clients = list(resend_dict.keys())
-            if log.isEnabledFor(logging.DEBUG):
-                client_ids = ','.join(map(str, clients))
-                log.debug('sending data to %s length: %d', client_ids, len(data))
-            resend_dict.clear()
+        while resend_dict:
+            with lock:
+                snapshot = None
+                for worker_pid in list(resend_dict.keys()):
+                    pipe = worker_state.write_pipes.get(worker_pid, None)
+                    if pipe is None:
+                        resend_dict.pop(worker_pid, None)
+                        continue
+
+                    # the tail of a partially written message is expected by worker before anything else
+                    try:
+                        if not pipe.flush_pending():
+                            continue
+                    except Exception as e:
+                        log.exception('client %s pipe write failed  %s', worker_pid, e)
+                        resend_dict.pop(worker_pid)
+                        continue
+
+                    if snapshot is None:
+                        snapshot = __make_message(
+                            worker_state.shared_data_version,
+                            MESSAGE_FLAG_SNAPSHOT,
+                            pickle.dumps(list(shared_data.values())),
+                        )
+                        log.debug(
+                            'sending snapshot version %d length: %d', worker_state.shared_data_version, len(snapshot)
+                        )
+
+                    resend_dict.pop(worker_pid)
+                    __send_update(worker_state, worker_pid, pipe, snapshot)
+
+            if resend_dict:
+                time.sleep(RESEND_RETRY_INTERVAL_SEC)
+
+
+def __send_to_all(worker_state: WorkerState, data: bytes) -> None:
+    worker_state.shared_data_version += 1
+    message = __make_message(worker_state.shared_data_version, 0, data)
+    log.debug('sending data version %d to all workers length: %d', worker_state.shared_data_version, len(data))
 
-            for worker_id in clients:
-                pipe = worker_state.write_pipes.get(worker_id, None)
+    for worker_pid, pipe in worker_state.write_pipes.items():
+        if worker_pid in worker_state.resend_dict:
+            continue  # worker will get this update with snapshot
 
-                if pipe is None:
-                    continue
+        __send_update(worker_state, worker_pid, pipe, message)
 
-                # writing 2 times to ensure fix of client reading pattern
-                __send_update(resend_notification, resend_dict, worker_id, pipe, data)
-                __send_update(resend_notification, resend_dict, worker_id, pipe, data)
 
-
-def __send_to_all(
-    worker_state: WorkerState,
-    resend_notification: Queue,
-    data: bytes,
-) -> None:
-    log.debug('sending data to all workers length: %d', len(data))
-    for worker_pid, pipe in worker_state.write_pipes.items():
-        __send_update(resend_notification, worker_state.resend_dict, worker_pid, pipe, data)
+def __make_message(version: int, flags: int, data: bytes) -> bytes:
+    return b''.join((
+        MESSAGE_HEADER_MAGIC,
+        struct.pack(MESSAGE_SIZE_STRUCT, len(data)),
+        struct.pack(MESSAGE_VERSION_STRUCT, version, flags),
+        data,
+    ))
 
 
-def __send_update(
-    resend_notification: Queue,
-    resend_dict: dict[int, bool],
-    worker_pid: int,
-    pipe: Any,
-    data: bytes,
-) -> None:
-    header_written = False
+def __send_update(worker_state: WorkerState, worker_pid: int, pipe: WorkerPipe, message: bytes) -> None:
     try:
-        pipe.write(MESSAGE_HEADER_MAGIC + struct.pack(MESSAGE_SIZE_STRUCT, len(data)))
-        header_written = True
-        pipe.write(data)
-        pipe.flush()
-    except BlockingIOError:
-        log.warning('client %s pipe blocked', worker_pid)
-        if header_written:
-            resend_dict[worker_pid] = True
-            with contextlib.suppress(Full):
-                resend_notification.put_nowait(True)
+        if not pipe.write(message):
+            log.warning('client %s pipe blocked', worker_pid)
+            _request_resend(worker_state, worker_pid)
     except Exception as e:
         log.exception('client %s pipe write failed  %s', worker_pid, e)
 
 
-def on_worker_restart(worker_state: WorkerState, worker_pid: int) -> None:
+def _request_resend(worker_state: WorkerState, worker_pid: int) -> None:
     worker_state.resend_dict[worker_pid] = True
     with contextlib.suppress(Full):
         worker_state.resend_notification.put_nowait(True)
@@ -1,14 +1,84 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+
 from frontik.request_integrations import request_context, request_limiter
-from frontik.request_integrations.sentry import sentry_context
-from frontik.request_integrations.telemetry import otel_instrumentation_ctx
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration, exc_info
+from frontik.request_integrations.sentry import SentryIntegration
+from frontik.request_integrations.telemetry import TelemetryIntegration
+
+if TYPE_CHECKING:
+    from tornado.httputil import HTTPServerRequest
+
+    from frontik.app import FrontikApplication
 
 _integrations: list = [
-    ('request_context', request_context.request_context),
-    ('request_limiter', request_limiter.request_limiter),
-    ('telemetry', otel_instrumentation_ctx),
-    ('sentry', sentry_context),
+    ('request_context', request_context.RequestContextIntegration()),
+    ('request_limiter', request_limiter.RequestLimiterIntegration()),
+    ('telemetry', TelemetryIntegration()),
+    ('sentry', SentryIntegration()),
 ]
 
 
 def get_integrations() -> list:
     return _integrations
+
+
+class ContextManagerIntegration(RequestIntegration):
+    """Adapter for integrations written as context manager factories, e.g. @contextmanager functions"""
+
+    def __init__(self, ctx: Any) -> None:
+        self.ctx = ctx
+
+    def enter(self, frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> IntegrationDto:
+        ctx = self.ctx(frontik_app, tornado_request)
+        dto = ctx.__enter__()
+        dto.state = ctx
+        return dto
+
+    def exit(self, dto: IntegrationDto, exc: Optional[BaseException]) -> None:
+        dto.state.__exit__(*exc_info(exc))
+
+
+class RequestIntegrationsChain:
+    """Enabled request integrations, entered in order and exited in reverse order, like nested with blocks"""
+
+    __slots__ = ('integrations',)
+
+    def __init__(self, integrations: list[tuple[str, RequestIntegration]]) -> None:
+        self.integrations = tuple(integrations)
+
+    def enter(self, frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> dict[str, IntegrationDto]:
+        dtos: dict[str, IntegrationDto] = {}
+        try:
+            for name, integration in self.integrations:
+                dtos[name] = integration.enter(frontik_app, tornado_request)
+        except BaseException as e:
+            self.exit(dtos, e)
+            raise
+        return dtos
+
+    def exit(self, dtos: dict[str, IntegrationDto], exc: Optional[BaseException] = None) -> None:
+        exit_exc = None
+        for name, integration in reversed(self.integrations):
+            dto = dtos.get(name)
+            if dto is None:
+                continue
+            try:
+                integration.exit(dto, exc)
+            except BaseException as e:
+                exit_exc = exc = e
+
+        if exit_exc is not None:
+            raise exit_exc
+
+
+def compile_request_integrations() -> RequestIntegrationsChain:
+    """Builds integrations chain from current options, should be called once options are parsed"""
+    chain = []
+    for name, integration in get_integrations():
+        if not isinstance(integration, RequestIntegration):
+            chain.append((name, ContextManagerIntegration(integration)))
+        elif integration.is_enabled():
+            chain.append((name, integration))
+    return RequestIntegrationsChain(chain)
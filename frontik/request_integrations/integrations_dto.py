@@ -3,12 +3,18 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Optional
 
 if TYPE_CHECKING:
+    from types import TracebackType
+
+    from tornado.httputil import HTTPServerRequest
+
+    from frontik.app import FrontikApplication
     from frontik.frontik_response import FrontikResponse
 
 
 class IntegrationDto:
-    def __init__(self, value: Any = None) -> None:
+    def __init__(self, value: Any = None, state: Any = None) -> None:
         self.value = value
+        self.state = state  # private data of integration, needed on exit
         self.response: Optional[FrontikResponse] = None
 
     def set_response(self, response: FrontikResponse) -> None:
@@ -16,3 +22,28 @@ class IntegrationDto:
 
     def get_value(self) -> Any:
         return self.value
+
+
+class RequestIntegration:
+    """
+    Request integration is entered before page processing and exited after response is written.
+    Integrations are compiled into a chain on application init, disabled ones are dropped from it.
+    """
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def enter(self, frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> IntegrationDto:
+        raise NotImplementedError()  # pragma: no cover
+
+    def exit(self, dto: IntegrationDto, exc: Optional[BaseException]) -> None:
+        pass
+
+
+def exc_info(
+    exc: Optional[BaseException],
+) -> tuple[Optional[type[BaseException]], Optional[BaseException], Optional[TracebackType]]:
+    """Arguments of __exit__ for exiting context managers from RequestIntegration.exit"""
+    if exc is None:
+        return None, None, None
+    return type(exc), exc, exc.__traceback__
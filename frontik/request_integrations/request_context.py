@@ -1,21 +1,19 @@
 from __future__ import annotations
 
 import contextvars
-from contextlib import contextmanager
 from typing import TYPE_CHECKING, Optional
 
 from fastapi.routing import APIRoute
 from tornado.httputil import HTTPServerRequest
 
 from frontik.options import options
-from frontik.request_integrations.integrations_dto import IntegrationDto
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration
 from frontik.util import check_request_id, generate_uniq_timestamp_request_id
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
-
     from frontik.app import FrontikApplication
     from frontik.debug import DebugBufferedHandler
+    from frontik.request_task_group import RequestTaskGroup
 
 
 class RequestContext:
@@ -28,6 +26,8 @@ class RequestContext:
 
 
 _request_context = contextvars.ContextVar('request_context', default=RequestContext(None))
+# not in RequestContext, as without request_context integration the default context is shared by all requests
+_task_group: contextvars.ContextVar[Optional[RequestTaskGroup]] = contextvars.ContextVar('task_group', default=None)
 
 
 def get_request_context() -> RequestContext:
@@ -57,17 +57,28 @@ def set_debug_log_handler(debug_log_handler: DebugBufferedHandler) -> None:
     _request_context.get().debug_log_handler = debug_log_handler
 
 
-@contextmanager
-def request_context(frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> Iterator:
-    request_id = tornado_request.headers.get('X-Request-Id') or generate_uniq_timestamp_request_id()
-    if options.validate_request_id:
-        check_request_id(request_id)
-    tornado_request.request_id = request_id  # type: ignore
+def get_task_group() -> Optional[RequestTaskGroup]:
+    return _task_group.get()
+
+
+def set_task_group(task_group: RequestTaskGroup) -> contextvars.Token:
+    return _task_group.set(task_group)
+
+
+def reset_task_group(token: contextvars.Token) -> None:
+    _task_group.reset(token)
+
+
+class RequestContextIntegration(RequestIntegration):
+    def enter(self, frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> IntegrationDto:
+        request_id = tornado_request.headers.get('X-Request-Id') or generate_uniq_timestamp_request_id()
+        if options.validate_request_id:
+            check_request_id(request_id)
+        tornado_request.request_id = request_id  # type: ignore
+
+        cls = getattr(frontik_app, 'default_request_context_cls', RequestContext)
 
-    cls = getattr(frontik_app, 'default_request_context_cls', RequestContext)
+        return IntegrationDto(request_id, _request_context.set(cls(request_id)))
 
-    token = _request_context.set(cls(request_id))
-    try:
-        yield IntegrationDto(request_id)
-    finally:
-        _request_context.reset(token)
+    def exit(self, dto: IntegrationDto, exc: Optional[BaseException]) -> None:
+        _request_context.reset(dto.state)
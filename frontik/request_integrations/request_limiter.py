@@ -1,17 +1,14 @@
 from __future__ import annotations
 
 import logging
-from contextlib import contextmanager
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from tornado.httputil import HTTPServerRequest
 
 from frontik.options import options
-from frontik.request_integrations.integrations_dto import IntegrationDto
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
-
     from pystatsd import StatsDClientABC
 
     from frontik.app import FrontikApplication
@@ -55,11 +52,10 @@ class ActiveHandlersLimit:
             self._statsd_client.gauge('handler.active_count', ActiveHandlersLimit.count)
 
 
-@contextmanager
-def request_limiter(frontik_app: FrontikApplication, _tornado_request: HTTPServerRequest) -> Iterator:
-    active_limit = ActiveHandlersLimit(frontik_app.statsd_client)
-    dto = IntegrationDto(active_limit.acquired)
-    try:
-        yield dto
-    finally:
-        active_limit.release()
+class RequestLimiterIntegration(RequestIntegration):
+    def enter(self, frontik_app: FrontikApplication, _tornado_request: HTTPServerRequest) -> IntegrationDto:
+        active_limit = ActiveHandlersLimit(frontik_app.statsd_client)
+        return IntegrationDto(active_limit.acquired, active_limit)
+
+    def exit(self, dto: IntegrationDto, exc: Optional[BaseException]) -> None:
+        dto.state.release()
@@ -1,23 +1,21 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
 import sentry_sdk
 from tornado.httputil import HTTPServerRequest
 
 from frontik.options import options
-from frontik.request_integrations.integrations_dto import IntegrationDto
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
-
     from frontik.app import FrontikApplication
 
 
-@contextmanager
-def sentry_context(_frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> Iterator[IntegrationDto]:
-    if options.sentry_dsn:
-        sentry_sdk.set_extra('request_id', tornado_request.request_id)  # type: ignore[attr-defined]
+class SentryIntegration(RequestIntegration):
+    def is_enabled(self) -> bool:
+        return bool(options.sentry_dsn)
 
-    yield IntegrationDto()
+    def enter(self, _frontik_app: FrontikApplication, tornado_request: HTTPServerRequest) -> IntegrationDto:
+        sentry_sdk.set_extra('request_id', tornado_request.request_id)  # type: ignore[attr-defined]
+        return IntegrationDto()
@@ -1,4 +1,3 @@
-from contextlib import contextmanager
 from time import time_ns
 
 from opentelemetry import trace
@@ -23,7 +22,7 @@ from tornado.httputil import HTTPServerRequest
 from frontik.http_status import HTTP_REASON
 from frontik.options import options
 from frontik.request_integrations import request_context
-from frontik.request_integrations.integrations_dto import IntegrationDto
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration, exc_info
 
 _traced_request_attrs = get_traced_request_attrs('TORNADO')
 _excluded_urls = ['/status']
@@ -123,17 +122,25 @@ def _collect_custom_response_headers_attributes(response_headers):
     return attributes
 
 
-@contextmanager
-def otel_instrumentation_ctx(frontik_app, tornado_request):
-    if not options.opentelemetry_enabled or tornado_request.path in _excluded_urls:
-        yield IntegrationDto()
-        return
+class TelemetryIntegration(RequestIntegration):
+    def is_enabled(self):
+        return options.opentelemetry_enabled
+
+    def enter(self, frontik_app, tornado_request):
+        if tornado_request.path in _excluded_urls:
+            return IntegrationDto()
+
+        span = _start_span(frontik_app.otel_tracer, tornado_request)
+        span_ctx = trace.use_span(span, end_on_exit=True)
+        span_ctx.__enter__()
+        return IntegrationDto(state=(span, span_ctx, tornado_request))
 
-    span = _start_span(frontik_app.otel_tracer, tornado_request)
+    def exit(self, dto, exc):
+        if dto.state is None:
+            return
 
-    with trace.use_span(span, end_on_exit=True):
-        dto = IntegrationDto()
+        span, span_ctx, tornado_request = dto.state
         try:
-            yield dto
-        finally:
             _finish_span(span, dto, tornado_request)
+        finally:
+            span_ctx.__exit__(*exc_info(exc))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import bisect
+import random
+import time
+import tracemalloc
+from typing import Optional, Union
+
+from frontik.options import options
+
+# upper bounds of duration buckets in microseconds, the last bucket is unbounded
+DURATION_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+BUCKET_NAMES = (*(str(bound) for bound in DURATION_BUCKETS_US), 'inf')
+UNKNOWN_HANDLER = 'unknown'
+
+
+class RequestProfile:
+    """
+    Timestamps and traced memory deltas between stages of one request.
+    Stages spanning awaits (the page itself) also include allocations of concurrent requests.
+    """
+
+    __slots__ = ('last_memory', 'last_time', 'stages', 'trace_memory')
+
+    def __init__(self) -> None:
+        self.trace_memory = tracemalloc.is_tracing()
+        self.stages: list[tuple[str, int, int]] = []  # name, duration ns, allocated bytes
+        self.last_memory = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        self.last_time = time.perf_counter_ns()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter_ns()
+        memory = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        self.stages.append((stage, now - self.last_time, memory - self.last_memory))
+        self.last_time = now
+        self.last_memory = memory
+
+
+class DisabledRequestProfile:
+    """Shared profile of requests out of sample, marks cost a method call only"""
+
+    __slots__ = ()
+
+    def mark(self, stage: str) -> None:
+        pass
+
+
+DISABLED_PROFILE = DisabledRequestProfile()
+
+
+class StageStats:
+    __slots__ = ('allocated_bytes', 'buckets', 'count', 'duration_ns', 'max_allocated_bytes', 'max_duration_ns')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_ns = 0
+        self.max_duration_ns = 0
+        self.allocated_bytes = 0
+        self.max_allocated_bytes = 0
+        self.buckets = [0] * (len(DURATION_BUCKETS_US) + 1)
+
+    def add(self, duration_ns: int, allocated_bytes: int) -> None:
+        self.count += 1
+        self.duration_ns += duration_ns
+        self.max_duration_ns = max(self.max_duration_ns, duration_ns)
+        self.allocated_bytes += allocated_bytes
+        self.max_allocated_bytes = max(self.max_allocated_bytes, allocated_bytes)
+        self.buckets[bisect.bisect_left(DURATION_BUCKETS_US, duration_ns / 1000)] += 1
+
+    def percentile_us(self, percentile: float) -> Optional[float]:
+        """Upper bound of the bucket containing percentile, None if it is in the unbounded bucket"""
+        rank = self.count * percentile / 100
+        seen = 0
+        for i, bound in enumerate(DURATION_BUCKETS_US):
+            seen += self.buckets[i]
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_us': self.duration_ns / self.count / 1000,
+            'max_us': self.max_duration_ns / 1000,
+            'p50_us': self.percentile_us(50),
+            'p99_us': self.percentile_us(99),
+            'mean_allocated_bytes': self.allocated_bytes / self.count,
+            'max_allocated_bytes': self.max_allocated_bytes,
+            'buckets_us': {BUCKET_NAMES[i]: count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class RequestProfiler:
+    def __init__(self) -> None:
+        self.handlers: dict[str, dict[str, StageStats]] = {}
+        self.started = time.time()
+
+    def start_profile(self) -> Union[RequestProfile, DisabledRequestProfile]:
+        sample_rate = options.request_profiler_sample_rate
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return DISABLED_PROFILE
+        return RequestProfile()
+
+    def add(self, handler_name: Optional[str], profile: Union[RequestProfile, DisabledRequestProfile]) -> None:
+        if not isinstance(profile, RequestProfile):
+            return
+
+        stages = self.handlers.setdefault(handler_name or UNKNOWN_HANDLER, {})
+        total = ('total', sum(stage[1] for stage in profile.stages), sum(stage[2] for stage in profile.stages))
+        for stage, duration_ns, allocated_bytes in (*profile.stages, total):
+            stage_stats = stages.get(stage)
+            if stage_stats is None:
+                stage_stats = stages[stage] = StageStats()
+            stage_stats.add(duration_ns, allocated_bytes)
+
+    def reset(self) -> None:
+        self.handlers.clear()
+        self.started = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            'sample_rate': options.request_profiler_sample_rate,
+            'tracemalloc': tracemalloc.is_tracing(),
+            'period_sec': time.time() - self.started,
+            'handlers': {
+                handler_name: {stage: stage_stats.to_dict() for stage, stage_stats in stages.items()}
+                for handler_name, stages in self.handlers.items()
+            },
+        }
+
+
+request_profiler = RequestProfiler()
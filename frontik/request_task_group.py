@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from pystatsd import StatsDClientABC
+
+log = logging.getLogger('request_task_group')
+
+CANCELLED_HTTP_REQUESTS_METRIC = 'http_client.cancelled_requests'
+REASON_DISCONNECT = 'disconnect'
+REASON_DEADLINE = 'deadline'
+
+
+class RequestTaskGroup:
+    """
+    Tasks started by a page: created with create_task or running http_client requests.
+    When client disconnects or request deadline expires they are cancelled with the page itself,
+    so upstream calls nobody waits for don't take upstream capacity.
+    Tasks still running after the page has finished normally are left alone.
+    """
+
+    __slots__ = (
+        'closed',
+        'deadline_expired',
+        'deadline_timer',
+        'http_tasks',
+        'page_task',
+        'statsd_client',
+        'tasks',
+    )
+
+    def __init__(self, statsd_client: StatsDClientABC) -> None:
+        self.statsd_client = statsd_client
+        self.page_task: Optional[asyncio.Task] = None
+        self.tasks: set[asyncio.Task] = set()
+        self.http_tasks: set[asyncio.Task] = set()
+        self.deadline_timer: Optional[asyncio.TimerHandle] = None
+        self.deadline_expired = False
+        self.closed = False
+
+    def create_task(self, coro: Coroutine[Any, Any, Any], name: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self.add(task)
+        return task
+
+    def add(self, task: asyncio.Task) -> None:
+        if self.closed or task is self.page_task or task in self.tasks:
+            return
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def on_http_request(self) -> None:
+        """Called by http client hook, so the task making the request is the current one"""
+        task = asyncio.current_task()
+        if task is None or self.closed or task in self.http_tasks:
+            return
+        self.http_tasks.add(task)
+        task.add_done_callback(self.http_tasks.discard)
+        self.add(task)
+
+    def set_deadline(self, timeout_sec: float) -> None:
+        self.deadline_timer = asyncio.get_running_loop().call_later(max(timeout_sec, 0), self._on_deadline)
+
+    def cancel_deadline(self) -> None:
+        if self.deadline_timer is not None:
+            self.deadline_timer.cancel()
+            self.deadline_timer = None
+
+    def _on_deadline(self) -> None:
+        self.deadline_timer = None
+        log.warning('request deadline has expired, cancelling page')
+        self.deadline_expired = True
+        self.cancel(REASON_DEADLINE)
+
+    def cancel(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.close()
+
+        in_flight_http_tasks = sum(1 for task in self.http_tasks if not task.done())
+        for task in list(self.tasks):
+            task.cancel()
+        if self.page_task is not None:
+            self.page_task.cancel()
+
+        if in_flight_http_tasks:
+            log.info('%s http requests are cancelled on %s', in_flight_http_tasks, reason)
+            self.statsd_client.count(CANCELLED_HTTP_REQUESTS_METRIC, in_flight_http_tasks, reason=reason)
+
+    def close(self) -> None:
+        self.closed = True
+        self.cancel_deadline()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from tornado.httputil import HTTPConnection
+
+log = logging.getLogger('response_writer')
+
+
+def _consume_write_error(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log.info('failed to write delayed response chunks: %s', future.exception())
+
+
+class CoalescingResponseWriter:
+    """
+    Joins small chunks of a streaming response into one connection write.
+    Chunks are written when max_bytes are buffered, after delay_sec since the first buffered chunk, or on flush.
+    Only one write is in flight: a delayed write is awaited by the next flush before the connection is written again.
+    """
+
+    __slots__ = ('chunks', 'connection', 'delay_sec', 'max_bytes', 'pending_write', 'size', 'timer')
+
+    def __init__(self, connection: HTTPConnection, max_bytes: int, delay_sec: float) -> None:
+        self.connection = connection
+        self.max_bytes = max_bytes
+        self.delay_sec = delay_sec
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.pending_write: Optional[asyncio.Future] = None
+
+    async def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.size >= self.max_bytes:
+            await self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.delay_sec, self._flush_delayed)
+
+    async def flush(self) -> None:
+        if self.pending_write is not None:
+            pending_write, self.pending_write = self.pending_write, None
+            await pending_write
+
+        future = self._write_buffered()
+        if future is not None:
+            await future
+
+    def cancel_timer(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def _flush_delayed(self) -> None:
+        self.timer = None
+        if self.pending_write is not None and not self.pending_write.done():
+            self.timer = asyncio.get_running_loop().call_later(self.delay_sec, self._flush_delayed)
+            return
+
+        future = self._write_buffered()
+        if future is not None:
+            self.pending_write = asyncio.ensure_future(future)
+            self.pending_write.add_done_callback(_consume_write_error)
+
+    def _write_buffered(self) -> Optional[asyncio.Future]:
+        self.cancel_timer()
+        if not self.chunks:
+            return None
+
+        data = self.chunks[0] if len(self.chunks) == 1 else b''.join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return self.connection.write(data)  # type: ignore[return-value]
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, TypedDict
+
+from starlette.routing import Route
+
+from frontik.dev_route_manager import OnDemandRouteManager, make_route_endpoint
+from frontik.routing import (
+    RouteIndex,
+    _fastapi_routes,
+    _iter_page_modules,
+    get_route_sort_key,
+    import_all_pages,
+    insert_sorted_routes,
+    rebuild_route_index,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import MutableSequence
+
+routing_logger = logging.getLogger('frontik.routing')
+
+ROUTE_MANIFEST_VERSION = 3
+
+
+class ManifestRoute(TypedDict):
+    module: str
+    path: str
+    methods: list[str]
+
+
+class RouteManifest(TypedDict):
+    version: int
+    pages_package: str
+    modules: dict[str, str]  # relative fs path: sha256
+    eager_modules: list[str]
+    routes: list[ManifestRoute]
+
+
+def _file_hash(fs_path: str) -> str:
+    with open(fs_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _map_pages_files_hash(package_paths: MutableSequence[str]) -> dict[str, str]:
+    """Content is hashed, as mtime is changed by pip install or docker copy and can be restored by git checkout"""
+    files_hash = {}
+    for package_path in package_paths:
+        for dirpath, dirnames, filenames in os.walk(package_path):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != '__pycache__']
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    fs_path = os.path.join(dirpath, filename)
+                    files_hash[os.path.relpath(fs_path, package_path)] = _file_hash(fs_path)
+    return files_hash
+
+
+def build_route_manifest(app_module: str) -> RouteManifest:
+    """
+    Imports all pages and records which page module registers every route.
+    Routes registered while a module is imported belong to it, so routes of nested page imports
+    are served by importing the outer module. Modules without routes or with mounts are imported eagerly.
+    """
+    pages_package_path = f'{app_module}.pages'
+    first_page_route = len(_fastapi_routes)
+    pages_package = importlib.import_module(pages_package_path)
+    page_modules = list(_iter_page_modules(pages_package_path, pages_package.__path__))
+    modules_routes = {name: [] for name in page_modules}
+
+    # packages are imported by pages lookup, their routes belong to endpoint module
+    for route in _fastapi_routes[first_page_route:]:
+        modules_routes.setdefault(route.endpoint.__module__, []).append(route)  # type: ignore[attr-defined]
+
+    for name in page_modules:
+        routes_count = len(_fastapi_routes)
+        importlib.import_module(name)
+        modules_routes[name].extend(_fastapi_routes[routes_count:])
+
+    eager_modules = []
+    manifest_routes: list[ManifestRoute] = []
+    for name, routes in modules_routes.items():
+        if not routes or not all(isinstance(route, Route) for route in routes):
+            eager_modules.append(name)
+            continue
+
+        manifest_routes.extend(
+            {'module': name, 'path': route.path, 'methods': sorted(route.methods or ())}  # type: ignore[attr-defined]
+            for route in routes
+        )
+
+    return {
+        'version': ROUTE_MANIFEST_VERSION,
+        'pages_package': pages_package_path,
+        'modules': _map_pages_files_hash(pages_package.__path__),
+        'eager_modules': eager_modules,
+        'routes': manifest_routes,
+    }
+
+
+def dump_route_manifest(manifest: RouteManifest, manifest_path: str) -> None:
+    with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+
+
+class ManifestRouteManager(OnDemandRouteManager):
+    """
+    Serves routes from a build-time route manifest, page modules are imported on the first matching request.
+    Any difference between the manifest and pages files falls back to import of all pages.
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.pending_modules: set[str] = set()
+        self.placeholder_index = RouteIndex()
+
+    def import_all_pages(self, app_module: str) -> None:
+        pages_package_path = f'{app_module}.pages'
+        manifest = self._load_manifest(pages_package_path)
+
+        if manifest is None:
+            import_all_pages(app_module)
+            return
+
+        for name in manifest['eager_modules']:
+            importlib.import_module(name)
+        _fastapi_routes.sort(key=get_route_sort_key)
+        rebuild_route_index()
+
+        for manifest_route in manifest['routes']:
+            route = Route(
+                manifest_route['path'], make_route_endpoint(manifest_route['module']), methods=manifest_route['methods']
+            )
+            self.placeholder_index.add(route)
+            self.pending_modules.add(manifest_route['module'])
+
+        routing_logger.info(
+            'routes of %d page modules are loaded from manifest %s, modules will be imported on demand',
+            len(self.pending_modules),
+            self.manifest_path,
+        )
+
+    def _load_manifest(self, pages_package_path: str) -> RouteManifest | None:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as manifest_file:
+                manifest: RouteManifest = json.load(manifest_file)
+        except Exception as e:
+            routing_logger.warning('failed to read route manifest %s, importing all pages: %s', self.manifest_path, e)
+            return None
+
+        if manifest.get('version') != ROUTE_MANIFEST_VERSION or manifest.get('pages_package') != pages_package_path:
+            routing_logger.warning('route manifest %s is not built for %s', self.manifest_path, pages_package_path)
+            return None
+
+        pages_package = importlib.import_module(pages_package_path)
+        if _map_pages_files_hash(pages_package.__path__) != manifest['modules']:
+            routing_logger.warning('route manifest %s is outdated, importing all pages', self.manifest_path)
+            return None
+
+        return manifest
+
+    def get_pending_modules(self) -> list[str]:
+        return list(self.pending_modules)
+
+    def import_module(self, name: str) -> None:
+        if name not in self.pending_modules:
+            return
+
+        self.pending_modules.discard(name)
+        routes_count = len(_fastapi_routes)
+        importlib.import_module(name)
+        insert_sorted_routes(_fastapi_routes, routes_count)
+        routing_logger.info('imported page module %s', name)
+
+    def import_route(self, path: str, method: str) -> None:
+        if not self.pending_modules:
+            return
+
+        if path.endswith('/') and path != '/':
+            path = path.rstrip('/')
+
+        # every module with the path is imported, so route priority and 405 are the same as with all pages imported
+        for route in self.placeholder_index.get_path_routes(path):
+            self.import_module(route.endpoint())
@@ -2,24 +2,34 @@ from __future__ import annotations
 
 import importlib
 import importlib.util
+import json
 import logging
+import os
 import pkgutil
-from collections.abc import Generator, MutableSequence
+import time
+from bisect import insort
+from collections import OrderedDict
+from collections.abc import Generator, Iterable, MutableSequence
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from fastapi import APIRouter
 from fastapi.routing import APIRoute
-from starlette.routing import BaseRoute, Match
+from starlette.convertors import PathConvertor
+from starlette.routing import BaseRoute, Match, Route
+
+from frontik.options import options
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, MutableSequence
+    from collections.abc import Generator, Iterable, MutableSequence
 
 
 routing_logger = logging.getLogger('frontik.routing')
 
 routers: list[APIRouter] = []
 _fastapi_routes: list[BaseRoute] = []
+_route_index: RouteIndex | None = None
+_route_cache: RouteCache | None = None
 
 
 def is_param_segment(segment: str) -> bool:
@@ -27,6 +37,15 @@ def is_param_segment(segment: str) -> bool:
 
 
 def get_route_sort_key(route: BaseRoute) -> tuple:
+    sort_key = getattr(route, '_frontik_sort_key', None)
+    if sort_key is None:
+        sort_key = _make_route_sort_key(route)
+        # kept on the route itself, so it goes away with the route
+        route._frontik_sort_key = sort_key  # type: ignore[attr-defined]
+    return sort_key
+
+
+def _make_route_sort_key(route: BaseRoute) -> tuple:
     if not isinstance(route, APIRoute):
         return 3, 0, ()  # Non-APIRoute last (3)
 
@@ -44,6 +63,213 @@ def get_route_sort_key(route: BaseRoute) -> tuple:
         return 2, -len(segments), param_flags
 
 
+def _get_index_segments(route: BaseRoute) -> list[str] | None:
+    """Split route path into trie segments, None means route can't be indexed and is matched linearly"""
+    if not isinstance(route, Route) or not route.methods or not route.path_format.startswith('/'):
+        return None
+
+    if any(isinstance(convertor, PathConvertor) for convertor in route.param_convertors.values()):
+        return None
+
+    return route.path_format.split('/')[1:]
+
+
+RouteEntry = tuple[tuple, BaseRoute]  # ((is method fallback, sort key, seq), route)
+
+
+class _RouteTrieNode:
+    __slots__ = ('allowed_methods', 'has_params', 'param', 'path_routes', 'routes', 'static')
+
+    def __init__(self, has_params: bool = False) -> None:
+        self.static: dict[str, _RouteTrieNode] = {}
+        self.param: _RouteTrieNode | None = None
+        self.routes: dict[str, list[RouteEntry]] = {}
+        self.has_params = has_params
+        self.path_routes: list[Route] = []
+        # methods for Allow header, OPTIONS routes are not included
+        self.allowed_methods: set[str] = set()
+
+
+def _add_route_entry(routes: dict[str, list[RouteEntry]], route: Route, sort_key: tuple) -> None:
+    for method in route.methods:
+        insort(routes.setdefault(method, []), ((False, *sort_key), route))
+
+    # HEAD is served by GET route, if there is no HEAD route for the path
+    if 'GET' in route.methods and 'HEAD' not in route.methods:
+        insort(routes.setdefault('HEAD', []), ((True, *sort_key), route))
+
+
+class RouteIndex:
+    """
+    Segment trie over registered routes.
+    Static segments and {param} segments are stored in separate branches, so lookup visits only nodes
+    which can match the path. Candidates are checked with route regex in get_route_sort_key order,
+    routes which can't be indexed (Mount, {param:path}) are checked in the same order as a fallback.
+    """
+
+    def __init__(self, routes: Iterable[BaseRoute] = ()) -> None:
+        self.root = _RouteTrieNode()
+        self.fallback_routes: dict[str, list[RouteEntry]] = {}
+        self.any_method_fallback_routes: list[RouteEntry] = []
+        self.fallback_path_routes: list[Route] = []
+        self.routes_count = 0
+
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: BaseRoute) -> None:
+        sort_key = (get_route_sort_key(route), self.routes_count)
+        self.routes_count += 1
+
+        segments = _get_index_segments(route)
+        if segments is None:
+            if not isinstance(route, Route) or not route.methods:
+                insort(self.any_method_fallback_routes, ((False, *sort_key), route))
+                return
+
+            _add_route_entry(self.fallback_routes, route, sort_key)
+            self.fallback_path_routes.append(route)
+            return
+
+        node = self.root
+        for segment in segments:
+            if is_param_segment(segment):
+                if node.param is None:
+                    node.param = _RouteTrieNode(has_params=True)
+                node = node.param
+            else:
+                child = node.static.get(segment)
+                if child is None:
+                    child = node.static[segment] = _RouteTrieNode(has_params=node.has_params)
+                node = child
+
+        assert isinstance(route, Route)
+        _add_route_entry(node.routes, route, sort_key)
+
+        node.path_routes.append(route)
+        if 'OPTIONS' not in route.methods:
+            node.allowed_methods.update(route.methods)
+
+    def _find_nodes(self, path: str) -> list[_RouteTrieNode]:
+        if not path.startswith('/'):
+            return []
+
+        nodes = [self.root]
+        for segment in path.split('/')[1:]:
+            next_nodes = []
+            for node in nodes:
+                child = node.static.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.param is not None:
+                    next_nodes.append(node.param)
+
+            if not next_nodes:
+                return []
+            nodes = next_nodes
+
+        return nodes
+
+    def get_candidates(self, path: str, method: str) -> list[RouteEntry]:
+        """Routes which may serve the request, HEAD requests include GET routes after all HEAD routes"""
+        candidates = [routes for node in self._find_nodes(path) if (routes := node.routes.get(method))]
+        if (fallback_routes := self.fallback_routes.get(method)) is not None:
+            candidates.append(fallback_routes)
+        if self.any_method_fallback_routes:
+            candidates.append(self.any_method_fallback_routes)
+
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else []
+
+        return sorted(entry for routes in candidates for entry in routes)
+
+    def find(self, scope: dict[str, Any]) -> BaseRoute | None:
+        return _match_route_entries(scope, self.get_candidates(scope['path'], scope['method']))
+
+    def get_allowed_methods(self, path: str) -> set[str]:
+        allowed_methods: set[str] = set()
+
+        for node in self._find_nodes(path):
+            if not node.has_params:
+                allowed_methods.update(node.allowed_methods)
+                continue
+
+            for route in node.path_routes:
+                if 'OPTIONS' not in route.methods and route.path_regex.match(path):
+                    allowed_methods.update(route.methods)
+
+        for route in self.fallback_path_routes:
+            if 'OPTIONS' not in route.methods and route.path_regex.match(path):
+                allowed_methods.update(route.methods)
+
+        return allowed_methods
+
+    def get_path_routes(self, path: str) -> list[Route]:
+        """Routes matching the path with any method"""
+        path_routes = [
+            route
+            for node in self._find_nodes(path)
+            for route in node.path_routes
+            if not node.has_params or route.path_regex.match(path)
+        ]
+        path_routes.extend(route for route in self.fallback_path_routes if route.path_regex.match(path))
+        return path_routes
+
+
+class RouteCache:
+    """
+    LRU cache of matched APIRoutes and path params by (method, path).
+    Each parameterized route can hold at most param_route_limit paths, so high-cardinality urls (/user/{id})
+    don't wash static urls out of the cache.
+    """
+
+    def __init__(self, max_size: int, param_route_limit: int) -> None:
+        self.max_size = max_size
+        self.param_route_limit = param_route_limit
+        self._entries: OrderedDict[tuple[str, str], tuple[APIRoute, dict[str, Any]]] = OrderedDict()
+        self._param_route_paths: dict[int, int] = {}  # id(route): cached paths count
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, method: str, path: str) -> tuple[APIRoute, dict[str, Any]] | None:
+        entry = self._entries.get((method, path))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end((method, path))
+        self.hits += 1
+        return entry
+
+    def put(self, method: str, path: str, route: APIRoute, path_params: dict[str, Any]) -> None:
+        if route.param_convertors:
+            paths_count = self._param_route_paths.get(id(route), 0)
+            if paths_count >= self.param_route_limit:
+                return
+            self._param_route_paths[id(route)] = paths_count + 1
+
+        self._entries[(method, path)] = (route, path_params)
+
+        if len(self._entries) > self.max_size:
+            _, (evicted_route, __) = self._entries.popitem(last=False)
+            self.evictions += 1
+            if evicted_route.param_convertors:
+                self._param_route_paths[id(evicted_route)] -= 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._param_route_paths.clear()
+
+    def pop_stats(self) -> tuple[int, int, int]:
+        stats = self.hits, self.misses, self.evictions
+        self.hits = self.misses = self.evictions = 0
+        return stats
+
+
 class FrontikRouter(APIRouter):
     def __init__(self, **kwargs: Any) -> None:
         super().__init__(**kwargs)
@@ -56,7 +282,11 @@ class FrontikRouter(APIRouter):
             scope['router'] = self
 
         route = scope['route']
-        await route.handle(scope, receive, send)
+        if isinstance(route, APIRoute):
+            # method is already checked by find_route, route.handle would reject HEAD and fallback routes
+            await route.app(scope, receive, send)
+        else:
+            await route.handle(scope, receive, send)
 
     def add_api_route(self, path: str, *args: Any, **kwargs: Any) -> None:
         if path.endswith('/') and path != '/':
@@ -91,6 +321,92 @@ def _iter_submodules(path: MutableSequence[str], prefix: str = '') -> Generator:
         yield from _iter_submodules(paths, name + '.')
 
 
+def _iter_page_modules(pages_package_path: str, package_paths: MutableSequence[str]) -> Generator[str, None, None]:
+    for _, name, __ in _iter_submodules(package_paths, f'{pages_package_path}.'):
+        _spec = importlib.util.find_spec(name)
+        if _spec is None:
+            continue
+
+        yield name
+
+
+def _get_pages_dirs_mtime(package_paths: MutableSequence[str]) -> dict[str, int]:
+    """Adding or removing a page module changes mtime of its directory, changes inside modules don't"""
+    dirs_mtime = {}
+    for package_path in package_paths:
+        for dirpath, dirnames, _ in os.walk(package_path):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != '__pycache__']
+            dirs_mtime[dirpath] = os.stat(dirpath).st_mtime_ns
+    return dirs_mtime
+
+
+def _load_pages_manifest(manifest_path: str, pages_package_path: str) -> list[str] | None:
+    try:
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        routing_logger.warning('failed to read pages manifest %s: %s', manifest_path, e)
+        return None
+
+    if manifest.get('pages_package') != pages_package_path:
+        return None
+
+    for dirpath, mtime in manifest['dirs_mtime'].items():
+        try:
+            if os.stat(dirpath).st_mtime_ns != mtime:
+                return None
+        except OSError:
+            return None
+
+    return manifest['modules']
+
+
+def _dump_pages_manifest(
+    manifest_path: str, pages_package_path: str, package_paths: MutableSequence[str], modules: list[str]
+) -> None:
+    manifest = {
+        'pages_package': pages_package_path,
+        'dirs_mtime': _get_pages_dirs_mtime(package_paths),
+        'modules': modules,
+    }
+
+    try:
+        tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        routing_logger.warning('failed to write pages manifest %s: %s', manifest_path, e)
+
+
+class PagesImportProfile:
+    def __init__(self) -> None:
+        self.modules_time: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def import_module(self, name: str) -> None:
+        module_started = time.perf_counter()
+        importlib.import_module(name)
+        self.modules_time[name] = time.perf_counter() - module_started
+
+    def log_report(self, top_count: int = 20) -> None:
+        total_time = time.perf_counter() - self.started
+        modules_time = sorted(self.modules_time.items(), key=lambda item: item[1], reverse=True)
+
+        routing_logger.info(
+            'imported %d page modules in %.0f ms, slowest modules:\n%s',
+            len(modules_time),
+            total_time * 1000,
+            '\n'.join(f'{module_time * 1000:9.1f} ms {name}' for name, module_time in modules_time[:top_count]),
+        )
+
+        if routing_logger.isEnabledFor(logging.DEBUG):
+            for name, module_time in modules_time:
+                routing_logger.debug('page module %s imported in %.1f ms', name, module_time * 1000)
+
+
 def import_all_pages(app_module: str) -> None:
     """Import all pages on startup"""
     _spec = importlib.util.find_spec(f'{app_module}.pages')
@@ -100,15 +416,85 @@ def import_all_pages(app_module: str) -> None:
 
     pages_package_path = f'{app_module}.pages'
     pages_package = importlib.import_module(pages_package_path)
+    profile = PagesImportProfile() if options.pages_import_profile else None
+    import_module = profile.import_module if profile is not None else importlib.import_module
 
-    for _, name, __ in _iter_submodules(pages_package.__path__, f'{pages_package_path}.'):
-        _spec = importlib.util.find_spec(name)
-        if _spec is None:
-            continue
+    manifest_path = options.pages_manifest_path
+    modules = _load_pages_manifest(manifest_path, pages_package_path) if manifest_path else None
 
-        importlib.import_module(name)
+    if modules is not None:
+        routing_logger.info('pages manifest %s is up to date, skipping pages lookup', manifest_path)
+        for name in modules:
+            import_module(name)
+    else:
+        modules = []
+        for name in _iter_page_modules(pages_package_path, pages_package.__path__):
+            import_module(name)
+            modules.append(name)
+
+        if manifest_path:
+            _dump_pages_manifest(manifest_path, pages_package_path, pages_package.__path__, modules)
+
+    if profile is not None:
+        profile.log_report()
 
     _fastapi_routes.sort(key=get_route_sort_key)
+    rebuild_route_index()
+
+
+def rebuild_route_index() -> RouteIndex:
+    global _route_index, _route_cache
+    _route_index = RouteIndex(_fastapi_routes)
+    if options.route_cache_size > 0:
+        _route_cache = RouteCache(options.route_cache_size, options.route_cache_param_route_limit)
+    else:
+        _route_cache = None
+    return _route_index
+
+
+def _bisect_routes(routes: list[BaseRoute], sort_key: tuple) -> int:
+    """Position after all routes with sort key not greater than sort_key, like bisect.bisect_right"""
+    low, high = 0, len(routes)
+    while low < high:
+        middle = (low + high) // 2
+        if sort_key < get_route_sort_key(routes[middle]):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def insert_sorted_routes(routes: list[BaseRoute], sorted_count: int) -> None:
+    """
+    Moves routes appended after first sorted_count ones to their sorted positions.
+    Order is the same as after stable sort of the whole list, route index is updated with new routes only.
+    """
+    new_routes = routes[sorted_count:]
+    if not new_routes:
+        return
+
+    del routes[sorted_count:]
+    for route in new_routes:
+        routes.insert(_bisect_routes(routes, get_route_sort_key(route)), route)
+
+    if routes is not _fastapi_routes or _route_index is None:
+        return
+
+    if _route_index.routes_count != sorted_count:
+        rebuild_route_index()
+        return
+
+    # new routes go after routes with equal sort key both in list and in index
+    for route in new_routes:
+        _route_index.add(route)
+    if _route_cache is not None:
+        _route_cache.clear()
+
+
+def _get_route_index() -> RouteIndex:
+    if _route_index is None or _route_index.routes_count != len(_fastapi_routes):
+        return rebuild_route_index()
+    return _route_index
 
 
 router = FrontikRouter()
@@ -117,17 +503,17 @@ method_not_allowed_router = APIRouter()
 preflight_router = APIRouter()
 
 
-def _find_fastapi_route_partial(scope: dict) -> set[str]:
-    result = set()
-
-    for route in _fastapi_routes:
-        if isinstance(route, APIRoute) and 'OPTIONS' in route.methods:
-            continue
+def _match_route_entries(scope: dict[str, Any], entries: list[RouteEntry]) -> BaseRoute | None:
+    for _, route in entries:
         match, child_scope = route.matches(scope)
-        if isinstance(route, APIRoute) and match == Match.PARTIAL:
-            result.update(route.methods)
 
-    return result
+        # method is checked by index, PARTIAL is a GET route serving HEAD request
+        if match != Match.NONE:
+            scope.update(child_scope)
+            scope['route'] = route
+            return route
+
+    return None
 
 
 def _find_fastapi_route_exact(scope: dict[str, Any], fastapi_routes: list[BaseRoute]) -> BaseRoute | None:
@@ -144,6 +530,32 @@ def _find_fastapi_route_exact(scope: dict[str, Any], fastapi_routes: list[BaseRo
     return None
 
 
+def _find_fastapi_route_indexed(scope: dict[str, Any]) -> BaseRoute | None:
+    route_index = _get_route_index()
+    route_cache = _route_cache
+    if route_cache is None:
+        return route_index.find(scope)
+
+    method, path = scope['method'], scope['path']
+    cached = route_cache.get(method, path)
+    if cached is not None:
+        route, path_params = cached
+        scope['endpoint'] = route.endpoint
+        scope['path_params'] = dict(path_params)
+        scope['route'] = route
+        return route
+
+    route = route_index.find(scope)
+    if isinstance(route, APIRoute):
+        route_cache.put(method, path, route, dict(scope['path_params']))
+
+    return route
+
+
+def get_route_cache() -> RouteCache | None:
+    return _route_cache
+
+
 def find_route(
     path: str, method: str, fastapi_routes: list[BaseRoute] | None = None, prefix: str = ''
 ) -> dict[str, Any]:
@@ -157,22 +569,18 @@ def find_route(
         'route': None,
     }
 
-    route = _find_fastapi_route_exact(scope, fastapi_routes if fastapi_routes is not None else _fastapi_routes)
-
     if fastapi_routes is not None:
         route = _find_fastapi_route_exact(scope, fastapi_routes)
+    else:
+        route = _find_fastapi_route_indexed(scope)
 
-    if route is None and method == 'HEAD':
-        scope = find_route(path, 'GET', fastapi_routes)
+    if route is None and method == 'HEAD' and fastapi_routes is not None:
+        scope['method'] = 'GET'
+        route = _find_fastapi_route_exact(scope, fastapi_routes)
         scope['method'] = 'HEAD'
-        route = scope['route']
-        if route is not None and isinstance(route, APIRoute):
-            route.methods.add('HEAD')
 
     if route is None and method == 'OPTIONS':
         route = preflight_router.routes[-1]
-        if isinstance(route, APIRoute):
-            route.methods.add(method)
         scope['route'] = route
 
     if route is None:
@@ -183,9 +591,6 @@ def find_route(
         else:
             route = not_found_router.routes[-1]
 
-        if isinstance(route, APIRoute) and method not in route.methods:
-            route.methods.add(method)
-
         assert isinstance(route, APIRoute)
         routing_logger.error(
             'match for request url %s "%s" not found, using %s',
@@ -201,4 +606,4 @@ def find_route(
 
 
 def get_allowed_methods(scope: dict) -> list[str]:
-    return list(_find_fastapi_route_partial(scope))
+    return sorted(_get_route_index().get_allowed_methods(scope['path']))
@@ -5,10 +5,11 @@ import importlib
 import logging
 import signal
 import sys
+import time
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from threading import Lock
-from typing import Callable, Optional
+from typing import Any, Callable, Optional, Union
 
 import tornado.autoreload
 from http_client.balancing import Upstream
@@ -16,11 +17,13 @@ from tornado.httpserver import HTTPServer
 
 from frontik.app import FrontikApplication
 from frontik.config_parser import parse_configs
+from frontik.direct_server import DirectHTTPServer
 from frontik.loggers import MDC
-from frontik.options import options
-from frontik.process import fork_workers
+from frontik.options import HTTP_SERVER_DIRECT, options
+from frontik.process import PROMOTE_STANDBY_SIGNAL, RECYCLED_WORKER_REPLACED, fork_workers
 from frontik.pydebug import try_init_debugger
-from frontik.service_discovery import WorkerServiceDiscovery
+from frontik.service_discovery import UpstreamDelta, WorkerServiceDiscovery
+from frontik.upstream_store import SharedUpstreamStore
 from frontik.util.gc import enable_gc
 
 log = logging.getLogger('server')
@@ -61,6 +64,7 @@ def main(config_file: Optional[str] = None) -> None:
                 master_before_shutdown_action=partial(_master_before_shutdown_action, app),
                 worker_function=partial(_run_worker, app),
                 worker_listener_handler=partial(_worker_listener_handler, app),
+                num_standby_workers=options.standby_workers,
             )
         else:
             # run in single process mode
@@ -78,9 +82,39 @@ def _master_before_fork_action(app: FrontikApplication) -> tuple[dict, Optional[
             await local_before_fork_action()
 
     asyncio.run(async_actions())
+    _prepare_for_fork(app)
+
+    if options.upstreams_shared_memory and not isinstance(app.service_discovery, WorkerServiceDiscovery):
+        app.worker_state.upstream_store = SharedUpstreamStore(options.upstreams_shared_memory_size)
+        app.service_discovery.set_upstream_store(app.worker_state.upstream_store)
+
     return app.service_discovery.get_upstreams_with_lock()
 
 
+def _prepare_for_fork(app: FrontikApplication) -> None:
+    """
+    Loads in master what workers would otherwise load each on its own, so it stays in memory shared with master.
+    Application templates and schemas are loaded by before_fork_action of the application.
+    """
+    if options.prefork_preload:
+        start_time = time.time()
+        imported = 0
+        if app.route_manager is not None:
+            for name in app.route_manager.get_pending_modules():
+                try:
+                    app.route_manager.import_module(name)
+                    imported += 1
+                except Exception:
+                    log.exception('failed to preload %s', name)
+        if options.openapi_enabled:
+            app.openapi()
+        log.info('preloaded %d pages modules in %.2fs', imported, time.time() - start_time)
+
+    # objects created by integrations and before_fork_action are frozen too, gc does not touch their pages in workers
+    gc.collect()
+    gc.freeze()
+
+
 def _master_after_fork_action(
     app: FrontikApplication,
     update_shared_data_hook: Callable[[bytes], None],
@@ -97,7 +131,7 @@ def _master_before_shutdown_action(app: FrontikApplication) -> None:
     asyncio.run(_deinit_app(app, with_delay=False))
 
 
-def _worker_listener_handler(app: FrontikApplication, data: list[Upstream]) -> None:
+def _worker_listener_handler(app: FrontikApplication, data: list[Union[Upstream, UpstreamDelta]]) -> None:
     app.service_discovery.update_upstreams(data)
 
 
@@ -119,11 +153,24 @@ def _run_worker(app: FrontikApplication) -> None:
     initialize_application_task.result()
 
 
-def run_server(frontik_app: FrontikApplication) -> None:
-    """Starts Frontik server for an application"""
+def make_http_server(frontik_app: FrontikApplication) -> Union[HTTPServer, DirectHTTPServer]:
+    tornado_settings = options.tornado_settings or {}
+    server_settings: dict[str, Any] = {
+        'xheaders': options.xheaders,
+        'max_body_size': options.max_body_size,
+        'idle_connection_timeout': tornado_settings.get('idle_connection_timeout'),
+        'body_timeout': tornado_settings.get('body_timeout'),
+    }
+    if options.http_server == HTTP_SERVER_DIRECT:
+        return DirectHTTPServer(frontik_app, **server_settings)
+    return HTTPServer(frontik_app, **server_settings)
+
+
+def run_server(frontik_app: FrontikApplication) -> Callable[[], None]:
+    """Starts Frontik server for an application, returns function stopping it"""
     loop = asyncio.get_event_loop()
     log.info('starting server on %s:%s', options.host, options.port)
-    http_server = HTTPServer(frontik_app, xheaders=options.xheaders, max_body_size=options.max_body_size)
+    http_server = make_http_server(frontik_app)
     http_server.bind(options.port, options.host, reuse_port=options.reuse_port)
     http_server.start()
 
@@ -153,11 +200,19 @@ def run_server(frontik_app: FrontikApplication) -> None:
     signal.signal(signal.SIGTERM, worker_sigterm_handler)
     signal.signal(signal.SIGINT, worker_sigterm_handler)
 
+    return server_stop
+
 
 async def _init_app(frontik_app: FrontikApplication) -> None:
     await frontik_app.init()
-    run_server(frontik_app)
+    is_standby = frontik_app.worker_state.is_standby
+    if is_standby and not await _wait_for_promotion(frontik_app):
+        return
+
+    stop_server = run_server(frontik_app)
     log.info('Successfully inited application %s', frontik_app.app_name)
+    frontik_app.worker_recycler.start(stop_server)
+    _report_recovery_time(frontik_app, 'standby' if is_standby else 'fork')
     with frontik_app.worker_state.count_down_lock:
         frontik_app.worker_state.init_workers_count_down.value -= 1
         log.info('worker is up, remaining workers = %s', frontik_app.worker_state.init_workers_count_down.value)
@@ -165,10 +220,63 @@ async def _init_app(frontik_app: FrontikApplication) -> None:
     frontik_app.service_discovery.register_service()
 
 
+async def _wait_for_promotion(frontik_app: FrontikApplication) -> bool:
+    """Keeps initialized standby worker idle, returns False if it is stopped before promotion"""
+    loop = asyncio.get_running_loop()
+    recovery_started = frontik_app.worker_state.recovery_started
+    assert recovery_started is not None
+    wakeup = asyncio.Event()
+    stop_requested = False
+
+    def request_stop() -> None:
+        nonlocal stop_requested
+        stop_requested = True
+        wakeup.set()
+
+    loop.add_signal_handler(PROMOTE_STANDBY_SIGNAL, wakeup.set)
+    loop.add_signal_handler(signal.SIGTERM, request_stop)
+    loop.add_signal_handler(signal.SIGINT, request_stop)
+    log.info('standby worker is ready')
+    try:
+        while recovery_started.value == 0 and not stop_requested:
+            await wakeup.wait()
+            wakeup.clear()
+    finally:
+        for signum in (PROMOTE_STANDBY_SIGNAL, signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+        signal.signal(PROMOTE_STANDBY_SIGNAL, signal.SIG_IGN)  # promotion is checked by recovery_started
+
+    if recovery_started.value == 0:
+        log.info('requested shutdown of standby worker')
+        await _deinit_app(frontik_app, with_delay=False)
+        loop.stop()
+        return False
+
+    log.info('standby worker is promoted')
+    frontik_app.worker_state.is_standby = False
+    return True
+
+
+def _report_recovery_time(frontik_app: FrontikApplication, recovery_type: str) -> None:
+    recovery_started = frontik_app.worker_state.recovery_started
+    if recovery_started is None or recovery_started.value == 0:
+        return
+
+    if recovery_started.value == RECYCLED_WORKER_REPLACED:
+        log.info('worker has replaced recycled one (%s)', recovery_type)
+        return
+
+    recovery_time_ms = int((time.time() - recovery_started.value) * 1000)
+    log.info('worker has replaced crashed one in %d ms (%s)', recovery_time_ms, recovery_type)
+    frontik_app.statsd_client.time('worker.recovery_time', recovery_time_ms, type=recovery_type)
+
+
 async def _deinit_app(app: FrontikApplication, with_delay: bool) -> None:
     app.service_discovery.deregister_service_and_close()
 
-    if with_delay:
+    if with_delay and app.worker_recycler.recycling:
+        await app.worker_recycler.wait_for_requests(options.stop_timeout)
+    elif with_delay:
         await asyncio.sleep(options.stop_timeout)
 
     try:
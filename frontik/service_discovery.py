@@ -4,9 +4,10 @@ import logging
 import pickle
 import socket
 from copy import deepcopy
+from dataclasses import dataclass
 from random import shuffle
 from threading import Lock
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Union
 
 from consul.base import Check, ConsistencyMode, HealthCache, KVCache, Weight
 from http_client.balancing import Server, Upstream, UpstreamConfigs
@@ -15,6 +16,7 @@ from pystatsd import StatsDClientABC
 
 from frontik.consul_client import ClientEventCallback, SyncConsulClient
 from frontik.options import Options
+from frontik.upstream_store import SharedUpstreamStore, UpstreamStoreOverflow
 from frontik.version import version
 
 DEFAULT_WEIGHT = 100
@@ -69,6 +71,20 @@ def _get_hostname_or_raise(node_name: str) -> str:
     return node_name
 
 
+@dataclass
+class UpstreamDelta:
+    """Changes of upstream servers since the previous update sent to workers"""
+
+    name: str
+    configs: UpstreamConfigs
+    added_servers: list[Server]  # new and changed servers
+    removed_servers: list[str]  # addresses
+
+
+def _servers_by_address(servers: list[Optional[Server]]) -> dict[str, Server]:
+    return {server.address: server for server in servers if server is not None}
+
+
 class ServiceDiscovery(abc.ABC):
     @abc.abstractmethod
     def get_upstreams_copy(self) -> dict[str, Upstream]:
@@ -95,7 +111,11 @@ class ServiceDiscovery(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def update_upstreams(self, upstreams: list[Upstream]) -> None:
+    def set_upstream_store(self, upstream_store: SharedUpstreamStore) -> None:
+        pass
+
+    @abc.abstractmethod
+    def update_upstreams(self, upstreams: list[Union[Upstream, UpstreamDelta]]) -> None:
         pass
 
     @abc.abstractmethod
@@ -113,6 +133,10 @@ class MasterServiceDiscovery(ServiceDiscovery):
         self._upstreams: dict[str, Upstream] = {}
         self._upstreams_lock = Lock()
         self._send_to_all_workers: Optional[Callable] = None
+        self._upstream_store: Optional[SharedUpstreamStore] = None
+        # what workers have got: upstream name -> server address -> pickled server, and configs
+        self._sent_servers: dict[str, dict[str, bytes]] = {}
+        self._sent_configs: dict[str, Optional[UpstreamConfigs]] = {}
 
         self.consul = SyncConsulClient(
             host=options.consul_host,
@@ -191,6 +215,10 @@ class MasterServiceDiscovery(ServiceDiscovery):
     def set_update_shared_data_hook(self, update_shared_data_hook: Callable) -> None:
         self._send_to_all_workers = update_shared_data_hook
 
+    def set_upstream_store(self, upstream_store: SharedUpstreamStore) -> None:
+        self._upstream_store = upstream_store
+        self.send_updates()
+
     def get_upstreams_with_lock(self) -> tuple[dict[str, Upstream], Lock]:
         return self._upstreams, self._upstreams_lock
 
@@ -275,11 +303,46 @@ class MasterServiceDiscovery(ServiceDiscovery):
         self.send_updates(upstream=upstream)
 
     def send_updates(self, upstream: Optional[Upstream] = None) -> None:
-        if self._send_to_all_workers is None:
-            return
         with self._upstreams_lock:
-            upstreams = list(self._upstreams.values()) if upstream is None else [upstream]
-            self._send_to_all_workers(pickle.dumps(upstreams))
+            if upstream is None:
+                upstreams = list(self._upstreams.values())
+                updates: list = upstreams
+                for current_upstream in upstreams:
+                    self.__make_delta(current_upstream)
+            else:
+                upstreams = [upstream]
+                delta = self.__make_delta(upstream)
+                updates = [] if delta is None else [delta]
+
+            if self._upstream_store is not None:
+                try:
+                    self._upstream_store.write(upstreams)
+                    return
+                except UpstreamStoreOverflow as e:
+                    log.error('failed to write upstreams to shared memory, sending through pipes: %s', e)
+
+            if self._send_to_all_workers is not None and updates:
+                self._send_to_all_workers(pickle.dumps(updates))
+
+    def __make_delta(self, upstream: Upstream) -> Optional[UpstreamDelta]:
+        """Remembers upstream as sent to workers, returns None if servers and configs have not changed"""
+        configs = self._upstreams_config.get(upstream.name)
+        configs_changed = upstream.name not in self._sent_configs or self._sent_configs[upstream.name] is not configs
+        self._sent_configs[upstream.name] = configs
+        sent_servers = self._sent_servers.get(upstream.name, {})
+        servers = {address: pickle.dumps(server) for address, server in _servers_by_address(upstream.servers).items()}
+        self._sent_servers[upstream.name] = servers
+
+        added_servers = [
+            server
+            for server in upstream.servers
+            if server is not None and sent_servers.get(server.address) != servers[server.address]
+        ]
+        removed_servers = [address for address in sent_servers if address not in servers]
+        if not added_servers and not removed_servers and not configs_changed:
+            return None
+
+        return UpstreamDelta(upstream.name, configs or UpstreamConfigs({}), added_servers, removed_servers)
 
     def _create_upstream(self, key: str) -> Upstream:
         servers = self._combine_servers(key)
@@ -294,18 +357,47 @@ class MasterServiceDiscovery(ServiceDiscovery):
                 servers_from_all_dc += servers
         return servers_from_all_dc
 
-    def update_upstreams(self, upstreams: list[Upstream]) -> None:
+    def update_upstreams(self, upstreams: list[Union[Upstream, UpstreamDelta]]) -> None:
         raise RuntimeError('master should not serve upstream updates')
 
 
 class WorkerServiceDiscovery(ServiceDiscovery):
-    def __init__(self, upstreams: dict[str, Upstream]) -> None:
+    def __init__(self, upstreams: dict[str, Upstream], upstream_store: Optional[SharedUpstreamStore] = None) -> None:
         self._upstreams = upstreams
         self._upstreams_lock = Lock()
+        self._upstream_store = upstream_store
+        self._upstream_store_version = 0
+        self._upstream_versions: dict[str, int] = {}
+        self._upstream_servers: dict[str, dict[str, Server]] = {}  # servers from master to apply deltas to
 
-    def update_upstreams(self, upstreams: list[Upstream]) -> None:
+    def update_upstreams(self, upstreams: list[Union[Upstream, UpstreamDelta]]) -> None:
         for upstream in upstreams:
+            if isinstance(upstream, UpstreamDelta):
+                self.__apply_delta(upstream)
+            else:
+                self._upstream_servers.pop(upstream.name, None)
+                self.__update_upstream(upstream)
+
+    def __apply_delta(self, delta: UpstreamDelta) -> None:
+        servers = self._upstream_servers.get(delta.name)
+        if servers is None:
+            current_upstream = self._upstreams.get(delta.name)
+            servers = _servers_by_address(deepcopy(current_upstream.servers)) if current_upstream is not None else {}
+            self._upstream_servers[delta.name] = servers
+
+        for address in delta.removed_servers:
+            servers.pop(address, None)
+        for server in delta.added_servers:
+            servers[server.address] = server
+
+        self.__update_upstream(Upstream(delta.name, delta.configs, deepcopy(list(servers.values()))))
+
+    def __sync_upstream_store(self, upstream_store: SharedUpstreamStore) -> None:
+        self._upstream_store_version, upstreams = upstream_store.read_changed(self._upstream_versions)
+        for upstream_version, upstream in upstreams:
+            self._upstream_servers.pop(upstream.name, None)
             self.__update_upstream(upstream)
+            self._upstream_versions[upstream.name] = upstream_version
 
     def __update_upstream(self, upstream: Upstream) -> None:
         current_upstream = self._upstreams.get(upstream.name)
@@ -323,6 +415,9 @@ class WorkerServiceDiscovery(ServiceDiscovery):
         return deepcopy(self._upstreams)
 
     def get_upstream(self, upstream_name: str, default: None = None) -> Upstream:
+        upstream_store = self._upstream_store
+        if upstream_store is not None and upstream_store.version != self._upstream_store_version:
+            self.__sync_upstream_store(upstream_store)
         return self._upstreams.get(upstream_name, default)
 
     def register_service(self) -> None:
@@ -337,6 +432,9 @@ class WorkerServiceDiscovery(ServiceDiscovery):
     def set_update_shared_data_hook(self, update_shared_data_hook: Callable) -> None:
         raise RuntimeError('worker should not use update hook')
 
+    def set_upstream_store(self, upstream_store: SharedUpstreamStore) -> None:
+        raise RuntimeError('worker gets upstream store on creation')
+
     def send_updates(self, upstream: Optional[Upstream] = None) -> None:
         raise RuntimeError('worker should not use send updates')
 
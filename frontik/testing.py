@@ -10,11 +10,11 @@ from http_client.request_response import RequestBuilder, RequestResult
 from http_client.testing import MockHttpClient
 from lxml import etree
 from tornado.escape import utf8
-from tornado.httpserver import HTTPServer
 
 from frontik.app import FrontikApplication
 from frontik.media_types import APPLICATION_JSON, APPLICATION_PROTOBUF, APPLICATION_XML, TEXT_PLAIN
 from frontik.options import options
+from frontik.server import make_http_server
 from frontik.util import bind_socket, make_url, safe_template
 
 log = logging.getLogger('server')
@@ -36,7 +36,7 @@ class FrontikTestBase:
         with frontik_app.worker_state.count_down_lock:
             frontik_app.worker_state.init_workers_count_down.value -= 1
 
-        http_server = HTTPServer(frontik_app, xheaders=options.xheaders, max_body_size=options.max_body_size)
+        http_server = make_http_server(frontik_app)
         http_server.add_sockets([_bind_socket])
         log.info('Successfully inited application %s', frontik_app.app_name)
 
@@ -8,7 +8,7 @@ from tornado import httputil
 
 from frontik.handler_asgi import serve_tornado_request
 from frontik.server_tasks import _server_tasks
-from frontik.tornado_request import EOF, FrontikTornadoServerRequest
+from frontik.tornado_request import FrontikTornadoServerRequest
 
 if typing.TYPE_CHECKING:
     from frontik.app import FrontikApplication
@@ -50,17 +50,18 @@ class TornadoConnectionHandler(httputil.HTTPMessageDelegate):
 
     def data_received(self, chunk: bytes) -> Optional[Awaitable[None]]:
         assert self.request is not None
-        task = asyncio.create_task(self.request.body_chunks.put(chunk))
-        return task
+        return self.request.get_body_buffer().put(chunk)
 
     def finish(self) -> None:
         assert self.request is not None
         self.request.finished = True
-        self.request.body_chunks.put_nowait(EOF)
+        if self.request.body_buffer is not None:
+            self.request.body_buffer.feed_eof()
 
     def on_connection_close(self) -> None:
         log.warning('tornado connection is closed, marking request as canceled')
         assert self.request is not None
         self.request.finished = True
-        self.request.canceled = True
-        self.request.body_chunks.put_nowait(EOF)
+        self.request.on_disconnect()
+        if self.request.body_buffer is not None:
+            self.request.body_buffer.feed_eof()
@@ -1,16 +1,147 @@
 import asyncio
-from typing import Optional
+from collections import deque
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from typing import Optional, Union, overload
 
 from tornado import httputil
 
+from frontik.options import options
+from frontik.request_profiler import DISABLED_PROFILE, DisabledRequestProfile, RequestProfile
+
 EOF = object()
 
 
+@lru_cache(maxsize=1024)
+def _encode_header_name(name: str) -> bytes:
+    return name.lower().encode('utf-8')
+
+
+class AsgiRequestHeaders(Sequence[tuple[bytes, bytes]]):
+    """
+    ASGI scope['headers'] view of tornado request headers.
+    Headers are encoded on first access only, pages which don't read headers don't pay for it.
+    """
+
+    __slots__ = ('_headers', '_raw')
+
+    def __init__(self, headers: httputil.HTTPHeaders) -> None:
+        self._headers = headers
+        self._raw: Optional[list[tuple[bytes, bytes]]] = None
+
+    @property
+    def raw(self) -> list[tuple[bytes, bytes]]:
+        if self._raw is None:
+            self._raw = [(_encode_header_name(name), value.encode('utf-8')) for name, value in self._headers.get_all()]
+        return self._raw
+
+    def __iter__(self) -> Iterator[tuple[bytes, bytes]]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @overload
+    def __getitem__(self, index: int) -> tuple[bytes, bytes]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[tuple[bytes, bytes]]: ...
+
+    def __getitem__(self, index):
+        return self.raw[index]
+
+
+class RequestBodyBuffer:
+    """
+    Request body chunks between tornado connection and asgi receive.
+    put is synchronous, it returns a future only when buffered size reaches the limit,
+    tornado waits for it before reading the next chunk, so back-pressure reaches the socket.
+    Once the whole body is received, get returns all remaining chunks at once.
+    """
+
+    __slots__ = ('_chunks', '_drained', '_eof', '_getter', 'limit', 'size')
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.size = 0
+        self._chunks: deque[bytes] = deque()
+        self._eof = False
+        self._getter: Optional[asyncio.Future] = None
+        self._drained: Optional[asyncio.Future] = None
+
+    def put(self, chunk: bytes) -> Optional[asyncio.Future]:
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        self._wake_getter()
+
+        if self.size < self.limit:
+            return None
+        if self._drained is None or self._drained.done():
+            self._drained = asyncio.get_running_loop().create_future()
+        return self._drained
+
+    def feed_eof(self) -> None:
+        self._eof = True
+        self._wake_getter()
+        self._wake_putter()
+
+    def at_eof(self) -> bool:
+        return self._eof and not self._chunks
+
+    async def get(self) -> Union[bytes, object]:
+        while not self._chunks:
+            if self._eof:
+                return EOF
+            self._getter = asyncio.get_running_loop().create_future()
+            try:
+                await self._getter
+            finally:
+                self._getter = None
+
+        if self._eof and len(self._chunks) > 1:
+            chunk = b''.join(self._chunks)
+            self._chunks.clear()
+        else:
+            chunk = self._chunks.popleft()
+        self.size -= len(chunk)
+        if self.size < self.limit:
+            self._wake_putter()
+        return chunk
+
+    def _wake_getter(self) -> None:
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+
+    def _wake_putter(self) -> None:
+        if self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+
+
 class FrontikTornadoServerRequest(httputil.HTTPServerRequest):
     def __init__(self, *args, **kwargs) -> None:  # type: ignore
         super().__init__(*args, **kwargs)
-        self.body_chunks: asyncio.Queue = asyncio.Queue(maxsize=100000)
+        self.body_buffer: Optional[RequestBodyBuffer] = None  # requests without body don't need it
         self.request_id = None
         self.finished = False
         self.canceled = False
         self.handler_name: Optional[str] = None
+        self.profile: Union[RequestProfile, DisabledRequestProfile] = DISABLED_PROFILE
+        self._disconnected: Optional[asyncio.Future] = None
+
+    def get_body_buffer(self) -> RequestBodyBuffer:
+        if self.body_buffer is None:
+            self.body_buffer = RequestBodyBuffer(options.request_body_buffer_size)
+        return self.body_buffer
+
+    def on_disconnect(self) -> None:
+        self.canceled = True
+        if self._disconnected is not None and not self._disconnected.done():
+            self._disconnected.set_result(None)
+
+    async def wait_for_disconnect(self) -> None:
+        if self.canceled:
+            return
+        if self._disconnected is None:
+            self._disconnected = asyncio.get_running_loop().create_future()
+        # shielded, so a cancelled waiter (e.g. Request.is_disconnected) doesn't cancel the future for others
+        await asyncio.shield(self._disconnected)
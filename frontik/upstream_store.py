@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import pickle
+import struct
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from http_client.balancing import Upstream
+
+log = logging.getLogger('upstream_store')
+
+# header: magic, sequence (odd while master writes, table version is sequence // 2)
+HEADER_STRUCT = struct.Struct('=8sQ')
+HEADER_MAGIC = b'FRTKUPS3'
+SEQUENCE_STRUCT = struct.Struct('=Q')
+SEQUENCE_OFFSET = 8
+# buffer: upstreams count, then records of name length, upstream version, blob length, name, pickled upstream
+COUNT_STRUCT = struct.Struct('=I')
+RECORD_STRUCT = struct.Struct('=HQI')
+
+
+class UpstreamStoreOverflow(Exception):
+    pass
+
+
+class SharedUpstreamStore:
+    """
+    Upstreams table in anonymous shared memory, created by master before fork and inherited by workers.
+
+    Master rewrites the whole table in place, each upstream is pickled only when it changes.
+    Workers read without locks, like a seqlock: master makes the sequence odd before touching the buffer
+    and even after it, a read is accepted only if the sequence was even and has not changed meanwhile.
+    A rejected read is not retried at once, worker keeps its upstreams and reads again on the next get_upstream.
+    """
+
+    def __init__(self, buffer_size: int) -> None:
+        self.buffer_size = buffer_size
+        self.memory = mmap.mmap(-1, HEADER_STRUCT.size + buffer_size)
+        HEADER_STRUCT.pack_into(self.memory, 0, HEADER_MAGIC, 0)
+        COUNT_STRUCT.pack_into(self.memory, HEADER_STRUCT.size, 0)
+        self.read_misses = 0  # worker only: reads rejected because master was writing
+        self._records: dict[str, bytes] = {}  # master only: name -> packed record
+        self._upstream_version = 0
+
+    @property
+    def sequence(self) -> int:
+        return SEQUENCE_STRUCT.unpack_from(self.memory, SEQUENCE_OFFSET)[0]
+
+    @property
+    def version(self) -> int:
+        return self.sequence // 2
+
+    def write(self, upstreams: list[Upstream]) -> None:
+        """Master side, calls must be serialized by the caller"""
+        for upstream in upstreams:
+            self._upstream_version += 1
+            name = upstream.name.encode()
+            blob = pickle.dumps(upstream, protocol=pickle.HIGHEST_PROTOCOL)
+            record_header = RECORD_STRUCT.pack(len(name), self._upstream_version, len(blob))
+            self._records[upstream.name] = record_header + name + blob
+
+        data = COUNT_STRUCT.pack(len(self._records)) + b''.join(self._records.values())
+        if len(data) > self.buffer_size:
+            raise UpstreamStoreOverflow(
+                f'upstreams take {len(data)} bytes, more than upstreams_shared_memory_size={self.buffer_size}'
+            )
+
+        sequence = self.sequence
+        SEQUENCE_STRUCT.pack_into(self.memory, SEQUENCE_OFFSET, sequence + 1)
+        self.memory[HEADER_STRUCT.size : HEADER_STRUCT.size + len(data)] = data
+        SEQUENCE_STRUCT.pack_into(self.memory, SEQUENCE_OFFSET, sequence + 2)
+        log.debug('published upstreams table version %d, %d bytes', (sequence + 2) // 2, len(data))
+
+    def read_changed(self, applied_versions: dict[str, int]) -> tuple[int, list[tuple[int, Upstream]]]:
+        """
+        Worker side, returns table version and upstreams with versions other than in applied_versions.
+        If master is writing the table, returns version -1 and no upstreams, so the next call reads again.
+        """
+        sequence = self.sequence
+        if sequence % 2 == 0:
+            changed = self._read_buffer(applied_versions)
+            if self.sequence == sequence:
+                return sequence // 2, [(upstream_version, pickle.loads(blob)) for upstream_version, blob in changed]
+
+        self.read_misses += 1
+        log.info('upstreams table is being written, keep current upstreams, %d reads missed', self.read_misses)
+        return -1, []
+
+    def _read_buffer(self, applied_versions: dict[str, int]) -> list[tuple[int, bytes]]:
+        memory = self.memory
+        offset = HEADER_STRUCT.size
+        end = offset + self.buffer_size
+        (count,) = COUNT_STRUCT.unpack_from(memory, offset)
+        offset += COUNT_STRUCT.size
+
+        changed = []
+        for _ in range(count):
+            if offset + RECORD_STRUCT.size > end:
+                break  # torn read, will be rejected
+            name_length, upstream_version, blob_length = RECORD_STRUCT.unpack_from(memory, offset)
+            offset += RECORD_STRUCT.size
+            name = memory[offset : offset + name_length].decode(errors='replace')
+            offset += name_length
+            if applied_versions.get(name) != upstream_version:
+                changed.append((upstream_version, memory[offset : offset + blob_length]))
+            offset += blob_length
+        return changed
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from collections.abc import Generator
+from typing import Callable, Optional
+
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+watcher_logger = logging.getLogger('frontik.fs_watcher')
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+OnChange = Callable[[set[str]], None]  # changed, created or deleted file paths, empty set means rescan everything
+
+
+def _is_watched_file(name: str) -> bool:
+    return name.endswith('.py') and '.null-ls_' not in name
+
+
+def _iter_dirs(root_folder: str) -> Generator[str, None, None]:
+    for dirpath, dirnames, _ in os.walk(root_folder):
+        dirnames[:] = [dirname for dirname in dirnames if dirname != '__pycache__']
+        yield dirpath
+
+
+class InotifyWatcher:
+    """Linux inotify over ctypes, events are read on IOLoop and passed to on_change in batches"""
+
+    def __init__(self, root_folder: str, on_change: OnChange, batch_delay_sec: float = 0.1) -> None:
+        self.root_folder = root_folder
+        self.on_change = on_change
+        self.batch_delay_sec = batch_delay_sec
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = -1
+        self.dirs: dict[int, str] = {}  # watch descriptor: directory
+        self.pending_paths: set[str] = set()
+        self.rescan_needed = False
+        self.batch_scheduled = False
+
+    @staticmethod
+    def is_available() -> bool:
+        return sys.platform.startswith('linux')
+
+    def start(self) -> None:
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        for dirpath in _iter_dirs(self.root_folder):
+            self.add_watch(dirpath)
+
+        IOLoop.current().add_handler(self.fd, self.read_events, IOLoop.READ)
+
+    def stop(self) -> None:
+        if self.fd >= 0:
+            IOLoop.current().remove_handler(self.fd)
+            os.close(self.fd)
+            self.fd = -1
+
+    def add_watch(self, dirpath: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd < 0:
+            watcher_logger.warning('failed to watch %s: %s', dirpath, os.strerror(ctypes.get_errno()))
+            return
+        self.dirs[wd] = dirpath
+
+    def read_events(self, fd: int, events: int) -> None:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + name_len].rstrip(b'\0').decode(errors='surrogateescape')
+            offset += name_len
+            self.handle_event(wd, mask, name)
+
+        if not self.batch_scheduled:
+            self.batch_scheduled = True
+            IOLoop.current().call_later(self.batch_delay_sec, self.flush)
+
+    def handle_event(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self.rescan_needed = True
+            return
+
+        if mask & IN_IGNORED:
+            self.dirs.pop(wd, None)
+            return
+
+        dirpath = self.dirs.get(wd)
+        if dirpath is None or not name:
+            return
+
+        path = os.path.join(dirpath, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and name != '__pycache__':
+                # files may be created in new directory before its watch is added
+                for new_dirpath in _iter_dirs(path):
+                    self.add_watch(new_dirpath)
+                    with os.scandir(new_dirpath) as entries:
+                        self.pending_paths.update(
+                            entry.path for entry in entries if entry.is_file() and _is_watched_file(entry.name)
+                        )
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.rescan_needed = True
+            return
+
+        if _is_watched_file(name):
+            self.pending_paths.add(path)
+
+    def flush(self) -> None:
+        self.batch_scheduled = False
+        paths, self.pending_paths = self.pending_paths, set()
+        if self.rescan_needed:
+            self.rescan_needed = False
+            paths = set()
+        elif not paths:
+            return
+
+        try:
+            self.on_change(paths)
+        except Exception:
+            watcher_logger.exception('failed to process changes in %s', self.root_folder)
+
+
+class PollingWatcher:
+    """Fallback for systems without inotify, compares file mtimes every interval"""
+
+    def __init__(self, root_folder: str, on_change: OnChange, interval_sec: float = 1.0) -> None:
+        self.root_folder = root_folder
+        self.on_change = on_change
+        self.files_mtime: dict[str, int] = {}
+        self.periodic_callback = PeriodicCallback(self.check, interval_sec * 1000)
+
+    def scan(self) -> dict[str, int]:
+        files_mtime = {}
+        for dirpath in _iter_dirs(self.root_folder):
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_file() and _is_watched_file(entry.name):
+                        files_mtime[entry.path] = entry.stat().st_mtime_ns
+        return files_mtime
+
+    def start(self) -> None:
+        self.files_mtime = self.scan()
+        self.periodic_callback.start()
+
+    def stop(self) -> None:
+        self.periodic_callback.stop()
+
+    def check(self) -> None:
+        files_mtime = self.scan()
+        changed = {path for path, mtime in files_mtime.items() if self.files_mtime.get(path) != mtime}
+        changed.update(self.files_mtime.keys() - files_mtime.keys())
+        self.files_mtime = files_mtime
+
+        if changed:
+            try:
+                self.on_change(changed)
+            except Exception:
+                watcher_logger.exception('failed to process changes in %s', self.root_folder)
+
+
+def start_watcher(root_folder: str, on_change: OnChange) -> Optional[InotifyWatcher | PollingWatcher]:
+    if not os.path.isdir(root_folder):
+        watcher_logger.warning('%s is not a directory, changes are not watched', root_folder)
+        return None
+
+    if InotifyWatcher.is_available():
+        inotify_watcher = InotifyWatcher(root_folder, on_change)
+        try:
+            inotify_watcher.start()
+            watcher_logger.info('watching %s with inotify', root_folder)
+            return inotify_watcher
+        except Exception as e:
+            inotify_watcher.stop()
+            watcher_logger.warning('inotify is not available, falling back to polling: %s', e)
+
+    polling_watcher = PollingWatcher(root_folder, on_change)
+    polling_watcher.start()
+    watcher_logger.info('watching %s with polling', root_folder)
+    return polling_watcher
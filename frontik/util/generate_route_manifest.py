@@ -0,0 +1,17 @@
+import argparse
+import pathlib
+import sys
+
+from frontik.route_manifest import build_route_manifest, dump_route_manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser('generate route manifest for on demand import of pages')
+    parser.add_argument('--app_module_path', type=str, required=True)
+    parser.add_argument('--output', type=str, required=True)
+    args = parser.parse_args()
+
+    module_path = pathlib.Path(args.app_module_path)
+    sys.path.append(str(module_path.parent))
+
+    dump_route_manifest(build_route_manifest(module_path.name), args.output)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from frontik.options import options
+
+if TYPE_CHECKING:
+    from pystatsd import StatsDClientABC
+
+    from frontik.process import WorkerState
+
+log = logging.getLogger('worker_recycling')
+
+CHECK_INTERVAL_SEC = 10
+RECYCLED_WORKERS_METRIC = 'worker.recycled'
+REASON_REQUESTS = 'requests'
+REASON_UPTIME = 'uptime'
+REASON_RSS = 'rss'
+
+
+def get_rss_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class WorkerRecycler:
+    """
+    Replaces worker by a fresh one after worker_max_requests requests, worker_max_uptime_sec seconds of uptime
+    or when its RSS exceeds worker_max_rss_mb, so memory growth is reset without restarting the whole service.
+
+    Workers are recycled one at a time: worker takes the turn by writing its pid to recycling_worker_pid,
+    master passes the turn to the process replacing it as its negative pid, so master can tell them apart,
+    and the replacement releases it once it serves requests.
+    Recycled worker stops accepting connections and waits for in-flight requests at most stop_timeout seconds.
+    """
+
+    def __init__(self, worker_state: WorkerState, statsd_client: StatsDClientABC) -> None:
+        self.worker_state = worker_state
+        self.statsd_client = statsd_client
+        self.start_time = time.time()
+        self.requests_count = 0
+        self.in_flight_requests = 0
+        self.recycling = False
+        self.stop_server: Optional[Callable[[], None]] = None
+        self.check_timer: Optional[asyncio.TimerHandle] = None
+        self.requests_done: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return options.worker_max_requests > 0 or options.worker_max_uptime_sec > 0 or options.worker_max_rss_mb > 0
+
+    def start(self, stop_server: Callable[[], None]) -> None:
+        """Called by worker once it serves requests"""
+        self.release_turn()
+        if self.worker_state.is_master or self.worker_state.recycling_worker_pid is None or not self.is_enabled():
+            return
+
+        self.stop_server = stop_server
+        self.start_time = time.time()
+        self.requests_count = 0
+        self._schedule_check()
+
+    def request_started(self) -> None:
+        self.in_flight_requests += 1
+        self.requests_count += 1
+        if 0 < options.worker_max_requests <= self.requests_count:
+            self.check()
+
+    def request_finished(self) -> None:
+        self.in_flight_requests -= 1
+        if self.requests_done is not None and self.in_flight_requests <= 0:
+            self.requests_done.set()
+
+    def get_recycle_reason(self) -> Optional[str]:
+        if 0 < options.worker_max_requests <= self.requests_count:
+            return REASON_REQUESTS
+        if 0 < options.worker_max_uptime_sec <= time.time() - self.start_time:
+            return REASON_UPTIME
+        if options.worker_max_rss_mb > 0:
+            rss = get_rss_bytes()
+            if rss is not None and rss > options.worker_max_rss_mb * 1024 * 1024:
+                return REASON_RSS
+        return None
+
+    def check(self) -> None:
+        if self.recycling or self.stop_server is None:
+            return
+
+        reason = self.get_recycle_reason()
+        if reason is None or not self.take_turn():
+            return
+
+        self.recycling = True
+        if self.check_timer is not None:
+            self.check_timer.cancel()
+            self.check_timer = None
+
+        log.info(
+            'recycling worker after %d requests and %d seconds of uptime, reason: %s',
+            self.requests_count,
+            time.time() - self.start_time,
+            reason,
+        )
+        self.statsd_client.count(RECYCLED_WORKERS_METRIC, 1, reason=reason)
+        self.stop_server()
+
+    async def wait_for_requests(self, timeout: float) -> None:
+        if self.in_flight_requests <= 0:
+            return
+
+        self.requests_done = asyncio.Event()
+        try:
+            await asyncio.wait_for(self.requests_done.wait(), timeout)
+        except asyncio.TimeoutError:
+            log.warning('%d requests are not finished in %s seconds', self.in_flight_requests, timeout)
+
+    def take_turn(self) -> bool:
+        recycling_worker_pid = self.worker_state.recycling_worker_pid
+        assert recycling_worker_pid is not None
+        with recycling_worker_pid.get_lock():
+            if recycling_worker_pid.value != 0:
+                return False
+            recycling_worker_pid.value = os.getpid()
+            return True
+
+    def release_turn(self) -> None:
+        recycling_worker_pid = self.worker_state.recycling_worker_pid
+        if recycling_worker_pid is None:
+            return
+        with recycling_worker_pid.get_lock():
+            if recycling_worker_pid.value == -os.getpid():
+                recycling_worker_pid.value = 0
+
+    def _schedule_check(self) -> None:
+        self.check_timer = asyncio.get_running_loop().call_later(CHECK_INTERVAL_SEC, self._on_check_timer)
+
+    def _on_check_timer(self) -> None:
+        self.check_timer = None
+        self.check()
+        if not self.recycling:
+            self._schedule_check()
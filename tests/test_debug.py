@@ -10,9 +10,11 @@ from http_client import RequestResult
 from lxml import etree
 from lxml.builder import E
 from tornado.escape import to_unicode
+from tornado.httputil import HTTPHeaders, HTTPServerRequest
 
 from frontik import media_types
 from frontik.app import FrontikApplication
+from frontik.debug import DEBUG_DISABLED, DebugResponseBuffer, may_have_debug_markers
 from frontik.dependencies import HttpClient
 from frontik.options import options
 from frontik.routing import router
@@ -158,6 +160,18 @@ class TestDebug(FrontikTestBase):
         for msg in assert_not_found:
             assert msg not in response_content
 
+    async def test_inherited_debug_response_is_not_cut(self):
+        options.debug_response_body_limit = 4
+        try:
+            response = await self.fetch('/debug?type=text', method='PUT', headers={'X-Hh-Debug': 'true'})
+        finally:
+            options.debug_response_body_limit = 10 * 1024 * 1024
+
+        debug_xml = etree.fromstring(response.raw_body)
+        assert debug_xml.get('response-truncated') is None
+        original_body = base64.b64decode(debug_xml.findtext('original-response/buffer'))
+        assert original_body == 'привет charset'.encode()
+
 
 @router.get('/debug_simple')
 async def get_page():
@@ -260,3 +274,46 @@ class TestDebugFailed(FrontikTestBase):
                 http.client.OK,
                 headers={'Cookie': f'{param}=true;', 'Authorization': self.DEBUG_BASIC_AUTH},
             )
+
+
+@pytest.mark.parametrize(
+    ('uri', 'headers', 'expected'),
+    [
+        ('/page?a=1', {}, False),
+        ('/page?a=1', {'Cookie': 'session=1; lang=ru'}, False),
+        ('/page?a=%D1%8E%D0%BD%D0%B8', {}, False),
+        ('/page?debug', {}, True),
+        ('/page?a=1&noxsl=true', {}, True),
+        ('/page?%64ebug=1', {}, True),
+        ('/page', {'Cookie': 'session=1; debug=1'}, True),
+        ('/page', {'X-Hh-Debug': 'true'}, True),
+    ],
+)
+def test_may_have_debug_markers(uri: str, headers: dict, expected: bool) -> None:
+    tornado_request = HTTPServerRequest(method='GET', uri=uri, headers=HTTPHeaders(headers))
+    assert may_have_debug_markers(tornado_request) is expected
+
+
+def test_disabled_debug_mode_is_immutable() -> None:
+    assert not DEBUG_DISABLED.need_auth
+    assert not DEBUG_DISABLED.enabled
+    with pytest.raises(AttributeError):
+        DEBUG_DISABLED.enabled = True
+
+
+def test_debug_response_buffer_keeps_body_up_to_limit() -> None:
+    response_buffer = DebugResponseBuffer(limit=5)
+    for chunk in (b'abc', b'', b'def', b'ghi'):
+        response_buffer.append(chunk)
+
+    assert response_buffer.getvalue() == b'abcde'
+    assert response_buffer.size == 9
+
+
+def test_debug_response_buffer_without_limit_keeps_whole_body() -> None:
+    response_buffer = DebugResponseBuffer(limit=None)
+    for chunk in (b'abc', b'', b'def'):
+        response_buffer.append(chunk)
+
+    assert response_buffer.getvalue() == b'abcdef'
+    assert response_buffer.size == 6
@@ -294,3 +294,38 @@ class TestDevRouteManager:
         assert index_route['path'] == '/index'
 
         assert len(exclude_pages_to_add) == 0
+
+
+def test_update_changed_pages_adds_and_removes_routes(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, dev_rm: dev_route_manager.DevRouteManager
+) -> None:
+    pages = tmp_path / 'watched_app' / 'pages'
+    pages.mkdir(parents=True)
+    page_path = pages / 'new_page.py'
+    page_path.write_text('')
+
+    monkeypatch.setattr(dev_rm, 'get_frontik_path', lambda: f'{tmp_path}/')
+    monkeypatch.setattr(dev_rm, 'fastapi_routes', [])
+    dev_rm.pages_root_folder = str(pages)
+
+    with patch.object(
+        dev_rm,
+        'import_module',
+        side_effect=lambda name: dev_rm.fastapi_routes.append(
+            MagicMock(
+                endpoint=MagicMock(__module__=name), methods={'GET'}, path='/watched_page', path_format='/watched_page'
+            )
+        ),
+    ):
+        dev_rm.update_changed_pages({str(page_path)})
+
+    assert dev_rm.routes_map_module['GET./watched_page']['endpoint'] == 'watched_app.pages.new_page'
+    assert [route.endpoint() for route in dev_rm.fake_routes] == ['watched_app.pages.new_page']
+
+    page_path.unlink()
+    dev_rm.update_changed_pages({str(page_path)})
+
+    assert not dev_rm.routes_map_module
+    assert not dev_rm.fake_routes
+    assert 'watched_app.pages.new_page' not in dev_rm.py_files_mtime
+    assert dev_rm.update_file_cache.call_count == 2  # type: ignore[attr-defined]
@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import AsyncIterable, Iterator
+
+import pytest
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from tornado import httputil, netutil
+
+from frontik.app import FrontikApplication
+from frontik.direct_server import DirectHTTPServer
+from frontik.options import HTTP_SERVER_DIRECT, HTTP_SERVER_TORNADO, options
+from frontik.routing import router
+from frontik.testing import FrontikTestBase
+
+pytest.importorskip('httptools')
+
+
+@router.post('/direct_server/echo')
+async def echo_page(request: Request) -> Response:
+    body = await request.body()
+    return Response(content=body, headers={'X-Remote-Ip': request.client.host if request.client else ''})
+
+
+@router.get('/direct_server/page')
+async def get_page() -> Response:
+    return Response(content=b'ok')
+
+
+@router.get('/direct_server/stream')
+async def stream_page() -> StreamingResponse:
+    async def iterable() -> AsyncIterable:
+        yield b'first+'
+        yield b'second'
+
+    return StreamingResponse(content=iterable())
+
+
+class TestDirectServer(FrontikTestBase):
+    @pytest.fixture(scope='class')
+    def frontik_app(self) -> Iterator[FrontikApplication]:
+        options.http_server = HTTP_SERVER_DIRECT
+        yield FrontikApplication(app_module_name=None)
+        options.http_server = HTTP_SERVER_TORNADO
+
+    async def test_request_body(self) -> None:
+        response = await self.fetch('/direct_server/echo', method='POST', data={'key': 'value'})
+        assert response.status_code == 200
+        assert response.raw_body == b'key=value'
+        assert response.headers['x-remote-ip'] == '127.0.0.1'
+        assert response.headers['server'].startswith('Frontik/')
+
+    async def test_streaming_response(self) -> None:
+        response = await self.fetch('/direct_server/stream')
+        assert response.status_code == 200
+        assert response.raw_body == b'first+second'
+
+    async def test_not_found(self) -> None:
+        response = await self.fetch('/direct_server/unknown')
+        assert response.status_code == 404
+
+    async def test_head(self) -> None:
+        response = await self.fetch('/direct_server/page', method='HEAD')
+        assert response.status_code == 200
+        assert response.headers['content-length'] == '2'
+        assert response.raw_body == b''
+
+
+class RequestDelegate(httputil.HTTPMessageDelegate):
+    def __init__(self, server_delegate: 'ServerDelegate', connection: httputil.HTTPConnection) -> None:
+        self.server_delegate = server_delegate
+        self.connection = connection
+
+    def finish(self) -> None:
+        self.server_delegate.received.append(self)
+        if self.server_delegate.respond_at_once:
+            self.respond()
+
+    def respond(self) -> None:
+        body = self.server_delegate.body
+        self.connection.write_headers(
+            httputil.ResponseStartLine('HTTP/1.1', 200, 'OK'),
+            httputil.HTTPHeaders({'Content-Length': str(len(body))}),
+        )
+        self.connection.write(body)
+        self.connection.finish()
+
+
+class ServerDelegate(httputil.HTTPServerConnectionDelegate):
+    def __init__(self, body: bytes = b'ok', respond_at_once: bool = True) -> None:
+        self.body = body
+        self.respond_at_once = respond_at_once
+        self.received: list[RequestDelegate] = []
+
+    def start_request(self, server_conn: object, request_conn: httputil.HTTPConnection) -> httputil.HTTPMessageDelegate:
+        return RequestDelegate(self, request_conn)
+
+
+async def read_until_closed(data: bytes, **timeouts: float) -> bytes:
+    sockets = netutil.bind_sockets(0, '127.0.0.1')
+    server = DirectHTTPServer(ServerDelegate(), **timeouts)
+    server.add_sockets(sockets)
+    try:
+        reader, writer = await asyncio.open_connection(*sockets[0].getsockname()[:2])
+        writer.write(data)
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize('data', [b'', b'GET / HTTP/1.1\r\nHost: '])
+async def test_idle_and_header_timeout(data: bytes) -> None:
+    assert await read_until_closed(data, idle_connection_timeout=0.1) == b''
+
+
+async def test_body_timeout() -> None:
+    data = b'POST / HTTP/1.1\r\nHost: localhost\r\nContent-Length: 10\r\n\r\nfive+'
+    assert await read_until_closed(data, body_timeout=0.1) == b''
+
+
+async def test_keep_alive_connection_is_closed_after_idle_timeout() -> None:
+    data = b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'
+    response = await read_until_closed(data, idle_connection_timeout=0.1)
+    assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert response.endswith(b'\r\n\r\nok')
+
+
+async def test_reading_is_paused_while_pipelined_request_waits() -> None:
+    sockets = netutil.bind_sockets(0, '127.0.0.1')
+    delegate = ServerDelegate(respond_at_once=False)
+    server = DirectHTTPServer(delegate)
+    server.add_sockets(sockets)
+    try:
+        reader, writer = await asyncio.open_connection(*sockets[0].getsockname()[:2])
+        writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n' * 3)
+        while len(delegate.received) < 1:
+            await asyncio.sleep(0.01)
+
+        (protocol,) = server.protocols
+        assert protocol.transport is not None
+        assert len(protocol.requests) == 3
+        assert not protocol.transport.is_reading()
+
+        delegate.received[0].respond()
+        assert not protocol.transport.is_reading(), 'two requests are still queued'
+        delegate.received[1].respond()
+        assert protocol.transport.is_reading()
+        delegate.received[2].respond()
+
+        response = b''
+        while response.count(b'\r\n\r\nok') < 3:
+            response += await asyncio.wait_for(reader.read(1024), 5)
+        assert response.count(b'HTTP/1.1 200 OK\r\n') == 3
+        writer.close()
+    finally:
+        server.stop()
+
+
+async def test_connections_are_aborted_if_peer_does_not_read() -> None:
+    sockets = netutil.bind_sockets(0, '127.0.0.1')
+    server = DirectHTTPServer(ServerDelegate(body=b'x' * 64 * 1024 * 1024))
+    server.add_sockets(sockets)
+    try:
+        _reader, writer = await asyncio.open_connection(*sockets[0].getsockname()[:2])
+        writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        while not server.protocols:
+            await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(server.close_all_connections(timeout=0.1), 2)
+        await asyncio.sleep(0.01)
+        assert all(protocol.closed for protocol in server.protocols)
+        writer.close()
+    finally:
+        server.stop()
@@ -0,0 +1,48 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from frontik.util.fs_watcher import InotifyWatcher, PollingWatcher
+
+
+class TestFsWatcher:
+    def test_polling_watcher(self, tmp_path: Path) -> None:
+        (tmp_path / 'changed.py').write_text('')
+        (tmp_path / 'deleted.py').write_text('')
+        changes = []
+        watcher = PollingWatcher(str(tmp_path), changes.append)
+        watcher.files_mtime = watcher.scan()
+
+        (tmp_path / 'nested').mkdir()
+        (tmp_path / 'nested' / 'created.py').write_text('')
+        (tmp_path / 'deleted.py').unlink()
+        (tmp_path / 'changed.py').write_text('# changed')
+        watcher.files_mtime[str(tmp_path / 'changed.py')] = 0
+        (tmp_path / 'not_python.txt').write_text('')
+        watcher.check()
+
+        assert changes == [
+            {str(tmp_path / 'changed.py'), str(tmp_path / 'deleted.py'), str(tmp_path / 'nested' / 'created.py')}
+        ]
+
+    @pytest.mark.skipif(not InotifyWatcher.is_available(), reason='inotify is linux only')
+    async def test_inotify_watcher(self, tmp_path: Path) -> None:
+        (tmp_path / 'changed.py').write_text('')
+        changes: asyncio.Queue = asyncio.Queue()
+        watcher = InotifyWatcher(str(tmp_path), changes.put_nowait, batch_delay_sec=0.01)
+        watcher.start()
+
+        try:
+            (tmp_path / 'changed.py').write_text('# changed')
+            (tmp_path / 'nested').mkdir()
+            await asyncio.sleep(0.05)
+            (tmp_path / 'nested' / 'created.py').write_text('')
+
+            paths: set[str] = set()
+            while len(paths) < 2:
+                paths.update(await asyncio.wait_for(changes.get(), timeout=2))
+        finally:
+            watcher.stop()
+
+        assert paths == {str(tmp_path / 'changed.py'), str(tmp_path / 'nested' / 'created.py')}
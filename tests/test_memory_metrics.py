@@ -0,0 +1,48 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from frontik.app_integrations.memory_metrics import SMAPS_ROLLUP_PATH, parse_smaps_rollup, send_metrics
+
+SMAPS_ROLLUP = """55b6843aa000-7ffda7fed000 ---p 00000000 00:00 0                          [rollup]
+Rss:                1392 kB
+Pss:                 475 kB
+Shared_Clean:       1252 kB
+Shared_Dirty:          0 kB
+Private_Clean:        40 kB
+Private_Dirty:       100 kB
+"""
+
+
+class StatsDRecorder:
+    def __init__(self) -> None:
+        self.gauges: dict[str, tuple[int, dict]] = {}
+
+    def gauge(self, aspect: str, value: int, **kwargs: str) -> None:
+        self.gauges[aspect] = (value, kwargs)
+
+
+def test_parse_smaps_rollup() -> None:
+    assert parse_smaps_rollup(SMAPS_ROLLUP) == {
+        'Rss': 1392 * 1024,
+        'Pss': 475 * 1024,
+        'Shared_Clean': 1252 * 1024,
+        'Shared_Dirty': 0,
+        'Private_Clean': 40 * 1024,
+        'Private_Dirty': 100 * 1024,
+    }
+
+
+@pytest.mark.skipif(not os.path.exists(SMAPS_ROLLUP_PATH), reason='smaps_rollup is available on linux only')
+def test_send_memory_metrics() -> None:
+    statsd_client = StatsDRecorder()
+    app = SimpleNamespace(statsd_client=statsd_client, worker_state=SimpleNamespace(worker_id=3))
+
+    send_metrics(app)  # type: ignore[arg-type]
+
+    shared, tags = statsd_client.gauges['worker.memory.shared']
+    private, _ = statsd_client.gauges['worker.memory.private']
+    rss, _ = statsd_client.gauges['worker.memory.rss']
+    assert tags == {'worker': '3'}
+    assert 0 < shared + private <= rss
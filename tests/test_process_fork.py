@@ -1,18 +1,20 @@
 import asyncio
 import contextlib
+import os
 import pickle
 import time
-from ctypes import c_bool, c_int
-from multiprocessing import Lock, Queue, Value
+from ctypes import c_bool, c_double, c_int
+from multiprocessing import Event, Lock, Queue, Value
 from typing import Callable, Optional
 
+import pytest
 from http_client import options as http_client_options
 from http_client.balancing import Server, Upstream, UpstreamConfig, UpstreamConfigs
 from http_client.model.consul_config import RetryPolicyItem
 
 import frontik.process
 from frontik.options import options
-from frontik.process import WorkerState, fork_workers
+from frontik.process import RECYCLED_WORKER_REPLACED, WorkerState, fork_workers
 from frontik.service_discovery import WorkerServiceDiscovery
 
 
@@ -107,7 +109,7 @@ class TestProcessFork:
         fork_workers(
             worker_state=worker_state,
             num_workers=num_workers,
-            master_before_fork_action=lambda: ({}, Lock()),
+            master_before_fork_action=lambda: (service_discovery._upstreams, Lock()),
             master_after_fork_action=master_after_fork_action,
             master_before_shutdown_action=lambda: None,
             worker_function=worker_function,
@@ -142,3 +144,155 @@ class TestProcessFork:
         assert len(worker_shared_data) == 2, 'upstreams size on master and worker should be the same'
 
         worker_queues['worker_exit_event'].put(True)
+
+    def test_standby_worker_replaces_crashed_one(self):
+        frontik.process._supervise_workers = self._orig_supervise
+        options.init_workers_timeout_sec = 5
+        worker_state = WorkerState(Value(c_int, 1), Value(c_bool, 0), Lock())
+        promoted_recovery_started = Value(c_double, 0)
+        all_done = Event()
+
+        def worker_function():
+            if not worker_state.is_standby:
+                worker_state.init_workers_count_down.value -= 1
+                os._exit(1)
+
+            assert worker_state.recovery_started is not None
+            deadline = time.time() + 5
+            while worker_state.recovery_started.value == 0 and not all_done.is_set() and time.time() < deadline:
+                time.sleep(0.01)
+
+            if worker_state.recovery_started.value != 0:
+                promoted_recovery_started.value = worker_state.recovery_started.value
+                all_done.set()
+                time.sleep(0.5)  # let master start the new standby, multiprocessing reaps exited children on start
+            os._exit(0)
+
+        started = time.time()
+        with pytest.raises(SystemExit):
+            fork_workers(
+                worker_state=worker_state,
+                num_workers=1,
+                master_before_fork_action=lambda: ({}, Lock()),
+                master_after_fork_action=noop,
+                master_before_shutdown_action=noop,
+                worker_function=worker_function,
+                worker_listener_handler=noop,
+                num_standby_workers=1,
+            )
+
+        assert started < promoted_recovery_started.value < time.time(), 'standby should get the time of the crash'
+        assert worker_state.children == {}
+
+    def test_recycled_worker_is_replaced(self):
+        frontik.process._supervise_workers = self._orig_supervise
+        options.init_workers_timeout_sec = 5
+        worker_state = WorkerState(Value(c_int, 1), Value(c_bool, 0), Lock())
+        worker_state.recycling_worker_pid = Value(c_int, 0)
+        replacement_has_turn = Value(c_bool, 0)
+        replacement_recovery_started = Value(c_bool, 0)
+        recycled = Event()
+
+        def worker_function():
+            if not recycled.is_set():
+                worker_state.init_workers_count_down.value -= 1
+                worker_state.recycling_worker_pid.value = os.getpid()
+                recycled.set()
+                os._exit(0)
+
+            replacement_has_turn.value = worker_state.recycling_worker_pid.value == -os.getpid()
+            replacement_recovery_started.value = worker_state.recovery_started is not None
+            worker_state.recycling_worker_pid.value = 0
+            os._exit(0)
+
+        with pytest.raises(SystemExit):
+            fork_workers(
+                worker_state=worker_state,
+                num_workers=1,
+                master_before_fork_action=lambda: ({}, Lock()),
+                master_after_fork_action=noop,
+                master_before_shutdown_action=noop,
+                worker_function=worker_function,
+                worker_listener_handler=noop,
+            )
+
+        assert replacement_has_turn.value, 'master should pass recycling turn to the replacement'
+        assert not replacement_recovery_started.value, 'planned recycling is not a crash recovery'
+        assert worker_state.children == {}
+
+    def test_standby_worker_replaces_recycled_one(self):
+        frontik.process._supervise_workers = self._orig_supervise
+        options.init_workers_timeout_sec = 5
+        worker_state = WorkerState(Value(c_int, 1), Value(c_bool, 0), Lock())
+        worker_state.recycling_worker_pid = Value(c_int, 0)
+        promoted_recovery_started = Value(c_double, 0)
+        promoted_has_turn = Value(c_bool, 0)
+        all_done = Event()
+
+        def worker_function():
+            if not worker_state.is_standby:
+                worker_state.init_workers_count_down.value -= 1
+                worker_state.recycling_worker_pid.value = os.getpid()
+                os._exit(0)
+
+            assert worker_state.recovery_started is not None
+            deadline = time.time() + 5
+            while worker_state.recovery_started.value == 0 and not all_done.is_set() and time.time() < deadline:
+                time.sleep(0.01)
+
+            if worker_state.recovery_started.value != 0:
+                promoted_recovery_started.value = worker_state.recovery_started.value
+                promoted_has_turn.value = worker_state.recycling_worker_pid.value == -os.getpid()
+                worker_state.recycling_worker_pid.value = 0
+                all_done.set()
+                time.sleep(0.5)  # let master start the new standby, multiprocessing reaps exited children on start
+            os._exit(0)
+
+        with pytest.raises(SystemExit):
+            fork_workers(
+                worker_state=worker_state,
+                num_workers=1,
+                master_before_fork_action=lambda: ({}, Lock()),
+                master_after_fork_action=noop,
+                master_before_shutdown_action=noop,
+                worker_function=worker_function,
+                worker_listener_handler=noop,
+                num_standby_workers=1,
+            )
+
+        assert promoted_recovery_started.value == RECYCLED_WORKER_REPLACED, 'recycling should not be reported as crash'
+        assert promoted_has_turn.value, 'master should pass recycling turn to the promoted standby'
+
+    def test_replacement_exited_before_serving_is_restarted_as_crashed(self):
+        frontik.process._supervise_workers = self._orig_supervise
+        options.init_workers_timeout_sec = 5
+        worker_state = WorkerState(Value(c_int, 1), Value(c_bool, 0), Lock())
+        worker_state.recycling_worker_pid = Value(c_int, 0)
+        generation = Value(c_int, 0)
+        last_recovery_started = Value(c_double, 0)
+        started = time.time()
+
+        def worker_function():
+            generation.value += 1
+            if generation.value == 1:
+                worker_state.init_workers_count_down.value -= 1
+                worker_state.recycling_worker_pid.value = os.getpid()
+            elif generation.value == 3:
+                assert worker_state.recovery_started is not None
+                last_recovery_started.value = worker_state.recovery_started.value
+                worker_state.recycling_worker_pid.value = 0
+            os._exit(0)  # the second one exits holding the turn
+
+        with pytest.raises(SystemExit):
+            fork_workers(
+                worker_state=worker_state,
+                num_workers=1,
+                master_before_fork_action=lambda: ({}, Lock()),
+                master_after_fork_action=noop,
+                master_before_shutdown_action=noop,
+                worker_function=worker_function,
+                worker_listener_handler=noop,
+            )
+
+        assert generation.value == 3
+        assert started < last_recovery_started.value < time.time(), 'replacement exit should be handled as crash'
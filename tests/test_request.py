@@ -1,10 +1,15 @@
+import asyncio
+
 import pytest
 from fastapi import Request
 from fastapi.responses import ORJSONResponse, Response
+from starlette.datastructures import Headers
+from tornado.httputil import HTTPHeaders
 
 from frontik.app import FrontikApplication
 from frontik.routing import router
 from frontik.testing import FrontikTestBase
+from frontik.tornado_request import EOF, AsgiRequestHeaders, RequestBodyBuffer
 
 DATA = {'body_arg': 'value'}
 
@@ -14,6 +19,17 @@ async def echo_handler(request: Request) -> Response:
     return ORJSONResponse(content=dict(await request.form()))
 
 
+@router.get('/body_length')
+async def body_length_handler(request: Request) -> Response:
+    return Response(content=str(len(await request.body())))
+
+
+@router.get('/non_ascii_header')
+async def non_ascii_header_handler() -> Response:
+    # starlette encodes header values with latin-1
+    return Response(content=b'ok', headers={'X-Name': 'café'})
+
+
 class TestStreamingRequest(FrontikTestBase):
     @pytest.fixture(scope='class')
     def frontik_app(self) -> FrontikApplication:
@@ -26,3 +42,73 @@ class TestStreamingRequest(FrontikTestBase):
             data=DATA,
         )
         assert response.data == DATA
+
+    async def test_get_request_without_body(self):
+        response = await self.fetch('/body_length')
+        assert response.status_code == 200
+        assert response.raw_body == b'0'
+
+    async def test_non_ascii_response_header(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b'GET /non_ascii_header HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        response = await asyncio.wait_for(reader.read(), 2)
+        writer.close()
+
+        assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert b'\r\nX-Name: caf\xe9\r\n' in response
+
+
+def test_asgi_request_headers_are_encoded_lazily() -> None:
+    headers = HTTPHeaders()
+    headers.add('Content-Type', 'text/plain')
+    headers.add('Cookie', 'a=1')
+    headers.add('Cookie', 'b=2')
+
+    asgi_headers = AsgiRequestHeaders(headers)
+    assert asgi_headers._raw is None
+
+    assert list(asgi_headers) == [(b'content-type', b'text/plain'), (b'cookie', b'a=1'), (b'cookie', b'b=2')]
+    assert asgi_headers[0] == (b'content-type', b'text/plain')
+    assert len(asgi_headers) == 3
+    assert Headers(scope={'headers': asgi_headers}).getlist('cookie') == ['a=1', 'b=2']
+
+
+async def test_request_body_buffer_pauses_reading_when_full() -> None:
+    body_buffer = RequestBodyBuffer(limit=10)
+
+    assert body_buffer.put(b'12345') is None
+    drained = body_buffer.put(b'67890')
+    assert drained is not None
+    assert not drained.done()
+
+    assert await body_buffer.get() == b'12345'
+    assert drained.done()
+
+    body_buffer.feed_eof()
+    assert not body_buffer.at_eof()
+    assert await body_buffer.get() == b'67890'
+    assert body_buffer.at_eof()
+    assert await body_buffer.get() is EOF
+
+
+async def test_request_body_buffer_get_waits_for_chunk() -> None:
+    body_buffer = RequestBodyBuffer(limit=10)
+    getter = asyncio.ensure_future(body_buffer.get())
+    await asyncio.sleep(0)
+    assert not getter.done()
+
+    body_buffer.put(b'chunk')
+    assert await getter == b'chunk'
+
+
+async def test_request_body_buffer_returns_whole_body_after_eof() -> None:
+    body_buffer = RequestBodyBuffer(limit=100)
+    body_buffer.put(b'1')
+    body_buffer.put(b'2')
+    body_buffer.put(b'3')
+    assert await body_buffer.get() == b'1'
+
+    body_buffer.feed_eof()
+    assert await body_buffer.get() == b'23'
+    assert body_buffer.at_eof()
+    assert body_buffer.size == 0
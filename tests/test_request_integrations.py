@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from typing import Optional
+
+import pytest
+
+from frontik.request_integrations import RequestIntegrationsChain, compile_request_integrations, get_integrations
+from frontik.request_integrations.integrations_dto import IntegrationDto, RequestIntegration
+
+
+class RecordingIntegration(RequestIntegration):
+    def __init__(self, name: str, calls: list, enabled: bool = True, fail_on_enter: bool = False) -> None:
+        self.name = name
+        self.calls = calls
+        self.enabled = enabled
+        self.fail_on_enter = fail_on_enter
+
+    def is_enabled(self) -> bool:
+        return self.enabled
+
+    def enter(self, frontik_app, tornado_request) -> IntegrationDto:
+        if self.fail_on_enter:
+            raise ValueError(self.name)
+        self.calls.append(f'enter {self.name}')
+        return IntegrationDto(self.name)
+
+    def exit(self, dto: IntegrationDto, exc: Optional[BaseException]) -> None:
+        self.calls.append(f'exit {dto.get_value()} {type(exc).__name__ if exc else None}')
+
+
+def test_chain_exits_integrations_in_reverse_order() -> None:
+    calls: list = []
+    chain = RequestIntegrationsChain([
+        ('first', RecordingIntegration('first', calls)),
+        ('second', RecordingIntegration('second', calls)),
+    ])
+
+    dtos = chain.enter(None, None)
+    assert [dto.get_value() for dto in dtos.values()] == ['first', 'second']
+    chain.exit(dtos, KeyError())
+
+    assert calls == ['enter first', 'enter second', 'exit second KeyError', 'exit first KeyError']
+
+
+def test_chain_exits_entered_integrations_if_enter_fails() -> None:
+    calls: list = []
+    chain = RequestIntegrationsChain([
+        ('first', RecordingIntegration('first', calls)),
+        ('second', RecordingIntegration('second', calls, fail_on_enter=True)),
+    ])
+
+    with pytest.raises(ValueError, match='second'):
+        chain.enter(None, None)
+
+    assert calls == ['enter first', 'exit first ValueError']
+
+
+def test_compile_drops_disabled_integrations_and_wraps_context_managers(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list = []
+
+    @contextmanager
+    def legacy_integration(frontik_app, tornado_request):
+        calls.append('enter legacy')
+        yield IntegrationDto('legacy')
+        calls.append('exit legacy')
+
+    monkeypatch.setattr(
+        'frontik.request_integrations._integrations',
+        [
+            ('enabled', RecordingIntegration('enabled', calls)),
+            ('disabled', RecordingIntegration('disabled', calls, enabled=False)),
+            ('legacy', legacy_integration),
+        ],
+    )
+
+    chain = compile_request_integrations()
+    assert [name for name, _ in chain.integrations] == ['enabled', 'legacy']
+    assert len(get_integrations()) == 3
+
+    chain.exit(chain.enter(None, None))
+    assert calls == ['enter enabled', 'enter legacy', 'exit legacy', 'exit enabled None']
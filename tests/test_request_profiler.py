@@ -0,0 +1,91 @@
+import pytest
+from fastapi import Response
+
+from frontik.app import FrontikApplication
+from frontik.options import options
+from frontik.request_profiler import DISABLED_PROFILE, RequestProfile, RequestProfiler, request_profiler
+from frontik.routing import router
+from frontik.testing import FrontikTestBase
+from tests import create_basic_auth_header
+
+
+@router.get('/request_profiler_page')
+async def get_page() -> Response:
+    return Response(content=b'ok')
+
+
+def test_request_profiler_samples_requests() -> None:
+    profiler = RequestProfiler()
+
+    options.request_profiler_sample_rate = 0.0
+    assert profiler.start_profile() is DISABLED_PROFILE
+
+    options.request_profiler_sample_rate = 1.0
+    assert isinstance(profiler.start_profile(), RequestProfile)
+
+    options.request_profiler_sample_rate = 0.0
+
+
+def test_request_profiler_aggregates_stages_by_handler() -> None:
+    profiler = RequestProfiler()
+    for duration_ns in (5_000, 40_000, 2_000_000):
+        profile = RequestProfile()
+        profile.stages = [('route_lookup', duration_ns, 100), ('page', duration_ns * 2, 1000)]
+        profiler.add('pages.handler', profile)
+    profiler.add('pages.handler', DISABLED_PROFILE)
+
+    stats = profiler.to_dict()['handlers']['pages.handler']
+    assert set(stats) == {'route_lookup', 'page', 'total'}
+    assert stats['route_lookup']['count'] == 3
+    assert stats['route_lookup']['buckets_us'] == {'10': 1, '50': 1, '2500': 1}
+    assert stats['route_lookup']['p50_us'] == 50
+    assert stats['page']['max_allocated_bytes'] == 1000
+    assert stats['total']['max_us'] == 6000
+
+
+class TestRequestProfiler(FrontikTestBase):
+    DEBUG_BASIC_AUTH = create_basic_auth_header('user:god')
+
+    @classmethod
+    def teardown_class(cls):
+        options.request_profiler_sample_rate = 0.0
+
+    @pytest.fixture(scope='class')
+    def frontik_app(self) -> FrontikApplication:
+        options.request_profiler_sample_rate = 1.0
+        return FrontikApplication(app_module_name=None)
+
+    def setup_method(self):
+        options.debug_login = 'user'
+        options.debug_password = 'god'
+
+    def teardown_method(self):
+        options.debug_login = None
+        options.debug_password = None
+
+    async def test_stages_histograms(self):
+        request_profiler.reset()
+        response = await self.fetch('/request_profiler_page')
+        assert response.status_code == 200
+
+        response = await self.fetch(
+            '/request_profiler', method='DELETE', headers={'Authorization': self.DEBUG_BASIC_AUTH}
+        )
+        assert response.status_code == 200
+        stages = response.data['handlers']['tests.test_request_profiler.get_page']
+        assert stages['total']['count'] == 1
+        assert {'integrations_enter', 'debug_mode', 'route_lookup', 'asgi_scope', 'page', 'logging'} <= set(stages)
+
+        response = await self.fetch('/request_profiler', headers={'Authorization': self.DEBUG_BASIC_AUTH})
+        assert 'tests.test_request_profiler.get_page' not in response.data['handlers']
+
+    async def test_stats_require_debug_access(self):
+        response = await self.fetch('/request_profiler')
+        assert response.status_code == 401
+        assert response.headers['WWW-Authenticate'] == 'Basic realm="Secure Area"'
+
+        response = await self.fetch('/request_profiler', method='DELETE')
+        assert response.status_code == 401
+
+        response = await self.fetch('/request_profiler', query={'reset': 'true'})
+        assert response.status_code == 401
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from http_client.request_response import DEADLINE_TIMEOUT_MS_HEADER, OUTER_TIMEOUT_MS_HEADER, SERVER_TIMEOUT
+
+from frontik.app import FrontikApplication
+from frontik.dependencies import RequestTaskGroup
+from frontik.options import options
+from frontik.request_integrations import request_context
+from frontik.request_task_group import CANCELLED_HTTP_REQUESTS_METRIC, REASON_DISCONNECT
+from frontik.request_task_group import RequestTaskGroup as TaskGroup
+from frontik.routing import router
+from frontik.testing import FrontikTestBase
+
+page_child_tasks: list[asyncio.Task] = []
+
+
+@router.get('/task_group/slow_child')
+async def slow_child_page(task_group: RequestTaskGroup) -> str:
+    task = task_group.create_task(asyncio.sleep(10))
+    page_child_tasks.append(task)
+    await task
+    return 'finished'
+
+
+class TestRequestTaskGroup(FrontikTestBase):
+    @pytest.fixture(scope='class')
+    def frontik_app(self) -> FrontikApplication:
+        return FrontikApplication(app_module_name=None)
+
+    async def test_children_are_cancelled_on_deadline(self):
+        options.request_deadline_cancellation = True
+        try:
+            response = await self.fetch(
+                '/task_group/slow_child',
+                headers={OUTER_TIMEOUT_MS_HEADER: '100', DEADLINE_TIMEOUT_MS_HEADER: '100'},
+            )
+        finally:
+            options.request_deadline_cancellation = False
+
+        assert response.status_code == SERVER_TIMEOUT
+        assert page_child_tasks.pop().cancelled()
+
+
+class StatsDRecorder:
+    def __init__(self) -> None:
+        self.counts: list[tuple[str, int, dict]] = []
+
+    def count(self, aspect: str, delta: int, **kwargs: str) -> None:
+        self.counts.append((aspect, delta, kwargs))
+
+
+async def fake_http_request(task_group: TaskGroup, delay: float) -> None:
+    task_group.on_http_request()
+    await asyncio.sleep(delay)
+
+
+async def test_cancel_counts_in_flight_http_requests() -> None:
+    statsd_client = StatsDRecorder()
+    task_group = TaskGroup(statsd_client)  # type: ignore[arg-type]
+    task_group.page_task = asyncio.create_task(asyncio.sleep(10))
+    finished_request = asyncio.create_task(fake_http_request(task_group, 0))
+    slow_requests = [asyncio.create_task(fake_http_request(task_group, 10)) for _ in range(2)]
+    child_task = task_group.create_task(asyncio.sleep(10))
+    await asyncio.sleep(0.01)
+
+    task_group.cancel(REASON_DISCONNECT)
+    await asyncio.gather(*slow_requests, child_task, task_group.page_task, return_exceptions=True)
+
+    assert finished_request.done() and not finished_request.cancelled()
+    assert all(task.cancelled() for task in slow_requests)
+    assert child_task.cancelled()
+    assert task_group.page_task.cancelled()
+    assert statsd_client.counts == [(CANCELLED_HTTP_REQUESTS_METRIC, 2, {'reason': REASON_DISCONNECT})]
+
+
+async def test_closed_group_leaves_tasks_alone() -> None:
+    statsd_client = StatsDRecorder()
+    task_group = TaskGroup(statsd_client)  # type: ignore[arg-type]
+    child_task = task_group.create_task(asyncio.sleep(10))
+    task_group.set_deadline(0.01)
+
+    task_group.close()
+    await asyncio.sleep(0.05)
+    task_group.cancel(REASON_DISCONNECT)
+
+    assert not task_group.deadline_expired
+    assert not child_task.done()
+    assert statsd_client.counts == []
+    child_task.cancel()
+
+
+async def test_task_group_does_not_leak_into_other_requests() -> None:
+    task_group = TaskGroup(StatsDRecorder())  # type: ignore[arg-type]
+
+    async def request() -> None:
+        # request_context integration is not entered, the default request context is shared
+        token = request_context.set_task_group(task_group)
+        assert request_context.get_task_group() is task_group
+        request_context.reset_task_group(token)
+
+    await asyncio.create_task(request())
+
+    assert request_context.get_task_group() is None
+    assert not hasattr(request_context.get_request_context(), 'task_group')
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import gc
+import os
+import sys
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import call, patch
+
+import pytest
+
+from frontik import routing
+from frontik.app_integrations.pages_warmup import dump_page_hits, load_page_hits, warm_up_pages
+from frontik.options import options
+from frontik.route_manifest import ManifestRouteManager, build_route_manifest, dump_route_manifest
+from frontik.routing import find_route
+from frontik.server import _prepare_for_fork
+
+PAGE_TEMPLATE = """
+from frontik.routing import router
+
+
+@router.{method}('{path}')
+async def page():
+    return '{name}'
+"""
+
+MIXED_PAGE = """
+from starlette.responses import PlainTextResponse
+
+from frontik.routing import router
+
+
+@router.get('/lazy/mixed/{item}')
+async def item_page():
+    return 'item'
+
+
+@router.get('/lazy/mixed/exact')
+async def exact_page():
+    return 'exact'
+
+
+router.mount('/lazy/static', PlainTextResponse('static'))
+"""
+
+
+class TestRouteManifest:
+    @pytest.fixture
+    def pages_app(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+        pages = tmp_path / 'lazy_app' / 'pages'
+        (pages / 'users').mkdir(parents=True)
+        (tmp_path / 'lazy_app' / '__init__.py').write_text('')
+        (pages / '__init__.py').write_text('')
+        (pages / 'empty.py').write_text('')
+        (pages / 'status.py').write_text(PAGE_TEMPLATE.format(method='get', path='/lazy/status', name='status'))
+        (pages / 'users' / '__init__.py').write_text('')
+        (pages / 'mixed.py').write_text(MIXED_PAGE)
+        (pages / 'users' / 'item.py').write_text(
+            PAGE_TEMPLATE.format(method='post', path='/lazy/users/{user_id}', name='item')
+        )
+
+        routes_count = len(routing._fastapi_routes)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield tmp_path
+        del routing._fastapi_routes[routes_count:]
+        routing.rebuild_route_index()
+        for name in [name for name in sys.modules if name.startswith('lazy_app')]:
+            del sys.modules[name]
+
+    def build_manifest(self, pages_app: Path) -> str:
+        manifest_path = str(pages_app / 'route_manifest.json')
+        routes_count = len(routing._fastapi_routes)
+        dump_route_manifest(build_route_manifest('lazy_app'), manifest_path)
+
+        del routing._fastapi_routes[routes_count:]
+        routing.rebuild_route_index()
+        for name in [name for name in sys.modules if name.startswith('lazy_app.pages.')]:
+            del sys.modules[name]
+        return manifest_path
+
+    def test_manifest_routes(self, pages_app: Path) -> None:
+        manifest = build_route_manifest('lazy_app')
+
+        assert manifest['routes'] == [
+            {'module': 'lazy_app.pages.status', 'path': '/lazy/status', 'methods': ['GET']},
+            {'module': 'lazy_app.pages.users.item', 'path': '/lazy/users/{user_id}', 'methods': ['POST']},
+        ]
+        assert 'lazy_app.pages.empty' in manifest['eager_modules']
+        assert 'status.py' in manifest['modules']
+
+    def test_page_is_imported_on_first_request(self, pages_app: Path) -> None:
+        route_manager = ManifestRouteManager(self.build_manifest(pages_app))
+        route_manager.import_all_pages('lazy_app')
+
+        assert 'lazy_app.pages.empty' in sys.modules
+        assert 'lazy_app.pages.mixed' in sys.modules, 'module with a mount should be imported eagerly'
+        assert 'lazy_app.pages.users.item' not in sys.modules
+        assert routing._fastapi_routes == sorted(routing._fastapi_routes, key=routing.get_route_sort_key)
+        assert find_route('/lazy/mixed/exact', 'GET')['route'].path == '/lazy/mixed/exact'
+
+        route_manager.import_route('/lazy/users/42/', 'POST')
+
+        assert 'lazy_app.pages.users.item' in sys.modules
+        assert 'lazy_app.pages.status' not in sys.modules
+        assert find_route('/lazy/users/42', 'POST')['path_params'] == {'user_id': '42'}
+
+    def test_changed_page_falls_back_to_import_all_pages(self, pages_app: Path) -> None:
+        manifest_path = self.build_manifest(pages_app)
+        (pages_app / 'lazy_app' / 'pages' / 'empty.py').write_text('# changed\n')
+
+        route_manager = ManifestRouteManager(manifest_path)
+        route_manager.import_all_pages('lazy_app')
+
+        assert not route_manager.pending_modules
+        assert 'lazy_app.pages.status' in sys.modules
+        assert 'lazy_app.pages.users.item' in sys.modules
+
+    def test_page_changed_without_mtime_and_size_change_is_detected(self, pages_app: Path) -> None:
+        manifest_path = self.build_manifest(pages_app)
+        status_page = pages_app / 'lazy_app' / 'pages' / 'status.py'
+        stat = status_page.stat()
+        status_page.write_text(PAGE_TEMPLATE.format(method='get', path='/lazy/statuz', name='status'))
+        os.utime(status_page, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert status_page.stat().st_size == stat.st_size
+
+        route_manager = ManifestRouteManager(manifest_path)
+        route_manager.import_all_pages('lazy_app')
+
+        assert not route_manager.pending_modules
+        assert find_route('/lazy/statuz', 'GET')['route'].path == '/lazy/statuz'
+
+    async def test_warmup_imports_most_requested_pages_first(
+        self, pages_app: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(options, 'pages_warmup_delay_sec', 0)
+        stats_path = str(pages_app / 'warmup_stats.json')
+        dump_page_hits(stats_path, Counter({'lazy_app.pages.users.item': 3, 'lazy_app.pages.status': 1}))
+
+        route_manager = ManifestRouteManager(self.build_manifest(pages_app))
+        route_manager.import_all_pages('lazy_app')
+
+        with patch.object(route_manager, 'import_module', wraps=route_manager.import_module) as import_module:
+            await warm_up_pages(route_manager, load_page_hits(stats_path))
+
+        assert import_module.call_args_list == [call('lazy_app.pages.users.item'), call('lazy_app.pages.status')]
+        assert not route_manager.pending_modules
+        assert find_route('/lazy/status', 'GET')['route'].path == '/lazy/status'
+
+    def test_prefork_preload_imports_pending_pages(self, pages_app: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(options, 'prefork_preload', True)
+        route_manager = ManifestRouteManager(self.build_manifest(pages_app))
+        route_manager.import_all_pages('lazy_app')
+
+        try:
+            _prepare_for_fork(SimpleNamespace(route_manager=route_manager))  # type: ignore[arg-type]
+        finally:
+            gc.unfreeze()
+
+        assert not route_manager.pending_modules
+        assert 'lazy_app.pages.users.item' in sys.modules
+        assert find_route('/lazy/status', 'GET')['route'].path == '/lazy/status'
+
+    def test_page_hits_are_accumulated(self, tmp_path: Path) -> None:
+        stats_path = str(tmp_path / 'warmup_stats.json')
+
+        dump_page_hits(stats_path, Counter({'pages.a': 2}))
+        dump_page_hits(stats_path, Counter({'pages.a': 1, 'pages.b': 5}))
+
+        assert load_page_hits(stats_path) == Counter({'pages.a': 3, 'pages.b': 5})
+
+    def test_page_hits_dumped_by_concurrent_workers_are_not_lost(self, tmp_path: Path) -> None:
+        stats_path = str(tmp_path / 'warmup_stats.json')
+        workers, dumps = 8, 20
+
+        pids = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    for _ in range(dumps):
+                        dump_page_hits(stats_path, Counter({'pages.a': 1}))
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        assert load_page_hits(stats_path) == Counter({'pages.a': workers * dumps})
@@ -1,9 +1,25 @@
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 from fastapi import Request
 from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
 
+from frontik import routing
 from frontik.app import FrontikApplication
-from frontik.routing import get_route_sort_key, router
+from frontik.options import options
+from frontik.routing import (
+    RouteCache,
+    RouteIndex,
+    get_route_sort_key,
+    import_all_pages,
+    insert_sorted_routes,
+    router,
+)
 from frontik.testing import FrontikTestBase
 
 
@@ -93,6 +109,13 @@ class TestRouting(FrontikTestBase):
         assert response.status_code == 200
         assert response.data == method
 
+    async def test_head_request_does_not_change_route_methods(self) -> None:
+        response = await self.fetch('/simple', method='HEAD')
+        assert response.status_code == 200
+
+        route = next(r for r in router.routes if isinstance(r, APIRoute) and r.path == '/simple')
+        assert route.methods == {'GET'}
+
     async def test_options_request_on_existing_route(self) -> None:
         response = await self.fetch('/simple', method='OPTIONS')
         assert response.status_code == 204
@@ -162,3 +185,165 @@ class TestRoutingOrder:
         sorted_routes = sorted(routes, key=get_route_sort_key)
         assert sorted_routes[0].path_format == '/static.mvc'
         assert sorted_routes[1].path_format == '/{param}.mvc'
+
+
+def find_in_index(index: RouteIndex, path: str, method: str = 'GET') -> dict:
+    scope = {'type': 'http', 'path': path, 'method': method, 'route': None}
+    index.find(scope)
+    return scope
+
+
+class TestRouteIndex:
+    def test_static_before_param(self) -> None:
+        index = RouteIndex([create_mock_route('/{param}/detail'), create_mock_route('/static/detail')])
+        assert find_in_index(index, '/static/detail')['route'].path_format == '/static/detail'
+        assert find_in_index(index, '/other/detail')['route'].path_format == '/{param}/detail'
+
+    def test_sort_key_order_regardless_of_registration(self) -> None:
+        index = RouteIndex([create_mock_route('/{param}/detail'), create_mock_route('/static/{param}')])
+        assert find_in_index(index, '/static/detail')['route'].path_format == '/static/{param}'
+
+    def test_path_params(self) -> None:
+        index = RouteIndex([create_mock_route('/id/{id:int}'), create_mock_route('/id/{name}.mvc')])
+        scope = find_in_index(index, '/id/42')
+        assert scope['path_params'] == {'id': 42}
+        scope = find_in_index(index, '/id/page.mvc')
+        assert scope['path_params'] == {'name': 'page'}
+
+    def test_method_and_not_found(self) -> None:
+        index = RouteIndex([create_mock_route('/simple')])
+        assert find_in_index(index, '/simple', 'POST')['route'] is None
+        assert find_in_index(index, '/simple/more')['route'] is None
+        assert find_in_index(index, '//simple')['route'] is None
+
+    def test_head_served_by_get_route(self) -> None:
+        index = RouteIndex([create_mock_route('/static/page'), create_mock_route('/static/{param}')])
+        scope = find_in_index(index, '/static/page', 'HEAD')
+        assert scope['route'].path_format == '/static/page'
+        assert scope['method'] == 'HEAD'
+
+    def test_head_route_before_get_route(self) -> None:
+        head_route = APIRoute('/static/{param}', endpoint=lambda: None, methods=['HEAD'])
+        index = RouteIndex([create_mock_route('/static/page'), head_route])
+        assert find_in_index(index, '/static/page', 'HEAD')['route'] is head_route
+
+    def test_allowed_methods(self) -> None:
+        index = RouteIndex([
+            APIRoute('/simple', endpoint=lambda: None, methods=['GET', 'POST']),
+            APIRoute('/simple', endpoint=lambda: None, methods=['OPTIONS']),
+            APIRoute('/id/{id:int}', endpoint=lambda: None, methods=['PUT']),
+            APIRoute('/id/{name}', endpoint=lambda: None, methods=['DELETE']),
+        ])
+        assert index.get_allowed_methods('/simple') == {'GET', 'POST'}
+        assert index.get_allowed_methods('/id/1') == {'PUT', 'DELETE'}
+        assert index.get_allowed_methods('/id/name') == {'DELETE'}
+        assert index.get_allowed_methods('/unknown') == set()
+
+    def test_path_convertor_fallback(self) -> None:
+        index = RouteIndex([create_mock_route('/files/{name}'), create_mock_route('/files/{rest:path}')])
+        assert find_in_index(index, '/files/a')['route'].path_format == '/files/{name}'
+        assert find_in_index(index, '/files/a/b')['route'].path_format == '/files/{rest}'
+
+    def test_insert_sorted_routes(self) -> None:
+        routes = [create_mock_route(path) for path in ['/a/b', '/a', '/{param}', '/a/{param}']]
+        routes.sort(key=get_route_sort_key)
+        new_routes = [create_mock_route(path) for path in ['/c', '/{other}', '/c/d/e', '/c/{param}']]
+        expected = sorted(routes + new_routes, key=get_route_sort_key)
+
+        routes.extend(new_routes)
+        insert_sorted_routes(routes, len(routes) - len(new_routes))
+
+        assert routes == expected
+
+    @pytest.fixture
+    def app_routes(self) -> Iterator[list[BaseRoute]]:
+        """Replaces app routes with an empty list, routes, route index and cache of the app are restored after test"""
+        saved_state = routing._fastapi_routes, routing._route_index, routing._route_cache
+        routing._fastapi_routes = []
+        yield routing._fastapi_routes
+        routing._fastapi_routes, routing._route_index, routing._route_cache = saved_state
+
+    def test_insert_sorted_routes_updates_index(self, app_routes: list[BaseRoute]) -> None:
+        app_routes.append(create_mock_route('/{param}'))
+        route_index = routing.rebuild_route_index()
+        assert routing.find_route('/static', 'GET')['route'].path_format == '/{param}'
+
+        app_routes.append(create_mock_route('/static'))
+        insert_sorted_routes(app_routes, 1)
+
+        assert routing._get_route_index() is route_index
+        assert routing.find_route('/static', 'GET')['route'].path_format == '/static'
+
+
+class TestRouteCache:
+    def test_lru_eviction(self) -> None:
+        cache = RouteCache(max_size=2, param_route_limit=10)
+        route = create_mock_route('/simple')
+        cache.put('GET', '/a', route, {})
+        cache.put('GET', '/b', route, {})
+        assert cache.get('GET', '/a') is not None
+        cache.put('GET', '/c', route, {})
+
+        assert cache.get('GET', '/b') is None
+        assert cache.get('GET', '/a') is not None
+        assert cache.get('GET', '/c') is not None
+        assert cache.pop_stats() == (3, 1, 1)
+        assert cache.pop_stats() == (0, 0, 0)
+
+    def test_param_route_limit(self) -> None:
+        cache = RouteCache(max_size=10, param_route_limit=2)
+        param_route = create_mock_route('/id/{id}')
+        for i in range(5):
+            cache.put('GET', f'/id/{i}', param_route, {'id': str(i)})
+        cache.put('GET', '/simple', create_mock_route('/simple'), {})
+
+        assert len(cache) == 3
+        assert cache.get('GET', '/id/1') == (param_route, {'id': '1'})
+        assert cache.get('GET', '/id/2') is None
+
+
+class TestPagesManifest:
+    @pytest.fixture
+    def pages_app(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        pages = tmp_path / 'manifest_app' / 'pages'
+        (pages / 'nested').mkdir(parents=True)
+        (tmp_path / 'manifest_app' / '__init__.py').write_text('')
+        (pages / '__init__.py').write_text('')
+        (pages / 'first.py').write_text('')
+        (pages / 'nested' / 'second.py').write_text('')
+
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(options, 'pages_manifest_path', str(tmp_path / 'pages_manifest.json'))
+        yield tmp_path
+        for name in [name for name in sys.modules if name.startswith('manifest_app')]:
+            del sys.modules[name]
+
+    def test_manifest_is_written(self, pages_app: Path) -> None:
+        import_all_pages('manifest_app')
+
+        manifest = json.loads((pages_app / 'pages_manifest.json').read_text())
+        assert manifest['modules'] == [
+            'manifest_app.pages.first',
+            'manifest_app.pages.nested',
+            'manifest_app.pages.nested.second',
+        ]
+        assert 'manifest_app.pages.nested.second' in sys.modules
+
+    def test_manifest_skips_pages_lookup(self, pages_app: Path) -> None:
+        import_all_pages('manifest_app')
+        del sys.modules['manifest_app.pages.nested.second']
+
+        with patch.object(routing, '_iter_page_modules') as iter_page_modules:
+            import_all_pages('manifest_app')
+
+        iter_page_modules.assert_not_called()
+        assert 'manifest_app.pages.nested.second' in sys.modules
+
+    def test_manifest_is_invalidated_by_new_module(self, pages_app: Path) -> None:
+        import_all_pages('manifest_app')
+        (pages_app / 'manifest_app' / 'pages' / 'nested' / 'third.py').write_text('')
+
+        import_all_pages('manifest_app')
+
+        manifest = json.loads((pages_app / 'pages_manifest.json').read_text())
+        assert 'manifest_app.pages.nested.third' in manifest['modules']
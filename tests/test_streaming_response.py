@@ -1,12 +1,18 @@
+import asyncio
 from collections.abc import AsyncIterable
+from typing import Optional
 
 import pytest
 from fastapi.responses import StreamingResponse
 
 from frontik.app import FrontikApplication
+from frontik.handler_asgi import make_asgi_receive
 from frontik.media_types import TEXT_PLAIN
+from frontik.options import options
+from frontik.response_writer import CoalescingResponseWriter
 from frontik.routing import router
 from frontik.testing import FrontikTestBase
+from frontik.tornado_request import FrontikTornadoServerRequest
 
 
 @router.get('/stream')
@@ -18,6 +24,15 @@ async def get_page():
     return StreamingResponse(content=iterable(), headers={'Content-type': TEXT_PLAIN})
 
 
+@router.get('/stream_lines')
+async def get_lines_page():
+    async def iterable() -> AsyncIterable:
+        for i in range(100):
+            yield f'{i}\n'.encode()
+
+    return StreamingResponse(content=iterable(), headers={'Content-type': TEXT_PLAIN})
+
+
 class TestStreamingResponse(FrontikTestBase):
     @pytest.fixture(scope='class')
     def frontik_app(self) -> FrontikApplication:
@@ -27,3 +42,135 @@ class TestStreamingResponse(FrontikTestBase):
         response = await self.fetch('/stream')
         assert response.headers['content-type'] == 'text/plain'
         assert response.raw_body == b'response+second_part'
+
+    async def test_coalesced_streaming_response(self):
+        options.response_write_coalescing = True
+        try:
+            response = await self.fetch('/stream_lines')
+        finally:
+            options.response_write_coalescing = False
+
+        assert response.raw_body == b''.join(f'{i}\n'.encode() for i in range(100))
+
+
+class ConnectionStub:
+    def __init__(self) -> None:
+        self.writes: list[bytes] = []
+
+    def write(self, chunk: bytes) -> asyncio.Future:
+        self.writes.append(chunk)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+
+async def test_coalescing_writer_joins_chunks_up_to_threshold() -> None:
+    connection = ConnectionStub()
+    writer = CoalescingResponseWriter(connection, max_bytes=4, delay_sec=60)  # type: ignore[arg-type]
+
+    for chunk in (b'a', b'b', b'', b'cd', b'e'):
+        await writer.write(chunk)
+    assert connection.writes == [b'abcd']
+
+    await writer.flush()
+    assert connection.writes == [b'abcd', b'e']
+    assert writer.timer is None
+
+
+async def test_coalescing_writer_flushes_after_delay() -> None:
+    connection = ConnectionStub()
+    writer = CoalescingResponseWriter(connection, max_bytes=1024, delay_sec=0.01)  # type: ignore[arg-type]
+
+    await writer.write(b'a')
+    await writer.write(b'b')
+    assert connection.writes == []
+
+    await asyncio.sleep(0.05)
+    assert connection.writes == [b'ab']
+
+
+class SlowConnectionStub:
+    def __init__(self) -> None:
+        self.writes: list[bytes] = []
+        self.futures: list[asyncio.Future] = []
+
+    def write(self, chunk: bytes) -> asyncio.Future:
+        assert all(future.done() for future in self.futures), 'previous write is still in flight'
+        self.writes.append(chunk)
+        self.futures.append(asyncio.get_running_loop().create_future())
+        return self.futures[-1]
+
+
+async def test_coalescing_writer_awaits_delayed_write_before_next_one() -> None:
+    connection = SlowConnectionStub()
+    writer = CoalescingResponseWriter(connection, max_bytes=2, delay_sec=0.01)  # type: ignore[arg-type]
+
+    await writer.write(b'a')
+    await asyncio.sleep(0.05)
+    assert connection.writes == [b'a']
+
+    flush = asyncio.ensure_future(writer.write(b'bc'))
+    await asyncio.sleep(0.05)
+    assert connection.writes == [b'a']
+    assert not flush.done()
+
+    connection.futures[0].set_result(None)
+    await asyncio.sleep(0)
+    assert connection.writes == [b'a', b'bc']
+
+    connection.futures[1].set_result(None)
+    await flush
+    assert writer.pending_write is None
+
+
+def make_finished_request(body: Optional[bytes]) -> FrontikTornadoServerRequest:
+    request = FrontikTornadoServerRequest(method='GET' if body is None else 'POST', uri='/stream')
+    if body is not None:
+        request.get_body_buffer().put(body)
+        request.get_body_buffer().feed_eof()
+    request.finished = True
+    return request
+
+
+@pytest.mark.parametrize('body', [None, b'request body'])
+async def test_receive_waits_for_disconnect_after_body(body: Optional[bytes]) -> None:
+    request = make_finished_request(body)
+    receive = make_asgi_receive(request)
+
+    assert await receive() == {'type': 'http.request', 'body': body or b'', 'more_body': False}
+
+    disconnect = asyncio.create_task(receive())
+    await asyncio.sleep(0.01)
+    assert not disconnect.done(), 'receive should wait for disconnect once the body is delivered'
+
+    request.on_disconnect()
+    assert await asyncio.wait_for(disconnect, 1) == {'type': 'http.disconnect'}
+
+
+@pytest.mark.parametrize('body', [None, b'request body'])
+async def test_streaming_response_does_not_spin_on_receive(body: Optional[bytes]) -> None:
+    receive = make_asgi_receive(make_finished_request(body))
+    receive_calls = 0
+
+    async def counting_receive() -> dict:
+        nonlocal receive_calls
+        receive_calls += 1
+        if receive_calls > 100:
+            raise AssertionError('receive returns without waiting, event loop is blocked')
+        return await receive()
+
+    async def iterable() -> AsyncIterable:
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield f'{i}'.encode()
+
+    sent: list[dict] = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    response = StreamingResponse(content=iterable(), headers={'Content-type': TEXT_PLAIN})
+    await asyncio.wait_for(response({'type': 'http'}, counting_receive, send), 1)
+
+    assert b''.join(message.get('body', b'') for message in sent) == b'012'
+    assert receive_calls == 2
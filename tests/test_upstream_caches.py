@@ -1,10 +1,11 @@
+import pickle
 from threading import Lock
 from typing import Callable, Optional
 
 from http_client import options as http_client_options
 
 from frontik.options import Options, options
-from frontik.service_discovery import MasterServiceDiscovery
+from frontik.service_discovery import MasterServiceDiscovery, UpstreamDelta, WorkerServiceDiscovery
 
 
 class StubServiceDiscovery(MasterServiceDiscovery):
@@ -17,6 +18,9 @@ class StubServiceDiscovery(MasterServiceDiscovery):
         self._upstreams = {}
         self._upstreams_lock = Lock()
         self._send_to_all_workers: Optional[Callable] = None
+        self._upstream_store = None
+        self._sent_servers: dict = {}
+        self._sent_configs: dict = {}
 
 
 class TestUpstreamCaches:
@@ -187,3 +191,43 @@ class TestUpstreamCaches:
         assert service_discovery._upstreams_servers['app-another'][0].address == '2.2.2.2:9999'
         assert len(service_discovery.get_upstream('app').servers) == 3
         assert len([server for server in service_discovery.get_upstream('app').servers if server is not None]) == 2
+
+    def test_workers_get_upstream_deltas(self) -> None:
+        options.upstreams = ['app']
+        http_client_options.datacenters = ['test']
+        options.datacenters = ['test']
+
+        def make_value(*ports: int) -> list:
+            return [
+                {
+                    'Node': {'ID': '1', 'Node': '', 'Address': '1.1.1.1', 'Datacenter': 'test'},
+                    'Service': {
+                        'ID': str(port),
+                        'Service': 'app',
+                        'Address': '',
+                        'Port': port,
+                        'Weights': {'Passing': 100, 'Warning': 0},
+                    },
+                }
+                for port in ports
+            ]
+
+        sent_updates: list = []
+        service_discovery = StubServiceDiscovery(options)
+        service_discovery.set_update_shared_data_hook(lambda data: sent_updates.append(pickle.loads(data)))
+        worker_service_discovery = WorkerServiceDiscovery({})
+
+        service_discovery._update_upstreams_service('app', make_value(9999, 999))
+        service_discovery._update_upstreams_service('app', make_value(9999, 999))
+        service_discovery._update_upstreams_service('app', make_value(9999, 99))
+        assert len(sent_updates) == 2, 'update without changes should not be sent'
+
+        delta = sent_updates[1][0]
+        assert isinstance(delta, UpstreamDelta)
+        assert [server.address for server in delta.added_servers] == ['1.1.1.1:99']
+        assert delta.removed_servers == ['1.1.1.1:999']
+
+        for update in sent_updates:
+            worker_service_discovery.update_upstreams(update)
+        servers = worker_service_discovery.get_upstream('app').servers
+        assert sorted(server.address for server in servers if server is not None) == ['1.1.1.1:99', '1.1.1.1:9999']
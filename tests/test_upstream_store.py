@@ -0,0 +1,97 @@
+import os
+import time
+
+import pytest
+from http_client.balancing import Server, Upstream, UpstreamConfigs
+
+from frontik import upstream_store
+from frontik.service_discovery import WorkerServiceDiscovery
+from frontik.upstream_store import SharedUpstreamStore, UpstreamStoreOverflow
+
+
+def make_upstream(name: str, *addresses: str) -> Upstream:
+    return Upstream(name, UpstreamConfigs({}), [Server(address, 'dest_host') for address in addresses])
+
+
+def get_addresses(upstream: Upstream) -> set[str]:
+    return {server.address for server in upstream.servers if server is not None}
+
+
+def test_worker_reads_changed_upstreams() -> None:
+    store = SharedUpstreamStore(64 * 1024)
+    store.write([make_upstream('app', '10.0.0.1:80'), make_upstream('backend', '10.0.0.2:80')])
+    service_discovery = WorkerServiceDiscovery({}, store)
+
+    app_upstream = service_discovery.get_upstream('app')
+    assert get_addresses(app_upstream) == {'10.0.0.1:80'}
+    assert get_addresses(service_discovery.get_upstream('backend')) == {'10.0.0.2:80'}
+
+    store.write([make_upstream('app', '10.0.0.1:80', '10.0.0.3:80')])
+    _, changed = store.read_changed({'app': 1, 'backend': 2})
+    assert [upstream.name for _, upstream in changed] == ['app'], 'only changed upstreams should be decoded'
+
+    assert service_discovery.get_upstream('app') is app_upstream, 'worker upstream should be updated in place'
+    assert get_addresses(app_upstream) == {'10.0.0.1:80', '10.0.0.3:80'}
+
+
+def test_store_is_shared_with_forked_process() -> None:
+    store = SharedUpstreamStore(64 * 1024)
+    read_fd, write_fd = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            service_discovery = WorkerServiceDiscovery({}, store)
+            deadline = time.time() + 5
+            while service_discovery.get_upstream('app') is None and time.time() < deadline:
+                time.sleep(0.001)
+            os.write(write_fd, ','.join(sorted(get_addresses(service_discovery.get_upstream('app')))).encode())
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    store.write([make_upstream('app', '10.0.0.1:80', '10.0.0.2:80')])
+    assert os.read(read_fd, 1024) == b'10.0.0.1:80,10.0.0.2:80'
+    os.waitpid(pid, 0)
+    os.close(read_fd)
+
+
+def test_store_overflow() -> None:
+    store = SharedUpstreamStore(64)
+    with pytest.raises(UpstreamStoreOverflow):
+        store.write([make_upstream('app', *(f'10.0.0.{i}:80' for i in range(10)))])
+    assert store.version == 0
+
+
+def test_read_overlapping_write_is_rejected_until_next_get_upstream(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SharedUpstreamStore(64 * 1024)
+    store.write([make_upstream('app', '10.0.0.1:80')])
+    service_discovery = WorkerServiceDiscovery({}, store)
+    read_buffer = store._read_buffer
+    reads = 0
+
+    def read_buffer_during_write(applied_versions: dict[str, int]) -> list:
+        nonlocal reads
+        reads += 1
+        if reads == 1:
+            store.write([make_upstream('app', '10.0.0.2:80')])
+        return read_buffer(applied_versions)
+
+    monkeypatch.setattr(store, '_read_buffer', read_buffer_during_write)
+
+    assert service_discovery.get_upstream('app') is None, 'read overlapping a write should not be accepted'
+    assert (reads, store.read_misses) == (1, 1), 'rejected read should not be retried at once'
+
+    assert get_addresses(service_discovery.get_upstream('app')) == {'10.0.0.2:80'}
+    assert (reads, store.read_misses) == (2, 1)
+
+
+def test_table_is_not_read_while_master_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SharedUpstreamStore(64 * 1024)
+    store.write([make_upstream('app', '10.0.0.1:80')])
+    upstream_store.SEQUENCE_STRUCT.pack_into(store.memory, upstream_store.SEQUENCE_OFFSET, store.sequence + 1)
+    monkeypatch.setattr(store, '_read_buffer', lambda applied_versions: pytest.fail('buffer is being written'))
+
+    assert store.read_changed({}) == (-1, [])
+    assert store.read_misses == 1
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from ctypes import c_bool, c_int
+from multiprocessing import Lock, Value
+
+from frontik.options import options
+from frontik.process import WorkerState
+from frontik.worker_recycling import REASON_REQUESTS, RECYCLED_WORKERS_METRIC, WorkerRecycler
+
+
+class StatsDRecorder:
+    def __init__(self) -> None:
+        self.counts: list[tuple[str, int, dict]] = []
+
+    def count(self, aspect: str, delta: int, **kwargs: str) -> None:
+        self.counts.append((aspect, delta, kwargs))
+
+
+class StopRecorder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self) -> None:
+        self.calls += 1
+
+
+def make_worker_state() -> WorkerState:
+    worker_state = WorkerState(Value(c_int, 1), Value(c_bool, 0), Lock())  # type: ignore[arg-type]
+    worker_state.is_master = False
+    worker_state.recycling_worker_pid = Value(c_int, 0)  # type: ignore[assignment]
+    return worker_state
+
+
+async def test_workers_are_recycled_one_at_a_time() -> None:
+    worker_state = make_worker_state()
+    statsd_client = StatsDRecorder()
+    first_stop, second_stop = StopRecorder(), StopRecorder()
+    first = WorkerRecycler(worker_state, statsd_client)  # type: ignore[arg-type]
+    second = WorkerRecycler(worker_state, statsd_client)  # type: ignore[arg-type]
+
+    replacement = None
+    options.worker_max_requests = 2
+    try:
+        first.start(first_stop)
+        second.start(second_stop)
+        for recycler in (first, second):
+            recycler.request_started()
+            recycler.request_finished()
+            recycler.request_started()
+            recycler.request_finished()
+
+        assert (first_stop.calls, second_stop.calls) == (1, 0), 'second worker should wait for its turn'
+        assert worker_state.recycling_worker_pid.value == os.getpid()  # type: ignore[union-attr]
+
+        # master passes the turn to the replacement, which releases it once it serves requests
+        worker_state.recycling_worker_pid.value = -os.getpid()  # type: ignore[union-attr]
+        replacement = WorkerRecycler(worker_state, statsd_client)  # type: ignore[arg-type]
+        replacement.start(StopRecorder())
+        assert worker_state.recycling_worker_pid.value == 0  # type: ignore[union-attr]
+
+        # the limit is already exceeded, so the next request recycles the worker which missed its turn
+        second.request_started()
+        second.request_finished()
+        assert second_stop.calls == 1
+        assert statsd_client.counts == [(RECYCLED_WORKERS_METRIC, 1, {'reason': REASON_REQUESTS})] * 2
+    finally:
+        options.worker_max_requests = 0
+        for recycler in (first, second, replacement):
+            if recycler is not None and recycler.check_timer is not None:
+                recycler.check_timer.cancel()
+
+
+async def test_recycled_worker_waits_for_in_flight_requests() -> None:
+    recycler = WorkerRecycler(make_worker_state(), StatsDRecorder())  # type: ignore[arg-type]
+    recycler.request_started()
+    recycler.request_started()
+
+    wait_task = asyncio.create_task(recycler.wait_for_requests(10))
+    await asyncio.sleep(0.01)
+    recycler.request_finished()
+    assert not wait_task.done()
+    recycler.request_finished()
+    await asyncio.wait_for(wait_task, 1)
+
+    recycler.request_started()
+    started = time.time()
+    await recycler.wait_for_requests(0.05)
+    assert time.time() - started < 1, 'waiting should be limited by timeout'